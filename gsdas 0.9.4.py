@@ -1,8 +1,7 @@
+import os
 import sys
 import matplotlib
 import pandas as pd
-from datetime import datetime
-from scipy import stats, optimize
 from matplotlib.pyplot import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT
 from PyQt5 import QtCore
@@ -10,7 +9,20 @@ from PyQt5.QtGui import QFont, QPixmap
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QDockWidget, QVBoxLayout,
                              QHBoxLayout, QGridLayout, QWidget, QPushButton, QDialog,
                              QLabel, QLineEdit, QSizePolicy, QFileDialog, QSpinBox,
-                             QCheckBox, QRadioButton, QTextEdit, QMessageBox, QSpacerItem)
+                             QCheckBox, QRadioButton, QTextEdit, QMessageBox, QSpacerItem,
+                             QProgressDialog, QInputDialog, QComboBox)
+
+from gsdas import MODELS, AnalysisEngine
+from gsdas.archive import isArchive, splitMember
+from gsdas.export import EXPORT_FORMATS
+from gsdas.figure import FigureModel, Overlay, channelColors
+from gsdas.tasks import TaskManager
+
+# the number of channels spin goes up to
+MAX_CHANNELS = 256
+
+# the jobs of the TaskManager that use the engine
+ENGINE_RESOURCES = ('load', 'calculation', 'fit', 'export')
 
 
 class GasSensorDataAnalysisSystem(QMainWindow):
@@ -29,51 +41,24 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.setWindowTitle('Gas Sensor Data Analysis System v0.9.4')
         self.setGeometry(50, 50, 1350, 900)
 
-        matplotlib.style.use('bmh')
+        self.matplotlibStyle = 'bmh'
+        matplotlib.style.use(self.matplotlibStyle)
         matplotlib.use('Qt5Agg')
 
-        #---DATA FRAMES---#
-        self.rawDF = pd.DataFrame()
-        self.previewDF = pd.DataFrame()
-        self.visualizationDF = pd.DataFrame()
-        self.normalizationDF = pd.DataFrame()
-        self.propertiesDF = pd.DataFrame()
-        self.fitDF = pd.DataFrame()
+        #---ANALYSIS ENGINE---#
+        # every DataFrame and analysis parameter lives in the engine
+        self.engine = AnalysisEngine()
+
+        #---BACKGROUND JOBS---#
+        # load, calculation, fit and export run on a thread pool,
+        # one job of each at a time (see gsdas.tasks)
+        self.tasks = TaskManager(self)
 
         #---VARIABLES---#
-        self.fileName = ''
-        self.concentrationValues = []
-        self.separatorList = ['\t', ',', ' ', ';']
-        self.separator = ''
         self.responseLabel = u'\u0394S/S0 (%)'
 
-        # used to visualize the data
-        self.startVisualizationTime = ''
-        self.endVisualizationTime = ''
-
-        # used to calculate properties
-        self.startExposureTime = ''
-        self.endExposureTime = ''
-        self.endRecoveryTime = ''
-        self.timeFactor = 1
-        self.channelFactor = 1
-        self.numberOfChannels = 1
-        self.timeUnitStr = 'unit'
-        self.channelsUnitStr = 'unit'
-        self.concentrationUnitStr = 'ppm'
-
-        # used in the fitting process
-        self.x_fit_values = []
-        self.coef1_list = []
-        self.coef2_list = []
-        self.fitListLabel = []
-        self.numberOfFitPoints = 100
-
-        self.sensitivityList = []
-        self.sensitivityRValues = []
-        self.sensitivityResultsList = []
-
-        # color options are based on these lists
+        # color options are based on these lists. Files with more
+        # channels than colors take them from the colormap of the palette
         self.colorsList1 = ['black', 'firebrick', 'orange',
                             'yellowgreen', 'royalblue', 'seagreen', 'skyblue', 'violet']
 
@@ -84,16 +69,8 @@ class GasSensorDataAnalysisSystem(QMainWindow):
                             'gold', 'limegreen', 'royalblue', 'indigo', 'crimson']
 
         #---DICTIONARIES---#
-        self.responseType = {'dR/R0': True,
-                             'dR': False,
-                             'Rgas/Rair': False,
-                             'sigconc': False,
-                             'sensitivity': False}
-
-        self.showingChannelsControl = {'ch1': False, 'ch2': False,
-                                       'ch3': False, 'ch4': False,
-                                       'ch5': False, 'ch6': False,
-                                       'ch7': False, 'ch8': False}
+        # one entry per channel of the file, filled when it is loaded
+        self.showingChannelsControl = {}
 
         self.plottingControl = {'previewDF': False,
                                 'visualizationDF': False,
@@ -107,7 +84,12 @@ class GasSensorDataAnalysisSystem(QMainWindow):
                          'Palette2': self.colorsList2,
                          'Palette3': self.colorsList3}
 
+        self.colormapDic = {'Palette1': 'turbo',
+                            'Palette2': 'gist_rainbow',
+                            'Palette3': 'nipy_spectral'}
+
         self.palette = self.colorDic['Palette1']
+        self.colormap = self.colormapDic['Palette1']
 
         self.startMainLayout()
 
@@ -136,6 +118,9 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.mainFigure = Figure(figsize=(5, 4), dpi=100)
         self.mainFigureCanvas = FigureCanvasQTAgg(self.mainFigure)
         self.mainFigureCanvas.setParent(self.cw)
+
+        # axes and lines are kept between plots and updated in place
+        self.figureModel = FigureModel(self.mainFigure)
         self.mainFigureCanvas.setSizePolicy(
             QSizePolicy.Expanding, QSizePolicy.Expanding)
 
@@ -176,6 +161,15 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.exportBtn.setDisabled(True)
         self.exportBtn.clicked.connect(self.openExportDataDialog)
 
+        self.saveProjectBtn = QPushButton(self.dwWidget)
+        self.saveProjectBtn.setText('Save Project')
+        self.saveProjectBtn.setDisabled(True)
+        self.saveProjectBtn.clicked.connect(self.saveProjectRoutine)
+
+        self.openProjectBtn = QPushButton(self.dwWidget)
+        self.openProjectBtn.setText('Open Project')
+        self.openProjectBtn.clicked.connect(self.openProjectRoutine)
+
         self.lbl2 = QLabel(self.dwWidget)
         self.lbl2.setText('Plotting Options:')
 
@@ -247,8 +241,10 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.dwLayout.addWidget(self.lbl1, 0, 0, 1, 1)
         self.dwLayout.addWidget(self.openFileBtn, 1, 0, 1, 1)
         self.dwLayout.addWidget(self.exportBtn, 2, 0, 1, 1)
+        self.dwLayout.addWidget(self.saveProjectBtn, 3, 0, 1, 1)
+        self.dwLayout.addWidget(self.openProjectBtn, 4, 0, 1, 1)
 
-        self.dwLayout.addItem(QSpacerItem(5, 1), 3, 0, 1, 1)
+        self.dwLayout.addItem(QSpacerItem(5, 1), 5, 0, 1, 1)
         self.dwLayout.addWidget(self.lbl2, 9, 0, 1, 1)
         self.dwLayout.addWidget(self.visualizationBtn, 10, 0, 1, 1)
         self.dwLayout.addWidget(self.normalizationBtn, 11, 0, 1, 1)
@@ -280,7 +276,9 @@ class GasSensorDataAnalysisSystem(QMainWindow):
 
             Here, the user has to browse for the file to open, define 
             what is the separator used in the data table, define the number
-            of channels, being 8 the maximum value.
+            of channels, up to MAX_CHANNELS. The first few KB of the
+            file are sniffed when the dialog opens, so the separator can be
+            left on Auto (see sniffFile).
 
             Also, there is the possibility of dividing the time or the 
             channel columns by a factor, to convert the time/resistance
@@ -302,9 +300,12 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.columnSeparatorLbl = QLabel(self.separatorsFrame)
         self.columnSeparatorLbl.setText('Column separator:')
 
+        self.autoSeparatorOpt = QRadioButton(self.separatorsFrame)
+        self.autoSeparatorOpt.setText('Auto')
+        self.autoSeparatorOpt.setChecked(True)
+
         self.tabSeparatorOpt = QRadioButton(self.separatorsFrame)
         self.tabSeparatorOpt.setText('Tab')
-        self.tabSeparatorOpt.setChecked(True)
 
         self.commaSeparatorOpt = QRadioButton(self.separatorsFrame)
         self.commaSeparatorOpt.setText('Comma')
@@ -321,6 +322,7 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.separatorsLayout.addWidget(self.commaSeparatorOpt, 1, 1, 1, 1)
         self.separatorsLayout.addWidget(self.spaceSeparatorOpt, 1, 2, 1, 1)
         self.separatorsLayout.addWidget(self.semicolonSeparatorOpt, 1, 3, 1, 1)
+        self.separatorsLayout.addWidget(self.autoSeparatorOpt, 1, 4, 1, 1)
 
         # Second Frame of Main layout
         self.channelFactorsFrame = QWidget(self.importDlg)
@@ -332,8 +334,8 @@ class GasSensorDataAnalysisSystem(QMainWindow):
 
         self.numberOfChannelsSpin = QSpinBox(self.channelFactorsFrame)
         self.numberOfChannelsSpin.setMinimum(1)
-        self.numberOfChannelsSpin.setMaximum(8)
-        self.numberOfChannelsSpin.setValue(self.numberOfChannels)
+        self.numberOfChannelsSpin.setMaximum(MAX_CHANNELS)
+        self.numberOfChannelsSpin.setValue(self.engine.numberOfChannels)
 
         self.divideTimeFactorLbl = QLabel(self.channelFactorsFrame)
         self.divideTimeFactorLbl.setText('Divide time column by:')
@@ -386,7 +388,7 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.acceptBtnImportDlg = QPushButton(self.lowerBtnFrame)
         self.acceptBtnImportDlg.setText('Accept')
         self.acceptBtnImportDlg.setDisabled(True)
-        self.acceptBtnImportDlg.clicked.connect(self.plotPreviewDF)
+        self.acceptBtnImportDlg.clicked.connect(self.acceptImport)
 
         self.closeBtnImportDlg = QPushButton(self.lowerBtnFrame)
         self.closeBtnImportDlg.setText('Close')
@@ -404,8 +406,44 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.mainLayoutImportDlg.addWidget(
             self.lowerBtnFrame, alignment=QtCore.Qt.Alignment(QtCore.Qt.AlignCenter))
 
+        self.sniffFile()
+
         self.importDlg.exec_()
 
+    def sniffFile(self):
+        """
+            ##########################################################
+
+            Called when the import dialog opens. The engine reads only
+            the first few KB of the file to find its separator, decimal
+            mark, header lines and number of columns, so the user gets
+            an instant preview of the raw lines before the whole file
+            is read, and the number of channels is set to the columns
+            found.
+
+            ##########################################################
+        """
+
+        try:
+            fileFormat = self.engine.sniffFile(self.fileName)
+
+        except (OSError, ValueError) as error:
+            self.previewTextBox.setText(f'{error}\nChoose the column separator and press Preview.')
+            return
+
+        separatorNames = {'\t': 'tab', ',': 'comma', ';': 'semicolon',
+                          ' ': 'space', r'\s+': 'spaces'}
+
+        self.numberOfChannelsSpin.setValue(
+            min(fileFormat.numberOfColumns-1, self.numberOfChannelsSpin.maximum()))
+
+        self.previewTextBox.setText(
+            f'# separator: {separatorNames[fileFormat.separator]}, '
+            f'decimal mark: {fileFormat.decimal}, '
+            f'header lines: {fileFormat.headerLines}, '
+            f'columns: {fileFormat.numberOfColumns}\n\n' +
+            '\n'.join(fileFormat.sample[:20]))
+
     def openVisualizationDialog(self):
         """
             ##########################################################
@@ -428,69 +466,33 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.showingChannelsLbl = QLabel(self.visualizationDlg)
         self.showingChannelsLbl.setText('Showing Channels:')
 
-        self.showCh1Check = QCheckBox('ch1', self.visualizationDlg)
-        if not self.showingChannelsControl['ch1']:
-            self.showCh1Check.setDisabled(True)
-        else:
-            self.showCh1Check.setChecked(True)
-
-        self.showCh2Check = QCheckBox('ch2', self.visualizationDlg)
-        if not self.showingChannelsControl['ch2']:
-            self.showCh2Check.setDisabled(True)
-        else:
-            self.showCh2Check.setChecked(True)
-
-        self.showCh3Check = QCheckBox('ch3', self.visualizationDlg)
-        if not self.showingChannelsControl['ch3']:
-            self.showCh3Check.setDisabled(True)
-        else:
-            self.showCh3Check.setChecked(True)
-
-        self.showCh4Check = QCheckBox('ch4', self.visualizationDlg)
-        if not self.showingChannelsControl['ch4']:
-            self.showCh4Check.setDisabled(True)
-        else:
-            self.showCh4Check.setChecked(True)
-
-        self.showCh5Check = QCheckBox('ch5', self.visualizationDlg)
-        if not self.showingChannelsControl['ch5']:
-            self.showCh5Check.setDisabled(True)
-        else:
-            self.showCh5Check.setChecked(True)
+        # one check box per channel of the file, enabled if it was loaded
+        self.showChannelChecks = {}
 
-        self.showCh6Check = QCheckBox('ch6', self.visualizationDlg)
-        if not self.showingChannelsControl['ch6']:
-            self.showCh6Check.setDisabled(True)
-        else:
-            self.showCh6Check.setChecked(True)
-
-        self.showCh7Check = QCheckBox('ch7', self.visualizationDlg)
-        if not self.showingChannelsControl['ch7']:
-            self.showCh7Check.setDisabled(True)
-        else:
-            self.showCh7Check.setChecked(True)
-
-        self.showCh8Check = QCheckBox('ch8', self.visualizationDlg)
-        if not self.showingChannelsControl['ch8']:
-            self.showCh8Check.setDisabled(True)
-        else:
-            self.showCh8Check.setChecked(True)
+        for channel, loaded in self.showingChannelsControl.items():
+            check = QCheckBox(channel, self.visualizationDlg)
+            check.setChecked(loaded)
+            check.setDisabled(not loaded)
+            self.showChannelChecks[channel] = check
 
         self.cutDataLbl = QLabel(self.visualizationDlg)
         self.cutDataLbl.setText('Time interval:')
 
         self.startPointInput = QLineEdit(self.visualizationDlg)
         self.startPointInput.setFixedWidth(75)
-        self.startPointInput.setText(str(self.startVisualizationTime))
+        self.startPointInput.setText(
+            '' if self.engine.startVisualizationTime is None else str(self.engine.startVisualizationTime))
         self.startPointInput.setPlaceholderText('Begin')
 
         self.endPointInput = QLineEdit(self.visualizationDlg)
         self.endPointInput.setFixedWidth(75)
-        self.endPointInput.setText(str(self.endVisualizationTime))
+        self.endPointInput.setText(
+            '' if self.engine.endVisualizationTime is None else str(self.engine.endVisualizationTime))
         self.endPointInput.setPlaceholderText('End')
 
         self.startZeroCheck = QCheckBox(
             'Set initial time to 0?', self.visualizationDlg)
+        self.startZeroCheck.setChecked(self.engine.startZero)
 
         self.plotVisDataBtn = QPushButton(self.visualizationDlg)
         self.plotVisDataBtn.setText('Plot')
@@ -505,23 +507,21 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.mainVisDlgLayout = QGridLayout(self.visualizationDlg)
 
         self.mainVisDlgLayout.addWidget(self.showingChannelsLbl, 0, 0, 1, 4)
-        self.mainVisDlgLayout.addWidget(self.showCh1Check, 1, 0, 1, 1)
-        self.mainVisDlgLayout.addWidget(self.showCh2Check, 1, 1, 1, 1)
-        self.mainVisDlgLayout.addWidget(self.showCh3Check, 1, 2, 1, 1)
-        self.mainVisDlgLayout.addWidget(self.showCh4Check, 1, 3, 1, 1)
-        self.mainVisDlgLayout.addWidget(self.showCh5Check, 2, 0, 1, 1)
-        self.mainVisDlgLayout.addWidget(self.showCh6Check, 2, 1, 1, 1)
-        self.mainVisDlgLayout.addWidget(self.showCh7Check, 2, 2, 1, 1)
-        self.mainVisDlgLayout.addWidget(self.showCh8Check, 2, 3, 1, 1)
 
-        self.mainVisDlgLayout.addWidget(self.cutDataLbl, 3, 0, 1, 2)
-        self.mainVisDlgLayout.addWidget(self.startPointInput, 3, 2, 1, 2)
-        self.mainVisDlgLayout.addWidget(self.endPointInput, 4, 2, 1, 2)
+        # the channels fill rows of four check boxes
+        for position, check in enumerate(self.showChannelChecks.values()):
+            self.mainVisDlgLayout.addWidget(check, 1+position//4, position % 4, 1, 1)
+
+        row = 1 + max(-(-len(self.showChannelChecks)//4), 1)
 
-        self.mainVisDlgLayout.addWidget(self.startZeroCheck, 5, 0, 1, 4)
+        self.mainVisDlgLayout.addWidget(self.cutDataLbl, row, 0, 1, 2)
+        self.mainVisDlgLayout.addWidget(self.startPointInput, row, 2, 1, 2)
+        self.mainVisDlgLayout.addWidget(self.endPointInput, row+1, 2, 1, 2)
 
-        self.mainVisDlgLayout.addWidget(self.plotVisDataBtn, 6, 0, 1, 2)
-        self.mainVisDlgLayout.addWidget(self.closeDlgBtn, 6, 2, 1, 2)
+        self.mainVisDlgLayout.addWidget(self.startZeroCheck, row+2, 0, 1, 4)
+
+        self.mainVisDlgLayout.addWidget(self.plotVisDataBtn, row+3, 0, 1, 2)
+        self.mainVisDlgLayout.addWidget(self.closeDlgBtn, row+3, 2, 1, 2)
 
         self.visualizationDlg.exec_()
 
@@ -533,6 +533,9 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             Normalization means that the system will divide each
             column by its own value at a given time. The resulting
             data table will be plotted together for comparison.
+            The other modes divide by the mean of a baseline interval
+            or by the R0 of the first cycle, or scale each column by
+            its min-max or z-score.
 
             This option is available only when  there are more than
             2 columns in the visualizationDF
@@ -561,16 +564,41 @@ class GasSensorDataAnalysisSystem(QMainWindow):
 
         # objects in the top Layout
         self.normTimeLbl = QLabel(self.topNormDialogWidget)
-        self.normTimeLbl.setText('Normalize with resistance at:')
+        self.normTimeLbl.setText('Normalize with:')
+
+        self.normModeInput = QComboBox(self.topNormDialogWidget)
+
+        for mode, label in [('point', 'Resistance at'), ('baseline', 'Baseline mean'),
+                            ('minmax', 'Min-max'), ('zscore', 'Z-score'),
+                            ('r0', 'First cycle R0')]:
+            self.normModeInput.addItem(label, mode)
+
+        self.normModeInput.setCurrentIndex(
+            max(self.normModeInput.findData(self.engine.normalizationMode), 0))
 
         self.normTimeInput = QLineEdit(self.topNormDialogWidget)
         self.normTimeInput.setPlaceholderText('Time')
         self.normTimeInput.setFixedWidth(75)
 
+        self.normEndInput = QLineEdit(self.topNormDialogWidget)
+        self.normEndInput.setPlaceholderText('End')
+        self.normEndInput.setFixedWidth(75)
+
+        # only the modes with times use the inputs
+        def showTimeInputs():
+            mode = self.normModeInput.currentData()
+            self.normTimeInput.setEnabled(mode in ('point', 'baseline'))
+            self.normEndInput.setEnabled(mode == 'baseline')
+
+        self.normModeInput.currentIndexChanged.connect(showTimeInputs)
+        showTimeInputs()
+
         # top layout is a HBox:
         self.topNormDialogLayout = QHBoxLayout(self.topNormDialogWidget)
         self.topNormDialogLayout.addWidget(self.normTimeLbl)
+        self.topNormDialogLayout.addWidget(self.normModeInput)
         self.topNormDialogLayout.addWidget(self.normTimeInput)
+        self.topNormDialogLayout.addWidget(self.normEndInput)
 
         # objects in the bottom layout
         self.normSetBtn = QPushButton(self.BottomNormDialogWidget)
@@ -616,7 +644,7 @@ class GasSensorDataAnalysisSystem(QMainWindow):
 
         self.sensorPropertiesTablePreview = QTextEdit(self.responseDlg)
         self.sensorPropertiesTablePreview.setText(
-            self.propertiesDF.to_string(float_format='%10.2f', justify='match-parent'))
+            self.engine.propertiesDF.to_string(float_format='%10.2f', justify='match-parent'))
         self.sensorPropertiesTablePreview.setMinimumSize(400, 300)
         self.sensorPropertiesTablePreview.setReadOnly(True)
         self.sensorPropertiesTablePreview.setLineWrapMode(0)
@@ -689,6 +717,20 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.clearAllRespBtn.setText('Clear all')
         self.clearAllRespBtn.clicked.connect(self.clearAllResponseDF)
 
+        self.detectCyclesBtn = QPushButton(self.leftPanel)
+        self.detectCyclesBtn.setText('Detect cycles')
+        self.detectCyclesBtn.setToolTip(
+            'Finds every cycle in ch1 and appends them.\n'
+            'Enter one concentration per cycle separated by commas.')
+        self.detectCyclesBtn.clicked.connect(self.detectCyclesRoutine)
+
+        self.loadScheduleBtn = QPushButton(self.leftPanel)
+        self.loadScheduleBtn.setText('Load schedule')
+        self.loadScheduleBtn.setToolTip(
+            'Reads the valve schedule (CSV/JSON) and calculates every cycle.\n'
+            'The schedule is applied again to the next files opened.')
+        self.loadScheduleBtn.clicked.connect(self.loadScheduleRoutine)
+
         self.plotRespBtn = QPushButton(self.leftPanel)
         self.plotRespBtn.setText('Plot')
         self.plotRespBtn.clicked.connect(self.plotRespData)
@@ -743,9 +785,13 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             self.clearAllRespBtn, 12, 0, 1, 1)
         self.leftPanelRespDialogLayout.addWidget(self.clearLastRespBtn, 12, 1, 1, 1)
         self.leftPanelRespDialogLayout.addWidget(
-            self.plotRespBtn, 13, 0, 1, 1)
+            self.detectCyclesBtn, 13, 0, 1, 1)
+        self.leftPanelRespDialogLayout.addWidget(
+            self.loadScheduleBtn, 13, 1, 1, 1)
+        self.leftPanelRespDialogLayout.addWidget(
+            self.plotRespBtn, 14, 0, 1, 1)
         self.leftPanelRespDialogLayout.addWidget(
-            self.closeRespBtn, 13, 1, 1, 1)
+            self.closeRespBtn, 14, 1, 1, 1)
 
         self.leftPanelRespDialogLayout.setColumnStretch(0, 1)
         self.leftPanelRespDialogLayout.setColumnStretch(1, 1)
@@ -760,7 +806,8 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             The user can choose to export to CSV files the data from each
             one of the DataFrames as long as they are holding data. The 
             options are visualizationDF, normalizationDF, propertiesDF, 
-            fit data and info.
+            fit data and info. The tables can also be exported to the
+            binary formats npz, parquet and hdf5.
 
             ##########################################################    
         """
@@ -779,6 +826,9 @@ class GasSensorDataAnalysisSystem(QMainWindow):
 
         self.exportFileNameInput = QLineEdit(self.exportDlg)
 
+        self.exportFormatInput = QComboBox(self.exportDlg)
+        self.exportFormatInput.addItems(EXPORT_FORMATS)
+
         self.exportChoiceLbl = QLabel(self.exportDlg)
         self.exportChoiceLbl.setText('Choose data to export:')
 
@@ -810,6 +860,7 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         # Grid management is row, col, rowspan, colspan
         self.exportDlgLayout = QGridLayout(self.exportDlg)
         self.exportDlgLayout.addWidget(self.selectFolderBtn, 0, 0, 1, 1)
+        self.exportDlgLayout.addWidget(self.exportFormatInput, 0, 1, 1, 1)
         self.exportDlgLayout.addWidget(self.exportFileNameLbl, 1, 0, 1, 2)
         self.exportDlgLayout.addWidget(self.exportFileNameInput, 2, 0, 1, 2)
         self.exportDlgLayout.addWidget(self.exportChoiceLbl, 3, 0, 1, 2)
@@ -826,16 +877,16 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         # Here, it checks the length of the index column for each DF,
         # If it is zero, then the user can not export it.
 
-        if len(self.visualizationDF.index) != 0:
+        if len(self.engine.visualizationDF.index) != 0:
             self.exportVisDataCheck.setDisabled(False)
 
-        if len(self.normalizationDF.index) != 0:
+        if len(self.engine.normalizationDF.index) != 0:
             self.exportNormDataCheck.setDisabled(False)
 
-        if len(self.propertiesDF.index) != 0:
+        if len(self.engine.propertiesDF.index) != 0:
             self.exportPropDataCheck.setDisabled(False)
 
-        if len(self.fitDF.index) != 0:
+        if len(self.engine.fitDF.index) != 0:
             self.exportFitInfoCheck.setDisabled(False)
 
         self.exportDlg.exec_()
@@ -845,7 +896,9 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             ##########################################################
 
             This box allows the user to choose the response type, number 
-            of fitting points the plotting style and color palette.
+            of fitting points the plotting style and color palette. It
+            also controls the fit model, its confidence intervals and
+            the cache of parsed files.
 
             The most important settings here are the response type, conc
             unit, and number of fitting points. The number of fitting
@@ -871,42 +924,76 @@ class GasSensorDataAnalysisSystem(QMainWindow):
 
         self.responseOpt1 = QRadioButton(self.settingsDlgWidget1)
         self.responseOpt1.setText(u'\u0394S/S0 (%) ')
-        if self.responseType['dR/R0']:
+        if self.engine.responseType['dR/R0']:
             self.responseOpt1.setChecked(True)
 
         self.responseOpt2 = QRadioButton(self.settingsDlgWidget1)
-        self.responseOpt2.setText(u'\u0394S'+f' ({self.channelsUnitStr})')
-        if self.responseType['dR']:
+        self.responseOpt2.setText(u'\u0394S'+f' ({self.engine.channelsUnitStr})')
+        if self.engine.responseType['dR']:
             self.responseOpt2.setChecked(True)
 
         self.responseOpt3 = QRadioButton(self.settingsDlgWidget1)
         self.responseOpt3.setText('S(gas)/S(air)')
-        if self.responseType['Rgas/Rair']:
+        if self.engine.responseType['Rgas/Rair']:
             self.responseOpt3.setChecked(True)
 
         self.responseOpt4 = QCheckBox(self.settingsDlgWidget1)
         self.responseOpt4.setText('Signal/conc?')
-        if self.responseType['sigconc']:
+        if self.engine.responseType['sigconc']:
             self.responseOpt4.setChecked(True)
 
         self.sensitivityOpt = QCheckBox(self.settingsDlgWidget1)
         self.sensitivityOpt.setText('Sensitivity?')
-        if self.responseType['sensitivity']:
+        if self.engine.responseType['sensitivity']:
             self.sensitivityOpt.setChecked(True)
         
         self.concentrationUnitLbl = QLabel(self.settingsDlgWidget1)
         self.concentrationUnitLbl.setText('Conc. unit:  ')
 
         self.concentrationUnitInput = QLineEdit(self.settingsDlgWidget1)
-        self.concentrationUnitInput.setPlaceholderText(self.concentrationUnitStr)
+        self.concentrationUnitInput.setPlaceholderText(self.engine.concentrationUnitStr)
         self.concentrationUnitInput.setFixedWidth(50)
 
         self.numberOfFitPointsLbl = QLabel('N fit points:')
 
         self.numberOfFitPointsInput = QLineEdit(self.settingsDlgWidget1)
-        self.numberOfFitPointsInput.setPlaceholderText(f'{self.numberOfFitPoints}')
+        self.numberOfFitPointsInput.setPlaceholderText(f'{self.engine.numberOfFitPoints}')
         self.numberOfFitPointsInput.setFixedWidth(50)
 
+        self.fitModelLbl = QLabel('Fit model:')
+
+        self.fitModelInput = QComboBox(self.settingsDlgWidget1)
+        self.fitModelInput.addItems(list(MODELS) + ['auto (AIC)', 'auto (BIC)'])
+
+        if self.engine.fitModelName == 'auto':
+            self.fitModelInput.setCurrentText(f'auto ({self.engine.modelCriterion.upper()})')
+        else:
+            self.fitModelInput.setCurrentText(self.engine.fitModelName)
+
+        self.kineticsModelLbl = QLabel('Kinetics fit:')
+
+        self.kineticsModelInput = QComboBox(self.settingsDlgWidget1)
+        self.kineticsModelInput.addItems(['None', 'single', 'double'])
+        self.kineticsModelInput.setCurrentText(self.engine.kineticsModel or 'None')
+
+        self.confidenceMethodLbl = QLabel('Conf. intervals:')
+
+        self.confidenceMethodInput = QComboBox(self.settingsDlgWidget1)
+        self.confidenceMethodInput.addItems(['None', 'bootstrap', 'jackknife'])
+        self.confidenceMethodInput.setCurrentText(self.engine.confidenceMethod or 'None')
+
+        self.numberOfResamplesLbl = QLabel('N resamples:')
+
+        self.numberOfResamplesInput = QLineEdit(self.settingsDlgWidget1)
+        self.numberOfResamplesInput.setPlaceholderText(f'{self.engine.numberOfResamples}')
+        self.numberOfResamplesInput.setFixedWidth(50)
+
+        self.randomSeedLbl = QLabel('Seed:')
+
+        self.randomSeedInput = QLineEdit(self.settingsDlgWidget1)
+        self.randomSeedInput.setPlaceholderText(f'{self.engine.randomSeed}')
+        self.randomSeedInput.setFixedWidth(50)
+
         self.settingsDlgWidget1Layout = QGridLayout(self.settingsDlgWidget1)
         self.settingsDlgWidget1Layout.addWidget(self.settingsRespTypeLbl, 0, 0, 1, 1)
         self.settingsDlgWidget1Layout.addWidget(self.responseOpt1, 1, 0, 1, 1)
@@ -918,7 +1005,17 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.settingsDlgWidget1Layout.addWidget(self.concentrationUnitInput, 1, 4, 1, 1)
         self.settingsDlgWidget1Layout.addWidget(self.numberOfFitPointsLbl, 2, 3, 1, 1)
         self.settingsDlgWidget1Layout.addWidget(self.numberOfFitPointsInput, 2, 4, 1, 1)
-        self.settingsDlgWidget1Layout.setColumnStretch(5, 1)
+        self.settingsDlgWidget1Layout.addWidget(self.fitModelLbl, 3, 3, 1, 1)
+        self.settingsDlgWidget1Layout.addWidget(self.fitModelInput, 3, 4, 1, 1)
+        self.settingsDlgWidget1Layout.addWidget(self.kineticsModelLbl, 4, 3, 1, 1)
+        self.settingsDlgWidget1Layout.addWidget(self.kineticsModelInput, 4, 4, 1, 1)
+        self.settingsDlgWidget1Layout.addWidget(self.confidenceMethodLbl, 1, 5, 1, 1)
+        self.settingsDlgWidget1Layout.addWidget(self.confidenceMethodInput, 1, 6, 1, 1)
+        self.settingsDlgWidget1Layout.addWidget(self.numberOfResamplesLbl, 2, 5, 1, 1)
+        self.settingsDlgWidget1Layout.addWidget(self.numberOfResamplesInput, 2, 6, 1, 1)
+        self.settingsDlgWidget1Layout.addWidget(self.randomSeedLbl, 3, 5, 1, 1)
+        self.settingsDlgWidget1Layout.addWidget(self.randomSeedInput, 3, 6, 1, 1)
+        self.settingsDlgWidget1Layout.setColumnStretch(7, 1)
 
         # Line 2
         self.settingsDlgWidget2 = QWidget(self.settingsDlg)
@@ -984,6 +1081,35 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.settingsDlgWidget2Layout.setColumnStretch(3, 1)
 
         # Line 4
+        self.settingsDlgWidget5 = QWidget(self.settingsDlg)
+
+        self.useCacheCheck = QCheckBox(self.settingsDlgWidget5)
+        self.useCacheCheck.setText('Cache parsed files')
+        self.useCacheCheck.setChecked(self.engine.cache.enabled)
+
+        self.cacheSizeLbl = QLabel(self.settingsDlgWidget5)
+        self.cacheSizeLbl.setText('Max size (MB):')
+
+        self.cacheSizeInput = QLineEdit(self.settingsDlgWidget5)
+        self.cacheSizeInput.setPlaceholderText(f'{self.engine.cache.maxSize//2**20}')
+        self.cacheSizeInput.setFixedWidth(50)
+
+        self.cacheUsageLbl = QLabel(self.settingsDlgWidget5)
+        self.cacheUsageLbl.setText(f'in use: {self.engine.cache.size()/2**20:.2f} MB')
+
+        self.purgeCacheBtn = QPushButton(self.settingsDlgWidget5)
+        self.purgeCacheBtn.setText('Purge cache')
+        self.purgeCacheBtn.clicked.connect(self.purgeCache)
+
+        self.settingsDlgWidget5Layout = QHBoxLayout(self.settingsDlgWidget5)
+        self.settingsDlgWidget5Layout.addWidget(self.useCacheCheck)
+        self.settingsDlgWidget5Layout.addWidget(self.cacheSizeLbl)
+        self.settingsDlgWidget5Layout.addWidget(self.cacheSizeInput)
+        self.settingsDlgWidget5Layout.addWidget(self.cacheUsageLbl)
+        self.settingsDlgWidget5Layout.addWidget(self.purgeCacheBtn)
+        self.settingsDlgWidget5Layout.addStretch(1)
+
+        # Line 5
         self.settingsDlgWidget4 = QWidget(self.settingsDlg)
         self.acceptSettingsBtn = QPushButton(self.settingsDlgWidget4)
         self.acceptSettingsBtn.setText('Accept')
@@ -1005,7 +1131,9 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.settingsDlgMainLayout.addItem(QSpacerItem(1, 10), 3, 0, 1, 4)
         self.settingsDlgMainLayout.addWidget(self.settingsDlgWidget3, 4, 0, 1, 3)
         self.settingsDlgMainLayout.addItem(QSpacerItem(1, 10), 5, 0, 1, 4)
-        self.settingsDlgMainLayout.addWidget(self.settingsDlgWidget4, 6, 1, 1, 2)
+        self.settingsDlgMainLayout.addWidget(self.settingsDlgWidget5, 6, 0, 1, 3)
+        self.settingsDlgMainLayout.addItem(QSpacerItem(1, 10), 7, 0, 1, 4)
+        self.settingsDlgMainLayout.addWidget(self.settingsDlgWidget4, 8, 1, 1, 2)
 
         self.settingsDlg.exec_()
 
@@ -1013,31 +1141,58 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         """ ##########################################################
 
             This function will get the file path using the QFileDialog
-            and set the fileName that will be used to insert the data 
-            into the rawDF. If there is data in the variable fileName, 
-            it will clean the figure, the dataFrames, and it will call 
-            the function openFileDialog.
+            and set the fileName that will be used to load the data 
+            with the engine. If the file is an archive (.zip, .gz, .xz),
+            the data files inside it are listed and the user picks one,
+            which is read without extracting it. If there is data in
+            the variable fileName, it will clean the figure, the 
+            dataFrames, and it will call the function openFileDialog.
 
             ###########################################################
         """
 
+        if self.isEngineBusy():
+            return
+
         # self.fileDirectory = QFileDialog.getOpenFileName(options=QFileDialog.DontUseNativeDialog)
         self.fileDirectory = QFileDialog.getOpenFileName()
         self.fileName = f'{self.fileDirectory[0]}'
 
+        if self.fileName and isArchive(self.fileName):
+            self.fileName = self.chooseArchiveMember(self.fileName)
+
         if self.fileName:
-            self.propertiesDF = pd.DataFrame()
-            self.previewDF = pd.DataFrame()
-            self.visualizationDF = pd.DataFrame()
-            self.normalizationDF = pd.DataFrame()
-            self.propertiesDF = pd.DataFrame()
-            self.fitDF = pd.DataFrame()
-            self.mainFigure.clf()
+            self.engine.reset()
+            self.figureModel.clear()
             self.openFileDialog()
 
         else:
             pass
 
+    def chooseArchiveMember(self, archive):
+        """ Asks which data file of the archive to open ('' if none). """
+
+        try:
+            members = self.engine.listDataMembers(archive)
+
+        except (OSError, ValueError) as error:
+            self.warningDialog(str(error))
+            return ''
+
+        if not members:
+            self.warningDialog('No data file found in the archive!')
+            return ''
+
+        if len(members) == 1:
+            return members[0]
+
+        names = [splitMember(member)[1] or os.path.basename(member) for member in members]
+
+        name, accepted = QInputDialog.getItem(
+            self, 'Open archive', 'Data file:', names, 0, False)
+
+        return members[names.index(name)] if accepted else ''
+
     def previewData(self):
         """
             ##########################################################
@@ -1046,266 +1201,370 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             in the open file dialog box is clicked. This function will run
             the following steps:
 
-            #1. The algorithm then empties the  rawDF and previewDF.
-                This is designed to make this function able to work
-                multiple times after the software is running. It also
-                gets the value from the unitInputs and assign them
-                to the corresponding variables;
+            #1. It gets the value from the unitInputs and assign them
+                to the corresponding variables of the engine;
 
             #2.	It checks what is the separator chosen and uses the
-                separatorList to assign it to the separator variable;
-
-            #3. Creates the rawDF using the read_csv from pandas;
+                separatorList to assign it to the separator variable.
+                With Auto, the engine finds it by sniffing the file;
 
-            #4. If it does not have at least 2 columns, the separator is
-                probably wrong. It warns the user about this;
-
-            #5. Builds the previewDF by putting the name of ch1, ch2, ch3… 
-                up to the length of the number of columns in the rawDF. 
-                If the number is columns in the rawDF is smaller than what 
-                is set in the number of channels spin, it goes the maximum 
-                and returns a  warning.
-
-                Get the new time values and channel values
-                based on the users input.
-
-                If these inputs are not floatable,
+            #3. Get the new time values and channel values based on 
+                the users input. If these inputs are not floatable,
                 it will return an error.
 
-            #6.	By the end of the routine it will put the data in the 
-                previewTextBox and enable the acceptButton and the visualization
-                button in the dock widget;
+            #4. The engine reads only the first and the last few KB of the
+                file and parses their first and last rows, with only the
+                channels set in the numberOfChannelsSpin, so big files are
+                previewed at once. If it does not have at least 2 columns,
+                the separator is probably wrong and the user is warned. If
+                the number of columns in the file is smaller than what is 
+                set in the number of channels spin, it goes the maximum and
+                returns a warning.
 
-            #7.	The name of each column here is ch1, ch2… For each of these
-                columns, it will make each variable stored in the dictionary
-                showingChannelsControl True
+            #5.	By the end of the routine it will put these rows in the 
+                previewTextBox and enable the acceptButton. The whole file
+                is only read when the import is accepted (acceptImport).
 
             ##########################################################    
         """
 
         try:
             # 1
-            self.rawDF = pd.DataFrame()
-            self.previewDF = pd.DataFrame()
-
             if self.timeUnitInput.text():
-                self.timeUnitStr = self.timeUnitInput.text()
+                self.engine.timeUnitStr = self.timeUnitInput.text()
             else:
-                self.timeUnitStr = 'unit'
+                self.engine.timeUnitStr = 'unit'
 
             if self.channelsUnitInput.text():
-                self.channelsUnitStr = self.channelsUnitInput.text()
+                self.engine.channelsUnitStr = self.channelsUnitInput.text()
             else:
-                self.channelsUnitStr = 'unit'
-
-            self.numberOfChannels = self.numberOfChannelsSpin.value()
+                self.engine.channelsUnitStr = 'unit'
 
             # make sure every showchannel is False in the beginning
             for key in self.showingChannelsControl:
                 self.showingChannelsControl[key] = False
 
             # 2
-            if self.tabSeparatorOpt.isChecked():
-                self.separator = self.separatorList[0]
+            if self.autoSeparatorOpt.isChecked():
+                separator = None
+
+            elif self.tabSeparatorOpt.isChecked():
+                separator = self.engine.separatorList[0]
 
             elif self.commaSeparatorOpt.isChecked():
-                self.separator = self.separatorList[1]
+                separator = self.engine.separatorList[1]
 
             elif self.spaceSeparatorOpt.isChecked():
-                self.separator = self.separatorList[2]
+                separator = self.engine.separatorList[2]
 
             elif self.semicolonSeparatorOpt.isChecked():
-                self.separator = self.separatorList[3]
+                separator = self.engine.separatorList[3]
 
             # 3
-            self.rawDF = pd.read_csv(
-                self.fileName, sep=self.separator, header=None)
+            timeFactor = self.engine.timeFactor
+            channelFactor = self.engine.channelFactor
+
+            if self.timeFactorStr.text():
+                try:
+                    timeFactor = float(self.timeFactorStr.text())
+
+                except ValueError:
+                    self.warningDialog(
+                        'Invalid time factor !')
+
+            else:
+                timeFactor = 1
+
+            if self.channelsFactorStr.text():
+                try:
+                    channelFactor = float(
+                        self.channelsFactorStr.text())
+
+                except ValueError:
+                    self.warningDialog('Invalid channel factor !')
+
+            else:
+                channelFactor = 1
 
             # 4
-            if len(self.rawDF.columns) == 1:
-                self.warningDialog('Invalid column separator!')
+            try:
+                head, tail = self.engine.previewSample(self.fileName, separator,
+                                                       numberOfChannels=self.numberOfChannelsSpin.value(),
+                                                       timeFactor=timeFactor,
+                                                       channelFactor=channelFactor)
+
+            except ValueError as error:
+                self.warningDialog(str(error))
+                return
+
+            if self.engine.numberOfChannels < self.numberOfChannelsSpin.value():
+                self.warningDialog(
+                    f'For this dataset the max \n number of Channels is {self.engine.numberOfChannels}')
+
+                self.numberOfChannelsSpin.setValue(self.engine.numberOfChannels)
 
             # 5
-            else:
-                """for referencing in the code, there is a colX list
-                    to get the lists of the rawDF"""
+            lines = pd.concat([head, tail]).to_string(float_format='%10.2f',
+                                                      justify='match-parent').splitlines()
+
+            # the column names and the index name take the first 2 lines
+            if not tail.empty:
+                lines.insert(2+len(head), '...')
 
-                self.rawDFColNames = []
+            self.previewTextBox.setText('\n'.join(lines))
 
-                for i in range(len(self.rawDF.columns)):
-                    self.rawDFColNames.append(f'col{i}')
+            self.acceptBtnImportDlg.setDisabled(False)
 
-                self.rawDF.columns = self.rawDFColNames
+        except:
+            self.warningDialog('Error :(\t Check your dataset!')
 
-                # here it assumes that the first column is the time data
-                self.previewDF.insert(
-                    0, 'Time', value=self.rawDF[self.rawDFColNames[0]])
+    def acceptImport(self):
+        """
+            ##########################################################
 
-                if len(self.rawDF.columns) > self.numberOfChannelsSpin.value():
-                    for i in range(1, self.numberOfChannelsSpin.value()+1):
-                        self.previewDF.insert(
-                            i, f'ch{i}', value=self.rawDF[self.rawDFColNames[i]])
+            This function is activated when the accept button 
+            (acceptBtnImportDlg) in the open file dialog box is clicked,
+            after the preview set the file format:
 
-                else:
-                    for i in range(1, len(self.rawDF.columns)):
-                        self.previewDF.insert(
-                            i, f'ch{i}', value=self.rawDF[self.rawDFColNames[i]])
+            #1. The engine reads the whole file in chunks on a worker
+                thread, so the main window does not freeze. The progress
+                dialog follows it and its cancel button stops the reading;
 
-                    self.warningDialog(
-                        f'For this dataset the max \n number of Channels is {len(self.rawDF.columns)-1}')
+            #2.	When the previewDF is ready, the name of each column here
+                is ch1, ch2… For each of these columns, it will make each
+                variable stored in the dictionary showingChannelsControl
+                True, and enable the visualization button in the dock widget;
 
-                    self.numberOfChannelsSpin.setValue(
-                        len(self.rawDF.columns)-1)
+            #3. The previewDF is plotted.
 
-                self.previewDF.set_index('Time', inplace=True)
+            ##########################################################
+        """
 
-                if self.timeFactorStr.text():
-                    try:
-                        self.timeFactor = float(self.timeFactorStr.text())
+        # 1
+        progressDlg = QProgressDialog('Reading data...', 'Cancel', 0, 100, self.importDlg)
+        progressDlg.setWindowTitle('Import data')
+        progressDlg.setWindowModality(QtCore.Qt.WindowModal)
+        progressDlg.setMinimumDuration(500)
+        progressDlg.setAutoClose(False)
+        progressDlg.setAutoReset(False)
 
-                    except ValueError:
-                        self.warningDialog(
-                            'Invalid time factor !')
+        def showProgress(fraction):
+            progressDlg.setValue(int(fraction*100))
 
-                else:
-                    self.timeFactor = 1
+        def loadFailed(message):
+            progressDlg.close()
+            self.warningDialog(message)
 
-                if self.channelsFactorStr.text():
-                    try:
-                        self.channelFactor = float(
-                            self.channelsFactorStr.text())
+        def loadDone(previewDF):
+            progressDlg.close()
 
-                    except ValueError:
-                        self.warningDialog('Invalid channel factor !')
+            # 2
+            self.showingChannelsControl = {channel: True for channel in previewDF.columns}
 
-                else:
-                    self.channelFactor = 1
+            self.visualizationBtn.setDisabled(False)
+            self.saveProjectBtn.setDisabled(False)
 
-                # 6
-                self.previewDF.index = self.previewDF.index/self.timeFactor
+            # 3
+            self.plotPreviewDF()
 
-                for i in range(len(self.previewDF.columns)):
-                    colName = self.previewDF.columns[i]
-                    self.previewDF[colName] = self.previewDF[colName] / \
-                        self.channelFactor
+        task = self.startTask('load', self.engine.loadData,
+                              self.engine.fileName, self.engine.separator,
+                              numberOfChannels=self.engine.numberOfChannels,
+                              timeFactor=self.engine.timeFactor,
+                              channelFactor=self.engine.channelFactor,
+                              onProgress=showProgress, onFinished=loadDone,
+                              onError=loadFailed, onCancelled=progressDlg.close)
 
-                self.previewTextBox.setText(
-                    self.previewDF.to_string(max_rows=10, float_format='%10.2f', justify='match-parent'))
+        if task is None:
+            progressDlg.close()
+            return
 
-                self.acceptBtnImportDlg.setDisabled(False)
-                self.visualizationBtn.setDisabled(False)
+        progressDlg.canceled.connect(task.cancel)
 
-                # 7
-                for i in self.previewDF.columns:
-                    self.showingChannelsControl[i] = True
+    def saveProjectRoutine(self):
+        """
+            ##########################################################
 
-        except:
-            self.warningDialog('Error :(\t Check your dataset!')
+            Saves the session as a project file (see
+            AnalysisEngine.saveProject). The first time the user
+            chooses the file; after that the same project is saved
+            again, writing only the arrays that changed.
 
-    def setVisualizationDF(self):
+            ##########################################################
+        """
+
+        if self.engine.project is None:
+            path, _ = QFileDialog.getSaveFileName(self, 'Save Project', '',
+                                                  'GSDAS project (*.gsdas)')
+
+            if not path:
+                return
+
+        else:
+            path = None
+
+        self.startTask('export', self.engine.saveProject, path,
+                       onFinished=lambda written: self.statusBar().showMessage(
+                           f'Project saved in {self.engine.project.path}', 5000))
+
+    def openProjectRoutine(self):
         """
             ##########################################################
 
-            This function is called by the plot button (plotVisDataBtn)
-            in the visualization dialog box. It will run the following
-            steps:
+            Opens a project file saved before. The engine brings back
+            the data, the cycles and the fit without reading the data
+            file again (see AnalysisEngine.openProject); then the
+            buttons of each step that was done are enabled and the
+            last result is plotted.
 
-            #1. Empty the visualizationDF;
+            ##########################################################
+        """
+
+        if self.isEngineBusy():
+            return
+
+        path, _ = QFileDialog.getOpenFileName(self, 'Open Project', '',
+                                              'GSDAS project (*.gsdas)')
+
+        if not path:
+            return
+
+        self.figureModel.clear()
+
+        self.startTask('load', self.engine.openProject, path,
+                       onFinished=lambda result: self.projectOpened())
 
-            #2. Check if the user has entered values to start and end time.
-                If so, it will assign the variable startVisualizationTime and
-                endVisualizationTime to the closest value that the user has entered.
-                If there is none, it will get the first and/or last values from
-                the previewDF;
+    def projectOpened(self):
+        """ Restores the state of the window after a project is opened. """
 
-            #3. Then, it makes the visualizationDF equals previewDF but with 
-                the interval between startVisualizationTime and 
-                endVisualizationTime of the previewDF;
+        self.showingChannelsControl = {channel: True for channel in self.engine.channels}
+        self.setResponseLabel()
 
-            #4.	It checks if the user wants to set the time to zero. If so, 
-                it will subtract the startVisualizationTime of the time data
-                in the visualizationDF;
+        self.visualizationBtn.setDisabled(False)
+        self.saveProjectBtn.setDisabled(False)
 
-            #5. Creates and populate a list (showingChannelsList) with the 
-                channels selected. Each of the checkbox was already made enabled
-                or disabled after values present in the showingChannelsControl 
-                that ware set in the step #8 of previewData function.
+        hasVisualization = not self.engine.visualizationDF.empty
 
-            #6. If the users do not select at least one channel, it returns an error,
-                else, it makes the visualizationDF equals itself but with only these 
-                columns, make the buttons response, and export available and plot
-                the visualization data.
+        self.normalizationBtn.setDisabled(len(self.engine.visualizationDF.columns) < 2)
+        self.responseBtn.setDisabled(not hasVisualization)
+        self.exportBtn.setDisabled(not hasVisualization)
+        self.fitBtn.setDisabled(len(self.engine.properties) < 2)
 
-            #7.	Finally, it creates the propertiesTableColNames and settingColumnOrderList.
-                Both lists are going to be used in the calculation parameters. First it 
-                calculates each channels, then it sets the propertiesDF in order more
-                appealing to the user This is based on what columns are inside the
-                visualizationDF.
+        if not self.engine.fitDF.empty:
+            self.plotFittedData()
 
-            #8. Calls the  plotVisualizationData function
+        elif len(self.engine.properties):
+            self.plotRespData()
+
+        elif not self.engine.normalizationDF.empty:
+            self.plotNormalizationData()
+
+        elif hasVisualization:
+            self.plotVisualizationData()
+
+        else:
+            self.plotPreviewDF()
+
+    def startTask(self, resource, function, *args, **kwargs):
+        """
+            ##########################################################
+
+            Runs a heavy engine call (function) on the thread pool of
+            the TaskManager. The callbacks (onFinished, onError,
+            onProgress, onCancelled) are called on the GUI thread and
+            errors are shown in a warning dialog unless onError is
+            given. With onProgress, function gets a progress callback
+            that also stops it when the job is cancelled.
+
+            Only one job ('load', 'calculation', 'fit', 'export')
+            runs at a time, since they all use the engine (see
+            isEngineBusy). If one is running, the user is warned and
+            None is returned.
 
             ##########################################################
         """
-        try:
-            # 1
-            self.visualizationDF = pd.DataFrame()
 
-            # 2
-            if self.startPointInput.text():
-                self.startVisualizationTime = min(self.previewDF.index, key=lambda x: abs(
-                    float(self.startPointInput.text())-x))
-            else:
-                self.startVisualizationTime = self.previewDF.first_valid_index()
+        kwargs.setdefault('onError', self.warningDialog)
 
-            if self.endPointInput.text():
-                self.endVisualizationTime = min(self.previewDF.index, key=lambda x: abs(
-                    float(self.endPointInput.text())-x))
-            else:
-                self.endVisualizationTime = self.previewDF.last_valid_index()
+        if self.isEngineBusy():
+            return None
 
-            # 3
-            self.visualizationDF = self.previewDF[self.startVisualizationTime:self.endVisualizationTime]
+        task = self.tasks.start(resource, function, *args, **kwargs)
 
-            # 4
-            if self.startZeroCheck.isChecked():
-                self.visualizationDF.index = self.visualizationDF.index - self.startVisualizationTime
+        if task is None:
+            self.warningDialog(f'Wait for the {resource} to finish!')
 
-            # 5
-            self.showingChannelsList = []
+        return task
 
-            if self.showCh1Check.isEnabled():
-                if self.showCh1Check.isChecked():
-                    self.showingChannelsList.append('ch1')
+    def showTaskProgress(self, fraction):
+        """ Shows the progress of a background job in the status bar. """
 
-            if self.showCh2Check.isEnabled():
-                if self.showCh2Check.isChecked():
-                    self.showingChannelsList.append('ch2')
+        self.statusBar().showMessage(f'Working... {fraction:.0%}', 2000)
 
-            if self.showCh3Check.isEnabled():
-                if self.showCh3Check.isChecked():
-                    self.showingChannelsList.append('ch3')
+    def isBusy(self, resource):
+        """ Warns the user and returns True while a job of the resource is running. """
 
-            if self.showCh4Check.isEnabled():
-                if self.showCh4Check.isChecked():
-                    self.showingChannelsList.append('ch4')
+        if self.tasks.isBusy(resource):
+            self.warningDialog(f'Wait for the {resource} to finish!')
+            return True
 
-            if self.showCh5Check.isEnabled():
-                if self.showCh5Check.isChecked():
-                    self.showingChannelsList.append('ch5')
+        return False
 
-            if self.showCh6Check.isEnabled():
-                if self.showCh6Check.isChecked():
-                    self.showingChannelsList.append('ch6')
+    def isEngineBusy(self):
+        """
+            ##########################################################
 
-            if self.showCh7Check.isEnabled():
-                if self.showCh7Check.isChecked():
-                    self.showingChannelsList.append('ch7')
+            Warns the user and returns True while any job ('load',
+            'calculation', 'fit', 'export') is running. The jobs read
+            the frames, properties and dataflow of the engine on a
+            worker thread, so the GUI thread must not change them
+            meanwhile: every step that does checks this first.
 
-            if self.showCh8Check.isEnabled():
-                if self.showCh8Check.isChecked():
-                    self.showingChannelsList.append('ch8')
+            ##########################################################
+        """
 
-            # 6
+        return any(self.isBusy(resource) for resource in ENGINE_RESOURCES)
+
+    def setVisualizationDF(self):
+        """
+            ##########################################################
+
+            This function is called by the plot button (plotVisDataBtn)
+            in the visualization dialog box. It will run the following
+            steps:
+
+            #1. Creates and populate a list (showingChannelsList) with the 
+                channels selected. There is one checkbox per channel of the file,
+                made enabled or disabled after the values in the 
+                showingChannelsControl that were set when the file was loaded
+                (see acceptImport).
+
+            #2. If the users do not select at least one channel, it returns an error;
+
+            #3. Otherwise the engine cuts the previewDF between the closest values
+                of the start and end time that the user has entered (first and 
+                last values if there is none), sets the initial time to zero if
+                the user wants it and keeps only the selected channels;
+
+            #4. Make the buttons response, and export available and plot
+                the visualization data;
+
+            #5. If a valve schedule was loaded before and it fits in the
+                new visualization time (same protocol), the cycles are 
+                calculated again with it, on a worker thread.
+
+            ##########################################################
+        """
+
+        if self.isEngineBusy():
+            return
+
+        try:
+            # 1
+            self.showingChannelsList = [channel for channel, check in self.showChannelChecks.items()
+                                        if check.isEnabled() and check.isChecked()]
+
+            # 2
             if len(self.showingChannelsList) == 0:
                 self.warningDialog('No data Select')
                 self.plotPreviewDF()
@@ -1313,40 +1572,40 @@ class GasSensorDataAnalysisSystem(QMainWindow):
                 self.exportBtn.setDisabled(True)
 
             else:
-                self.visualizationDF = self.visualizationDF[self.showingChannelsList]
-
-                if len(self.visualizationDF.columns) > 1:
-
-                    self.normalizationBtn.setDisabled(False)
-
-                # 7
-                self.propertiesTableColNames = []
-                self.propertiesTableColNames.append('concentration')
+                # 3
+                startTime = None
+                endTime = None
 
-                for column in self.visualizationDF.columns:
-                    self.propertiesTableColNames.append(f'{column} resp')
-                    self.propertiesTableColNames.append(f'{column} respTime')
-                    self.propertiesTableColNames.append(f'{column} recTime')
+                if self.startPointInput.text():
+                    startTime = float(self.startPointInput.text())
 
-                self.settingColumnOrderList = []
-                self.settingColumnOrderList.append('concentration')
+                if self.endPointInput.text():
+                    endTime = float(self.endPointInput.text())
 
-                for column in self.visualizationDF.columns:
-                    self.settingColumnOrderList.append(f'{column} resp')
+                self.engine.setVisualizationDF(self.showingChannelsList,
+                                               startTime=startTime,
+                                               endTime=endTime,
+                                               startZero=self.startZeroCheck.isChecked())
 
-                for column in self.visualizationDF.columns:
-                    self.settingColumnOrderList.append(
-                        f'{column} respTime')
+                if len(self.engine.visualizationDF.columns) > 1:
 
-                for column in self.visualizationDF.columns:
-                    self.settingColumnOrderList.append(
-                        f'{column} recTime')
+                    self.normalizationBtn.setDisabled(False)
 
-                # 8
+                # 4
                 self.responseBtn.setDisabled(False)
                 self.exportBtn.setDisabled(False)
                 self.plotVisualizationData()
 
+                # 5
+                if len(self.engine.properties) == 0 and self.engine.scheduleFits():
+                    def scheduleDone(result):
+                        if len(self.engine.properties) > 1:
+                            self.fitBtn.setDisabled(False)
+
+                    self.startTask('calculation', self.engine.applySchedule,
+                                   onFinished=scheduleDone,
+                                   onProgress=self.showTaskProgress)
+
         except ValueError:
             self.warningDialog('Invalid Parameters!')
 
@@ -1356,50 +1615,45 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             
             This function will normalize the data inside the visualizationDF
             as long as it has at least two columns by dividing each column
-            by its own value at the chosentime. It runs the following steps:
-
-            #1. Empty the normalizationDF;
-
-            #2.	If there is text in the normTimeInput, it makes the 
-                normalizationPoint as the closest value from the user’s input.
+            by its own value at the chosentime, or with the mode chosen in
+            normModeInput. It runs the following steps:
 
-            #3.	It makes the normalizationDF indexes the same as the
-                visualizationDF;
+            #1.	If there is text in the normTimeInput (and normEndInput for
+                the baseline), or the mode needs no time, the engine makes the
+                normalizationPoint as the closest value from the user’s input
+                and builds the normalizationDF (see
+                AnalysisEngine.setNormalizationDF);
 
-            #4.	Then it inserts the visualization data divided by the 
-                normalizationPoint;
-
-            #5.	Calls plotNormalizationData;
+            #2.	Calls plotNormalizationData;
 
             ##########################################################
         """
 
-        try:
-            # 1
-            self.normalizationDF = pd.DataFrame()
+        if self.isEngineBusy():
+            return
 
-            # 2
-            if self.normTimeInput.text():
+        mode = self.normModeInput.currentData()
+
+        try:
+            normTime = float(self.normTimeInput.text()) if self.normTimeInput.text() else None
+            endTime = float(self.normEndInput.text()) if self.normEndInput.text() else None
 
-                self.normalizationPoint = min(self.visualizationDF.index,
-                                              key=lambda x: abs(float(self.normTimeInput.text())-x))
+        except ValueError:
+            self.warningDialog('Invalid parameter!')
+            return
 
-                self.normalizationDF.insert(0, f'{self.visualizationDF.index.name}',
-                                            value=self.visualizationDF.index)
+        # 1
+        if mode in ('point', 'baseline') and normTime is None:
+            return
 
-                # 3
-                self.normalizationDF.set_index(
-                    f'{self.visualizationDF.index.name}', inplace=True)
+        try:
+            self.engine.setNormalizationDF(normTime, mode, endTime)
 
-                # 4
-                for position, colName in enumerate(self.visualizationDF.columns):
-                    self.normalizationDF.insert(position, f'ch{position+1} norm',
-                                                value=self.visualizationDF[colName].div(self.visualizationDF[colName][self.normalizationPoint]))
-                # 5
-                self.plotNormalizationData()
+            # 2
+            self.plotNormalizationData()
 
-        except ValueError:
-            self.warningDialog('Invalid parameter!')
+        except ValueError as error:
+            self.warningDialog(str(error))
 
     def calcResponse(self):
         """
@@ -1414,185 +1668,184 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             steps:
 
             #1.	After entering the concentration, start of exposure time,
-                end of exposure time, and end of recovery time, it will
-                look into the visualizationDF for the closest values present
-                in the data table. It will assign the variables 
-                startExposureTime, endExposureTime, endRecoveryTime with these 
-                values. Finally, It creates two temporary DF to hold the response
-                and recovery data;
+                end of exposure time, and end of recovery time, the engine 
+                calculates the propertiesList (see AnalysisEngine.calcResponse)
+                on a worker thread; the next steps run when it is done;
 
-            #2.	Creates a list called properties list and append the concentration
-                value to it For each column in the visualizationDF it will find 
-                the initial resistance r0, final exposure resistance rf, and final 
-                recovery resistance rf2. These values correspond to the resistance 
-                values of startExposureTime, endExposureTime, endRecoveryTime, 
-                respectively.
+            #2. If the resp/rec times are negative, it will warn the user;
 
-            #3.	Calculates the absolute variations in the adsorption and 
-                desorption cycles;
+            #3. Update the channel 1 preview panel, set the append button
+                enabled and if the propertiesDF has at least two rows, it
+                enables the button in the dock widget for the powerLaw fit.
 
-            #4. It calculates the response according to the user’s settings (in the 
-                settings dialog). The default is dR/R0 in %. For each type of response,
-                if the user has selected the sensitivity option, the response will
-                be given by dividing the actual response by the concentration
+            ##########################################################  
+        """
 
-            #5.	Calculate the values corresponding to 90% respose and recovery
-                variation, and finds the corresponding values in the visualizationDF.
-                The routine is different if the  resistance variation is positive
-                or negative.
+        try:
+            cycle = (float(self.concentrationInput.text()),
+                     float(self.initialExpTimeInput.text()),
+                     float(self.finalExpTimeInput.text()),
+                     float(self.finalRecTimeInput.text()))
 
-                This variation depends on the nature of the semiconductor
-                material/gas interaction;
+        except ValueError:
+            self.warningDialog('Invalid values!')
+            return
 
-            #6.	Find the time in the time table corresponding to these values,
-                and subtracts the startExposureTime, endExposureTime to
-                calculate the response time and recovery time, respectively;
+        def calcDone(result):
+            # 2
+            if self.engine.hasNegativeTimes():
+                self.warningDialog(
+                    'Negative resp/rec time!\t Verify your cycle time values!')
 
-            #7. If the resp/rec times are negative, it will warn the user;
+            # 3
+            self.calcSensitivityResult.setText(f'{self.engine.propertiesList[1]:.3f}')
+            self.calcRespTimeResult.setText(f'{self.engine.propertiesList[2]:.3f}')
+            self.calcRecoveryTimeResult.setText(
+                f'{self.engine.propertiesList[3]:.3f}')
 
-            #8.	Append the values of response, response time and recovery time
-                to the properties list, set the append button enabled,
+            self.appendRespBtn.setDisabled(False)
 
-            #9. Update the channel 1 preview panel and if the propertiesDF has 
-                at least three rows, it opens the enables the button in the
-                dock widget for the powerLaw fit.
+            if len(self.engine.properties) > 1:
+                self.fitBtn.setDisabled(False)
 
-            ##########################################################  
-        """
+        # 1
+        self.startTask('calculation', self.engine.calcResponse, *cycle,
+                       onFinished=calcDone,
+                       onError=lambda message: self.warningDialog('Invalid values!'))
 
-        try:
-            # 1
-            self.startExposureTime = min(self.visualizationDF.index, key=lambda x: abs(
-                float(self.initialExpTimeInput.text())-x))
+    def detectCyclesRoutine(self):
+        """
+            ##########################################################
 
-            self.endExposureTime = min(self.visualizationDF.index, key=lambda x: abs(
-                float(self.finalExpTimeInput.text())-x))
+            This function is called by the detectCyclesBtn on the 
+            responseDlg. Instead of typing the times of each cycle,
+            the engine finds all exposure-recovery cycles in the
+            signal of the first channel of the visualizationDF.
 
-            self.endRecoveryTime = min(self.visualizationDF.index, key=lambda x: abs(
-                float(self.finalRecTimeInput.text())-x))
+            #1. The concentrationInput holds one concentration per
+                cycle separated by commas (or one for all of them);
 
-            self.analysisRespDF = self.visualizationDF[self.startExposureTime:self.endExposureTime]
-            self.analysisRecDF = self.visualizationDF[self.endExposureTime:self.endRecoveryTime]
+            #2. The engine detects the cycles and calculates all their
+                properties in one call on a worker thread, appending them
+                to the propertiesDF. If the number of concentrations does
+                not match the cycles found, the user is warned;
 
-            # 2
-            self.propertiesList = []
-            self.propertiesList.append(float(self.concentrationInput.text()))
+            #3. Update the sensorPropertiesTablePreview and enables the
+                button for the powerLaw fit (see showProperties).
 
-            for colName in self.visualizationDF.columns:
+            ##########################################################
+        """
 
-                self.r0 = self.analysisRespDF[colName][self.startExposureTime]
-                self.rf = self.analysisRespDF[colName][self.endExposureTime]
-                self.rf2 = self.analysisRecDF[colName][self.endRecoveryTime]
+        # 1
+        try:
+            concentrations = [float(value) for value in
+                              self.concentrationInput.text().replace(';', ',').split(',')
+                              if value.strip()]
 
-                # 3
-                self.deltaR1 = abs(self.rf-self.r0)
-                self.deltaR2 = abs(self.rf2-self.rf)
+        except ValueError:
+            self.warningDialog('Invalid values!')
+            return
 
-                # 4
-                if self.responseType['dR/R0']:
-                    self.response = (self.deltaR1*100)/self.r0
+        # 2
+        def detectAndCalc(progress):
+            cycleTimes = self.engine.detectCycles()
 
-                    if self.responseType['sigconc']:
-                        self.response = self.response / \
-                            float(self.concentrationInput.text())
+            if len(cycleTimes) == 0:
+                raise ValueError('No cycle found!')
 
-                elif self.responseType['dR']:
-                    self.response = self.rf-self.r0
+            self.engine.calcCycles(concentrations, cycleTimes, progress=progress)
 
-                    if self.responseType['sigconc']:
-                        self.response = self.response / \
-                            float(self.concentrationInput.text())
+        self.startTask('calculation', detectAndCalc, onFinished=self.showProperties,
+                       onProgress=self.showTaskProgress)
 
-                elif self.responseType['Rgas/Rair']:
-                    self.response = self.rf/self.r0
+    def loadScheduleRoutine(self):
+        """
+            ##########################################################
 
-                    if self.responseType['sigconc']:
-                        self.response = self.response / \
-                            float(self.concentrationInput.text())
+            This function is called by the loadScheduleBtn on the 
+            responseDlg. It reads the valve schedule of the bench
+            (concentration, start and end of exposure of each cycle)
+            and calculates all cycles at once, instead of entering
+            the times of each cycle and pressing calculate and append.
 
-                # 5
-                if self.rf > self.r0:
-                    self.resp90Resistance = min(
-                        self.analysisRespDF[colName], key=lambda x: abs(((self.r0+(0.9*self.deltaR1))-x)))
+            #1. Gets the schedule file with the QFileDialog and the 
+                engine reads it. The schedule stays in the engine, so
+                it is applied again to the next file opened (see
+                setVisualizationDF);
 
-                    self.rec90Resistance = min(self.analysisRecDF[colName], key=lambda x: abs(
-                        ((self.rf-(0.9*self.deltaR2))-x)))
+            #2. The engine calculates the properties of every cycle on
+                a worker thread, replacing the ones in the propertiesDF;
 
-                else:
-                    self.resp90Resistance = min(
-                        self.analysisRespDF[colName], key=lambda x: abs(((self.r0-(0.9*self.deltaR1))-x)))
+            #3. Update the sensorPropertiesTablePreview and enables the
+                button for the powerLaw fit (see showProperties).
 
-                    self.rec90Resistance = min(self.analysisRecDF[colName], key=lambda x: abs(
-                        ((self.rf+(0.9*self.deltaR2))-x)))
+            ##########################################################
+        """
 
-                # 6
-                self.responseTime = self.analysisRespDF[self.analysisRespDF[colName] == self.resp90Resistance].index.tolist()[
-                    0]-self.startExposureTime
+        # 1
+        scheduleFile = QFileDialog.getOpenFileName(
+            filter='Schedule (*.csv *.json *.txt *.dat);;All files (*)')[0]
 
-                self.recoveryTime = self.analysisRecDF[self.analysisRecDF[colName] == self.rec90Resistance].index.tolist()[
-                    0]-self.endExposureTime
+        if not scheduleFile:
+            return
 
-                # 7
-                if self.responseTime < 0 or self.recoveryTime < 0:
-                    self.warningDialog(
-                        'Negative resp/rec time!\t Verify your cycle time values!')
+        if self.isEngineBusy():
+            return
 
-                # 8
-                self.propertiesList.append(self.response)
-                self.propertiesList.append(self.responseTime)
-                self.propertiesList.append(self.recoveryTime)
+        try:
+            self.engine.loadSchedule(scheduleFile)
 
-            # 9
-            self.calcSensitivityResult.setText(f'{self.propertiesList[1]:.3f}')
-            self.calcRespTimeResult.setText(f'{self.propertiesList[2]:.3f}')
-            self.calcRecoveryTimeResult.setText(
-                f'{self.propertiesList[3]:.3f}')
+        except (OSError, ValueError) as error:
+            self.warningDialog(str(error))
+            return
 
-            self.appendRespBtn.setDisabled(False)
+        def scheduleDone(result):
+            if self.engine.hasNegativeTimes():
+                self.warningDialog(
+                    'Negative resp/rec time!\t Verify your cycle time values!')
 
-            if len(self.propertiesDF.index) > 1:
-                self.fitBtn.setDisabled(False)
+            self.showProperties()
 
-        except:
-            self.warningDialog('Invalid values!')
+        # 2
+        self.startTask('calculation', self.engine.applySchedule, onFinished=scheduleDone,
+                       onProgress=self.showTaskProgress)
 
-    def appendResponseToDF(self):
+    def showProperties(self, result=None):
         """
             ##########################################################
 
-            This function gets the propertiesList and added to the 
-            propertiesDF. It does that by:
+            Update the sensorPropertiesTablePreview after the cycles
+            are calculated and enables the button for the powerLaw fit
+            if the propertiesDF has at least two cycles.
 
-            #1. converting this list into a pandas’ series with the
-                propertiesTableColNames and the name being the 
-                concentration value;
+            ##########################################################
+        """
 
-            #2. This series becomes the row that is appended to the 
-                propertiesDF. then it it put in order, response first,
-                response time second, recovery time third.
+        self.sensorPropertiesTablePreview.setText(self.engine.propertiesDF.to_string(
+            float_format='%10.2f', justify='match-parent'))
 
-            #3. It updates the text shown in the 
-                sensorPropertiesTablePreview;
+        if len(self.engine.properties) > 1:
+            self.fitBtn.setDisabled(False)
 
-            ##########################################################
+    def appendResponseToDF(self):
         """
+            ##########################################################
 
-        try:
-            # 1
-            self.newResponseRow = pd.Series(self.propertiesList,
-                                            index=self.propertiesTableColNames)
+            This function appends the propertiesList of the engine 
+            to the propertiesDF, in the order response first, response
+            time second, recovery time third, and updates the text shown
+            in the sensorPropertiesTablePreview.
 
-            # 2
-            self.propertiesDF = self.propertiesDF.append(
-                self.newResponseRow, ignore_index=True)
+            ##########################################################
+        """
 
-            self.propertiesDF.index = self.propertiesDF.index + 1
-            self.propertiesDF.index.name = 'cycle'
+        if self.isEngineBusy():
+            return
 
-            self.propertiesDF = self.propertiesDF[self.settingColumnOrderList]
+        try:
+            self.engine.appendResponseToDF()
 
-            # 3
-            self.sensorPropertiesTablePreview.setText(self.propertiesDF.to_string(
+            self.sensorPropertiesTablePreview.setText(self.engine.propertiesDF.to_string(
                 float_format='%10.2f', justify='match-parent'))
         except:
             self.warningDialog('Error!')
@@ -1607,15 +1860,18 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             ##########################################################
         """
 
-        if self.propertiesDF.index.empty:
-            self.warningDialog('The DF is empty!')
-        else:
-            self.propertiesDF.drop(
-                axis=0, index=self.propertiesDF.last_valid_index(), inplace=True)
+        if self.isEngineBusy():
+            return
+
+        try:
+            self.engine.clearLastResponse()
 
-            self.sensorPropertiesTablePreview.setText(self.propertiesDF.to_string(
+            self.sensorPropertiesTablePreview.setText(self.engine.propertiesDF.to_string(
                 float_format='%10.2f', justify='match-parent'))
 
+        except ValueError as error:
+            self.warningDialog(str(error))
+
     def clearAllResponseDF(self):
         """
             ##########################################################
@@ -1626,132 +1882,45 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             ##########################################################
         """
 
-        if self.propertiesDF.index.empty:
-            self.warningDialog('The DF is empty!')
-        else:
-            self.propertiesDF = pd.DataFrame ()
+        if self.isEngineBusy():
+            return
 
-            self.sensorPropertiesTablePreview.setText(self.propertiesDF.to_string())
+        try:
+            self.engine.clearAllResponse()
+
+            self.sensorPropertiesTablePreview.setText(self.engine.propertiesDF.to_string())
 
-    def powerLawFunc(self, x, a, b):
-        return a*(x**b)
+        except ValueError as error:
+            self.warningDialog(str(error))
 
     def fitRespData(self):
         """
             ##########################################################
 
-            This function will fit the response data to the powerLawFunc
-            described previously. It does it by using the curve_fit from
-            the scipy.optmize. The algorithm run as follows:
-
-            #1.	Empty the fitDF;
-
-            #2.	Calculate the fitting step by dividing the last data point 
-                from the propertiesDF concentration column by the numberOfFitPoints
-                that can be entered in the settings menu. If the last concentration
-                is 5, and the number of points is 100, each step will be equal 
-                to 0.05;
-
-            #3.	Enter the values in the x_fit_values that represent the 
-                concentration values according to the step value, and 
-                starting at zero;
-
-
-            #4.	Insert these values in the fitDF;
-
-            #5.	For each column in the propertiesDF it will fit the curve
-                using the function curve_fit and it uses the visualizationDF.columns
-                to get the proper names of each column. This is important
-                because the user can choose any sort of combination of channels 
-                to fit; 
-
-            #6.	The curve_fit function returns the coefficient that are added to the
-                coef1_list and coef2_list. Each of these lists will hold a number 
-                of values equivalent to the number of columns analyzed.
-
-            #7.	Creates a str with this information that will be used in the legend
-                when plotting. These strings are stored in the variable fitListLabel
-
-            #8.	It calculates the y_fit_values and add to the fitDF;
+            This function will fit the response data of all channels to
+            the power law a*x^b, or the model chosen in the settings,
+            using the engine (see AnalysisEngine.fitRespData). If the user has chosen to 
+            calculate sensitivity, the engine also carries out a linear
+            regression between concentration and response.
 
-            #9.	Call the function plotRespData that plots both
-                the fitDF and the response data from propertiesDF;
-
-            #10. If the user has chosen to calculate sensitivity, this function
-                will carry out a linear regression between the data of concentration
-                and the response data, and it will show both the slope as sensitivity
-                and the R-squared value.
+            The fit runs on a worker thread. Then it calls plotFittedData
+            that plots both the fitDF and the response data from 
+            propertiesDF.
 
             ##########################################################
         """
-        
-        # 1
-        self.fitDF = pd.DataFrame()
-        self.x_fit_values = []
-        self.fitListLabel = []
-        self.sensitivityList = []
-        self.sensitivityRValues = []
-
-        # 2
-        step = max(self.propertiesDF['concentration'])/self.numberOfFitPoints
-
-        # 3
-        for i in range(self.numberOfFitPoints):
-            if len(self.x_fit_values) == 0:
-                self.x_fit_values.append(0)
-            else:
-                self.x_fit_values.append(self.x_fit_values[-1]+step)
-
-        # 4
-        self.fitDF.insert(0, 'x_fit_values', self.x_fit_values)
-
-        # 5
-        for i, column in enumerate(self.visualizationDF.columns):
-            name = f'y_fit_{i+1}'
-
-            popt = optimize.curve_fit(self.powerLawFunc, self.propertiesDF['concentration'],
-                             self.propertiesDF[f'{column} resp'])
-
-            # 6
-            self.coef1_list.append(popt[0][0])
-            self.coef2_list.append(popt[0][1])
 
-            # 7
-            self.fitListLabel.append(
-                f'fit {column}: a={popt[0][0]:.2f}, b={popt[0][1]:.2f}')
+        self.startTask('fit', self.engine.fitRespData, onFinished=self.fitDone)
 
-            # 8
-            y_fit_values = self.powerLawFunc(
-                self.x_fit_values, popt[0][0], popt[0][1])
+    def fitDone(self, fitDF):
+        """ Plots the fit and warns about the channels that could not be fitted. """
 
-            # 9
-            self.fitDF.insert(i+1, name, y_fit_values)
-
-            # 10
-            if self.responseType['sensitivity']:
-                regression = stats.linregress(self.propertiesDF['concentration'],
-                                              self.propertiesDF[f'{column} resp'])
-
-                self.sensitivityList.append(regression.slope)
-                self.sensitivityRValues.append(regression.rvalue*regression.rvalue)
-
-                if self.responseType['dR/R0']:
-                    unit = f'%/{self.concentrationUnitStr}'
-                    
-                elif self.responseType['dR']:
-                    unit = f'{self.channelsUnitStr}/{self.concentrationUnitStr}'
-
-                elif self.responseType['Rgas/Rair']:
-                    unit = f'/{self.concentrationUnitStr}'
-                
-                finalStrP1 = f'sensitivity = {self.sensitivityList[i]:.2f} {unit},'
-                finalStrP2 = f' R-sq = {self.sensitivityRValues[i]:.3f}'
-                
-                self.sensitivityResultsList.append(finalStrP1+finalStrP2)
-
-        self.fitDF.set_index('x_fit_values', inplace=True)
         self.plotFittedData()
 
+        if self.engine.fitFailures:
+            self.warningDialog('Fit failed for ' + ', '.join(
+                f'{channel} ({reason})' for channel, reason in self.engine.fitFailures.items()))
+
     def getExportFileDirectory(self):
         """
             ##########################################################
@@ -1767,6 +1936,22 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         if self.exportDirectory:
             self.exportDlgBtn.setDisabled(False)
 
+    def setResponseLabel(self):
+        """ Axis label of the response type chosen in the engine. """
+
+        if self.engine.responseType['dR']:
+            self.responseLabel = u'\u0394S '+f'({self.engine.channelsUnitStr})'
+
+        elif self.engine.responseType['Rgas/Rair']:
+            self.responseLabel = u'Rgas/Rair (a.u.)'
+
+        else:
+            self.responseLabel = u'\u0394S/S0 (%)'
+
+        if self.engine.responseType['sigconc']:
+            self.responseLabel = self.responseLabel + \
+                f'/{self.engine.concentrationUnitStr}'
+
     def setSettings(self):
         """
             ##########################################################   
@@ -1777,92 +1962,145 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             #1. sets type of response type by assigning the to 
                 responseType dic
 
-            #2. sets the fitting number points
+            #2. sets the fitting number points, the fit model (or the
+                automatic choice by AIC/BIC), the confidence
+                intervals of the fit (resampling method, number of
+                resamples and seed) and the exponential fit of the
+                transients. A new kinetics model changes the columns
+                of the properties, so the cycles are cleared
 
-            #3. sets the matplotlib style
+            #3. sets the matplotlib style. Styles only apply to new axes,
+                so a new style makes the next plot build the figure again
 
             #4. sets color pallet
 
-            #5. plot with new settings
+            #5. sets the cache of parsed files
+
+            #6. plot with new settings, updating the lines in place
+                (see plotDataFrame)
+
+            Nothing is set while a job is running: the fit and the
+            calculations read these settings on a worker thread.
 
             ##########################################################
         """
+
+        if self.isEngineBusy():
+            return
+
         try:
             # 1
             if self.responseOpt1.isChecked():
-                self.responseLabel = u'\u0394S/S0 (%)'
-                self.responseType['dR/R0'] = True
-                self.responseType['dR'] = False
-                self.responseType['Rgas/Rair'] = False
+                self.engine.responseType['dR/R0'] = True
+                self.engine.responseType['dR'] = False
+                self.engine.responseType['Rgas/Rair'] = False
 
             elif self.responseOpt2.isChecked():
-                self.responseLabel = u'\u0394S '+f'({self.channelsUnitStr})'
-                self.responseType['dR/R0'] = False
-                self.responseType['dR'] = True
-                self.responseType['Rgas/Rair'] = False
+                self.engine.responseType['dR/R0'] = False
+                self.engine.responseType['dR'] = True
+                self.engine.responseType['Rgas/Rair'] = False
 
             elif self.responseOpt3.isChecked():
-                self.responseLabel = u'Rgas/Rair (a.u.)'
-                self.responseType['dR/R0'] = False
-                self.responseType['dR'] = False
-                self.responseType['Rgas/Rair'] = True
+                self.engine.responseType['dR/R0'] = False
+                self.engine.responseType['dR'] = False
+                self.engine.responseType['Rgas/Rair'] = True
 
             if self.responseOpt4.isChecked():
-                self.responseType['sigconc'] = True
-                self.responseLabel = self.responseLabel + \
-                    f'/{self.concentrationUnitStr}'
+                self.engine.responseType['sigconc'] = True
 
             elif not self.responseOpt4.isChecked():
-                self.responseType['sigconc'] = False
+                self.engine.responseType['sigconc'] = False
             
             if self.sensitivityOpt.isChecked():
-                self.responseType['sensitivity'] = True
+                self.engine.responseType['sensitivity'] = True
 
             elif not self.sensitivityOpt.isChecked():
-                self.responseType['sensitivity'] = False
+                self.engine.responseType['sensitivity'] = False
             
             if self.responseOpt4.isChecked() and self.sensitivityOpt.isChecked():
                 self.warningDialog('Please, select only one between sensitivity or signal/conc')
                 self.responseOpt4.setChecked(False)
                 self.sensitivityOpt.setChecked(False)
-                self.responseType['sensitivity'] = False
-                self.responseType['sigconc'] = False
+                self.engine.responseType['sensitivity'] = False
+                self.engine.responseType['sigconc'] = False
+
+            self.setResponseLabel()
 
             # 2
             if self.numberOfFitPointsInput.text():
-                self.numberOfFitPoints = int(
+                self.engine.numberOfFitPoints = int(
                     self.numberOfFitPointsInput.text())
 
+            fitModel = self.fitModelInput.currentText()
+
+            if fitModel.startswith('auto'):
+                self.engine.fitModelName = 'auto'
+                self.engine.modelCriterion = fitModel[6:9].lower()
+            else:
+                self.engine.fitModelName = fitModel
+
+            kineticsModel = self.kineticsModelInput.currentText()
+            kineticsModel = None if kineticsModel == 'None' else kineticsModel
+
+            if kineticsModel != self.engine.kineticsModel:
+                self.engine.setKineticsModel(kineticsModel)
+
+            method = self.confidenceMethodInput.currentText()
+            self.engine.confidenceMethod = None if method == 'None' else method
+
+            if self.numberOfResamplesInput.text():
+                self.engine.numberOfResamples = int(self.numberOfResamplesInput.text())
+
+            if self.randomSeedInput.text():
+                self.engine.randomSeed = int(self.randomSeedInput.text())
+
             if self.concentrationUnitInput.text():
-                self.concentrationUnitStr = self.concentrationUnitInput.text()
+                self.engine.concentrationUnitStr = self.concentrationUnitInput.text()
             else:
-                self.concentrationUnitStr = 'ppm'
+                self.engine.concentrationUnitStr = 'ppm'
 
             # 3
+            style = self.matplotlibStyle
+
             if self.matplotlibStyleOpt1.isChecked():
-                matplotlib.style.use('bmh')
+                style = 'bmh'
 
             elif self.matplotlibStyleOpt2.isChecked():
-                matplotlib.style.use('seaborn')
+                style = 'seaborn'
 
             elif self.matplotlibStyleOpt3.isChecked():
-                matplotlib.style.use('grayscale')
+                style = 'grayscale'
 
             elif self.matplotlibStyleOpt4.isChecked():
-                matplotlib.style.use('default')
+                style = 'default'
 
+            if style != self.matplotlibStyle:
+                matplotlib.style.use(style)
+                self.matplotlibStyle = style
+                self.figureModel.clear()
 
             # 4
             if self.colorPaletteOpt1.isChecked():
                 self.palette = self.colorDic['Palette1']
+                self.colormap = self.colormapDic['Palette1']
 
             elif self.colorPaletteOpt2.isChecked():
                 self.palette = self.colorDic['Palette2']
+                self.colormap = self.colormapDic['Palette2']
 
             elif self.colorPaletteOpt3.isChecked():
                 self.palette = self.colorDic['Palette3']
+                self.colormap = self.colormapDic['Palette3']
 
             # 5
+            self.engine.cache.enabled = self.useCacheCheck.isChecked()
+
+            if self.cacheSizeInput.text():
+                self.engine.cache.maxSize = int(float(self.cacheSizeInput.text())*2**20)
+                self.engine.cache.evict()
+                self.cacheUsageLbl.setText(f'in use: {self.engine.cache.size()/2**20:.2f} MB')
+
+            # 6
             if self.plottingControl['previewDF']:
                 self.plotPreviewDF()
 
@@ -1890,16 +2128,31 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         except ValueError:
             self.warningDialog('Invalid parameters!')
 
+    def purgeCache(self):
+        """ Removes every parsed file kept in the cache (purgeCacheBtn). """
+
+        freed = self.engine.cache.purge()
+
+        self.cacheUsageLbl.setText(f'in use: {self.engine.cache.size()/2**20:.2f} MB')
+        self.warningDialog(f'{freed/2**20:.2f} MB removed from the cache.')
+
     def plotDataFrame(self, data_frame, x_axis_name,
                       y_axis_name, plot_titles, plot_labels,
-                      number_of_axis, marker='', linestyle=''):
+                      number_of_axis, marker='', linestyle='', overlays=()):
         """
             ##########################################################
 
             This function plots a data frame, sets its axis labels, 
             the title of the dataset and the labels, number of axis.
             Also, it offers the possibility to choose the marker and 
-            linestyle.
+            linestyle, and extra lines (overlays) drawn over the axis
+            of a channel, like the fit curves.
+
+            The figureModel keeps the axes and lines between plots: if
+            the layout is the same as the last plot, only the data,
+            colors and labels are updated in place (see 
+            gsdas.figure.FigureModel). Long series are decimated to
+            the width of the axis in pixels.
 
             ##########################################################
         """
@@ -1912,305 +2165,11 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.marker = marker
         self.linestyle = linestyle
 
-        self.mainFigure.clf()
-
-        self.mainFigure.text(0.55, 0.025,
-                             self.x_axis_name,
-                             ha='center',
-                             va='center',
-                             fontsize=18)
-
-        self.mainFigure.text(0.025, 0.5,
-                             self.y_axis_name,
-                             ha='center',
-                             va='center',
-                             rotation=90,
-                             fontsize=18)
-
-        if self.number_of_axis == 1:
-            self.ax1 = self.mainFigure.add_subplot(111)
-            self.ax1.set_title(self.plot_titles[0], visible=False)
-
-            for i, column in enumerate(self.data_frame.columns):
-                if self.marker:
-                    self.ax1.plot(self.data_frame.iloc[:, i],
-                                  color=self.palette[i],
-                                  marker=self.marker,
-                                  linestyle=self.linestyle,
-                                  label=self.plot_labels[i])
-
-                else:
-                    self.ax1.plot(self.data_frame.iloc[:, i],
-                                  color=self.palette[i],
-                                  label=self.plot_labels[i])
-
-            self.ax1.legend(loc='best', shadow=True)
-
-        elif self.number_of_axis == 2:
-
-            self.ax1 = self.mainFigure.add_subplot(211)
-            self.ax1.set_title(self.plot_titles[0], visible=False)
-            self.ax1.plot(self.data_frame.iloc[:, 0],
-                          color=self.palette[0],
-                          label=self.plot_labels[0])
-            self.ax1.legend(loc='upper right', shadow=True)
-
-            self.ax2 = self.mainFigure.add_subplot(212)
-            self.ax2.set_title(self.plot_titles[1], visible=False)
-            self.ax2.plot(self.data_frame.iloc[:, 1],
-                          color=self.palette[1],
-                          label=self.plot_labels[1])
-            self.ax2.legend(loc='upper right', shadow=True)
-
-        elif self.number_of_axis == 3:
-            self.ax1 = self.mainFigure.add_subplot(221)
-            self.ax1.set_title(self.plot_titles[0], visible=False)
-            self.ax1.plot(self.data_frame.iloc[:, 0],
-                          color=self.palette[0],
-                          label=self.plot_labels[0])
-            self.ax1.legend(loc='upper right', shadow=True)
-
-            self.ax2 = self.mainFigure.add_subplot(222)
-            self.ax2.set_title(self.plot_titles[1], visible=False)
-            self.ax2.plot(self.data_frame.iloc[:, 1],
-                          color=self.palette[1],
-                          label=self.plot_labels[1])
-            self.ax2.legend(loc='upper right', shadow=True)
-
-            self.ax3 = self.mainFigure.add_subplot(223)
-            self.ax3.set_title(self.plot_titles[2], visible=False)
-            self.ax3.plot(self.data_frame.iloc[:, 2],
-                          color=self.palette[2],
-                          label=self.plot_labels[2])
-            self.ax3.legend(loc='upper right', shadow=True)
-
-        elif self.number_of_axis == 4:
-
-            self.ax1 = self.mainFigure.add_subplot(221)
-            self.ax1.set_title(self.plot_titles[0], visible=False)
-            self.ax1.plot(self.data_frame.iloc[:, 0],
-                          color=self.palette[0],
-                          label=self.plot_labels[0])
-            self.ax1.legend(loc='upper right', shadow=True)
-
-            self.ax2 = self.mainFigure.add_subplot(222)
-            self.ax2.set_title(self.plot_titles[1], visible=False)
-            self.ax2.plot(self.data_frame.iloc[:, 1],
-                          color=self.palette[1],
-                          label=self.plot_labels[1])
-            self.ax2.legend(loc='upper right', shadow=True)
-
-            self.ax3 = self.mainFigure.add_subplot(223)
-            self.ax3.set_title(self.plot_titles[2], visible=False)
-            self.ax3.plot(self.data_frame.iloc[:, 2],
-                          color=self.palette[2],
-                          label=self.plot_labels[2])
-            self.ax3.legend(loc='upper right', shadow=True)
-
-            self.ax4 = self.mainFigure.add_subplot(224)
-            self.ax4.set_title(self.plot_titles[3], visible=False)
-            self.ax4.plot(self.data_frame.iloc[:, 3],
-                          color=self.palette[3],
-                          label=self.plot_labels[3])
-            self.ax4.legend(loc='upper right', shadow=True)
-
-        elif self.number_of_axis == 5:
-
-            self.ax1 = self.mainFigure.add_subplot(231)
-            self.ax1.set_title(self.plot_titles[0], visible=False)
-            self.ax1.plot(self.data_frame.iloc[:, 0],
-                          color=self.palette[0],
-                          label=self.plot_labels[0])
-            self.ax1.legend(loc='upper right', shadow=True)
-
-            self.ax2 = self.mainFigure.add_subplot(232)
-            self.ax2.set_title(self.plot_titles[1], visible=False)
-            self.ax2.plot(self.data_frame.iloc[:, 1],
-                          color=self.palette[1],
-                          label=self.plot_labels[1])
-            self.ax2.legend(loc='upper right', shadow=True)
-
-            self.ax3 = self.mainFigure.add_subplot(233)
-            self.ax3.set_title(self.plot_titles[2], visible=False)
-            self.ax3.plot(self.data_frame.iloc[:, 2],
-                          color=self.palette[2],
-                          label=self.plot_labels[2])
-            self.ax3.legend(loc='upper right', shadow=True)
-
-            self.ax4 = self.mainFigure.add_subplot(234)
-            self.ax4.set_title(self.plot_titles[3], visible=False)
-            self.ax4.plot(self.data_frame.iloc[:, 3],
-                          color=self.palette[3],
-                          label=self.plot_labels[3])
-            self.ax4.legend(loc='upper right', shadow=True)
-
-            self.ax5 = self.mainFigure.add_subplot(235)
-            self.ax5.set_title(self.plot_titles[4], visible=False)
-            self.ax5.plot(self.data_frame.iloc[:, 4],
-                          color=self.palette[4],
-                          label=self.plot_labels[4])
-            self.ax5.legend(loc='upper right', shadow=True)
-
-        elif self.number_of_axis == 6:
-
-            self.ax1 = self.mainFigure.add_subplot(231)
-            self.ax1.set_title(self.plot_titles[0], visible=False)
-            self.ax1.plot(self.data_frame.iloc[:, 0],
-                          color=self.palette[0],
-                          label=self.plot_labels[0])
-            self.ax1.legend(loc='upper right', shadow=True)
-
-            self.ax2 = self.mainFigure.add_subplot(232)
-            self.ax2.set_title(self.plot_titles[1], visible=False)
-            self.ax2.plot(self.data_frame.iloc[:, 1],
-                          color=self.palette[1],
-                          label=self.plot_labels[1])
-            self.ax2.legend(loc='upper right', shadow=True)
-
-            self.ax3 = self.mainFigure.add_subplot(233)
-            self.ax3.set_title(self.plot_titles[2], visible=False)
-            self.ax3.plot(self.data_frame.iloc[:, 2],
-                          color=self.palette[2],
-                          label=self.plot_labels[2])
-            self.ax3.legend(loc='upper right', shadow=True)
-
-            self.ax4 = self.mainFigure.add_subplot(234)
-            self.ax4.set_title(self.plot_titles[3], visible=False)
-            self.ax4.plot(self.data_frame.iloc[:, 3],
-                          color=self.palette[3],
-                          label=self.plot_labels[3])
-            self.ax4.legend(loc='upper right', shadow=True)
-
-            self.ax5 = self.mainFigure.add_subplot(235)
-            self.ax5.set_title(self.plot_titles[4], visible=False)
-            self.ax5.plot(self.data_frame.iloc[:, 4],
-                          color=self.palette[4],
-                          label=self.plot_labels[4])
-            self.ax5.legend(loc='upper right', shadow=True)
-
-            self.ax6 = self.mainFigure.add_subplot(236)
-            self.ax6.set_title(self.plot_titles[5], visible=False)
-            self.ax6.plot(self.data_frame.iloc[:, 5],
-                          color=self.palette[5],
-                          label=self.plot_labels[5])
-            self.ax6.legend(loc='upper right', shadow=True)
-
-        elif self.number_of_axis == 7:
-
-            self.ax1 = self.mainFigure.add_subplot(241)
-            self.ax1.set_title(self.plot_titles[0], visible=False)
-            self.ax1.plot(self.data_frame.iloc[:, 0],
-                          color=self.palette[0],
-                          label=self.plot_labels[0])
-            self.ax1.legend(loc='upper right', shadow=True)
-
-            self.ax2 = self.mainFigure.add_subplot(242)
-            self.ax2.set_title(self.plot_titles[1], visible=False)
-            self.ax2.plot(self.data_frame.iloc[:, 1],
-                          color=self.palette[1],
-                          label=self.plot_labels[1])
-            self.ax2.legend(loc='upper right', shadow=True)
-
-            self.ax3 = self.mainFigure.add_subplot(243)
-            self.ax3.set_title(self.plot_titles[2], visible=False)
-            self.ax3.plot(self.data_frame.iloc[:, 2],
-                          color=self.palette[2],
-                          label=self.plot_labels[2])
-            self.ax3.legend(loc='upper right', shadow=True)
-
-            self.ax4 = self.mainFigure.add_subplot(244)
-            self.ax4.set_title(self.plot_titles[3], visible=False)
-            self.ax4.plot(self.data_frame.iloc[:, 3],
-                          color=self.palette[3],
-                          label=self.plot_labels[3])
-            self.ax4.legend(loc='upper right', shadow=True)
-
-            self.ax5 = self.mainFigure.add_subplot(245)
-            self.ax5.set_title(self.plot_titles[4], visible=False)
-            self.ax5.plot(self.data_frame.iloc[:, 4],
-                          color=self.palette[4],
-                          label=self.plot_labels[4])
-            self.ax5.legend(loc='upper right', shadow=True)
-
-            self.ax6 = self.mainFigure.add_subplot(246)
-            self.ax6.set_title(self.plot_titles[5], visible=False)
-            self.ax6.plot(self.data_frame.iloc[:, 5],
-                          color=self.palette[5],
-                          label=self.plot_labels[5])
-            self.ax6.legend(loc='upper right', shadow=True)
-
-            self.ax7 = self.mainFigure.add_subplot(246)
-            self.ax7.set_title(self.plot_titles[6], visible=False)
-            self.ax7.plot(self.data_frame.iloc[:, 6],
-                          color=self.palette[6],
-                          label=self.plot_labels[6])
-            self.ax7.legend(loc='upper right', shadow=True)
-
-        else:
-            self.ax1 = self.mainFigure.add_subplot(241)
-            self.ax1.set_title(self.plot_titles[0], visible=False)
-            self.ax1.plot(self.data_frame.iloc[:, 0],
-                          color=self.palette[0],
-                          label=self.plot_labels[0])
-            self.ax1.legend(loc='upper right', shadow=True)
-
-            self.ax2 = self.mainFigure.add_subplot(242)
-            self.ax2.set_title(self.plot_titles[1], visible=False)
-            self.ax2.plot(self.data_frame.iloc[:, 1],
-                          color=self.palette[1],
-                          label=self.plot_labels[1])
-            self.ax2.legend(loc='upper right', shadow=True)
-
-            self.ax3 = self.mainFigure.add_subplot(243)
-            self.ax3.set_title(self.plot_titles[2], visible=False)
-            self.ax3.plot(self.data_frame.iloc[:, 2],
-                          color=self.palette[2],
-                          label=self.plot_labels[2])
-            self.ax3.legend(loc='upper right', shadow=True)
-
-            self.ax4 = self.mainFigure.add_subplot(244)
-            self.ax4.set_title(self.plot_titles[3], visible=False)
-            self.ax4.plot(self.data_frame.iloc[:, 3],
-                          color=self.palette[3],
-                          label=self.plot_labels[3])
-            self.ax4.legend(loc='upper right', shadow=True)
-
-            self.ax5 = self.mainFigure.add_subplot(245)
-            self.ax5.set_title(self.plot_titles[4], visible=False)
-            self.ax5.plot(self.data_frame.iloc[:, 4],
-                          color=self.palette[4],
-                          label=self.plot_labels[4])
-            self.ax5.legend(loc='upper right', shadow=True)
-
-            self.ax6 = self.mainFigure.add_subplot(246)
-            self.ax6.set_title(self.plot_titles[5], visible=False)
-            self.ax6.plot(self.data_frame.iloc[:, 5],
-                          color=self.palette[5],
-                          label=self.plot_labels[5])
-            self.ax6.legend(loc='upper right', shadow=True)
-
-            self.ax7 = self.mainFigure.add_subplot(247)
-            self.ax7.set_title(self.plot_titles[6], visible=False)
-            self.ax7.plot(self.data_frame.iloc[:, 6],
-                          color=self.palette[6],
-                          label=self.plot_labels[6])
-            self.ax7.legend(loc='upper right', shadow=True)
-
-            self.ax8 = self.mainFigure.add_subplot(248)
-            self.ax8.set_title(self.plot_titles[7], visible=False)
-            self.ax8.plot(self.data_frame.iloc[:, 7],
-                          color=self.palette[7],
-                          label=self.plot_labels[7])
-            self.ax8.legend(loc='upper right', shadow=True)
-
-        self.mainFigure.subplots_adjust(top=0.975,
-                                        bottom=0.09,
-                                        left=0.075,
-                                        right=0.975,
-                                        hspace=0.15,
-                                        wspace=0.15)
-
-        self.mainFigureCanvas.draw()
+        self.figureModel.plot(self.data_frame, self.x_axis_name, self.y_axis_name,
+                              self.plot_titles, self.plot_labels, self.number_of_axis,
+                              channelColors(self.palette, len(self.data_frame.columns), self.colormap),
+                              marker=self.marker, linestyle=self.linestyle,
+                              overlays=overlays)
 
     def plotPreviewDF(self):
         """
@@ -2223,7 +2182,7 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             ##########################################################
         """
 
-        if self.previewDF.empty:
+        if self.engine.previewDF.empty:
             self.warningDialog('Empty Data Frame!')
 
         else:
@@ -2232,12 +2191,12 @@ class GasSensorDataAnalysisSystem(QMainWindow):
 
             self.plottingControl['previewDF'] = True
 
-            self.plotDataFrame(data_frame=self.previewDF,
-                               x_axis_name=f'Time ({self.timeUnitStr})',
-                               y_axis_name=f'Sensor data ({self.channelsUnitStr})',
-                               plot_titles=self.previewDF.columns,
-                               plot_labels=self.previewDF.columns,
-                               number_of_axis=len(self.previewDF.columns))
+            self.plotDataFrame(data_frame=self.engine.previewDF,
+                               x_axis_name=f'Time ({self.engine.timeUnitStr})',
+                               y_axis_name=f'Sensor data ({self.engine.channelsUnitStr})',
+                               plot_titles=self.engine.previewDF.columns,
+                               plot_labels=self.engine.previewDF.columns,
+                               number_of_axis=len(self.engine.previewDF.columns))
 
     def plotVisualizationData(self):
         """
@@ -2250,7 +2209,7 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             ##########################################################
         """
 
-        if self.visualizationDF.empty:
+        if self.engine.visualizationDF.empty:
             self.warningDialog('Empty Data Frame!')
 
         else:
@@ -2259,12 +2218,12 @@ class GasSensorDataAnalysisSystem(QMainWindow):
 
             self.plottingControl['visualizationDF'] = True
 
-            self.plotDataFrame(data_frame=self.visualizationDF,
-                               x_axis_name=f'Time ({self.timeUnitStr})',
-                               y_axis_name=f'Sensor data ({self.channelsUnitStr})',
-                               plot_titles=self.visualizationDF.columns,
-                               plot_labels=self.visualizationDF.columns,
-                               number_of_axis=len(self.visualizationDF.columns))
+            self.plotDataFrame(data_frame=self.engine.visualizationDF,
+                               x_axis_name=f'Time ({self.engine.timeUnitStr})',
+                               y_axis_name=f'Sensor data ({self.engine.channelsUnitStr})',
+                               plot_titles=self.engine.visualizationDF.columns,
+                               plot_labels=self.engine.visualizationDF.columns,
+                               number_of_axis=len(self.engine.visualizationDF.columns))
 
     def plotNormalizationData(self):
         """
@@ -2275,7 +2234,7 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             ##########################################################
         """
 
-        if self.normalizationDF.empty:
+        if self.engine.normalizationDF.empty:
             self.warningDialog('Empty Data Frame!')
 
         else:
@@ -2284,11 +2243,11 @@ class GasSensorDataAnalysisSystem(QMainWindow):
 
             self.plottingControl['normalizationDF'] = True
 
-            self.plotDataFrame(data_frame=self.normalizationDF,
-                               x_axis_name=f'{self.normalizationDF.index.name} ({self.timeUnitInput.text()})',
+            self.plotDataFrame(data_frame=self.engine.normalizationDF,
+                               x_axis_name=f'{self.engine.normalizationDF.index.name} ({self.timeUnitInput.text()})',
                                y_axis_name='Normalized Resistance (arb. units)',
                                plot_titles=['Normalization'],
-                               plot_labels=self.visualizationDF.columns,
+                               plot_labels=self.engine.visualizationDF.columns,
                                number_of_axis=1)
 
     def plotRespData(self):
@@ -2300,7 +2259,12 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             ##########################################################
         """
 
-        if self.propertiesDF.empty:
+        self.plotResponse()
+
+    def plotResponse(self, overlays=()):
+        """ Plots the response data with the overlays (see plotFittedData). """
+
+        if len(self.engine.properties) == 0:
             self.warningDialog('Properties DF is empty!')
 
         else:
@@ -2309,59 +2273,48 @@ class GasSensorDataAnalysisSystem(QMainWindow):
 
             self.plottingControl['Response'] = True
 
-            self.respDF = pd.DataFrame()
-
-            self.respDF.insert(0, 'concentration',
-                               value=self.propertiesDF['concentration'])
-
-            for i, column in enumerate(self.visualizationDF.columns):
-                self.respDF.insert(i+1, column+' resp',
-                                   value=self.propertiesDF[column+' resp'])
-
-            self.respDF.set_index('concentration', inplace=True)
-
-            self.plotDataFrame(self.respDF,
-                               x_axis_name=f'Concentration ({self.concentrationUnitStr})',
+            # built again only if the cycles or channels changed
+            self.plotDataFrame(self.engine.respDF,
+                               x_axis_name=f'Concentration ({self.engine.concentrationUnitStr})',
                                y_axis_name=self.responseLabel,
                                plot_titles=['Response'],
-                               plot_labels=self.visualizationDF.columns,
+                               plot_labels=self.engine.visualizationDF.columns,
                                number_of_axis=1,
-                               marker='o')
+                               marker='o',
+                               overlays=overlays)
 
     def plotFittedData(self):
         """
             ##########################################################
 
             This function will plot the response and the fitting data.
+            The fit curves are drawn over the response data as 
+            overlays, so a new fit only updates them in place.
 
             ##########################################################
         """
 
-        if self.fitDF.empty:
+        if self.engine.fitDF.empty:
             self.warningDialog('Properties DF is empty!')
 
         else:
-            self.plotRespData()
+            overlays = []
 
-            for key in self.plottingControl.keys():
-                self.plottingControl[key] = False
+            for i, column in enumerate(self.engine.visualizationDF.columns):
+                
+                legend = f'{self.engine.fitListLabel[i]}'
 
-            self.plottingControl['Fit'] = True
+                if self.engine.responseType['sensitivity'] and self.engine.sensitivityList:
+                    legend = legend + '\n' + self.engine.sensitivityResultsList[i]
 
-            for i, column in enumerate(self.visualizationDF.columns):
-                
-                legend = f'{self.fitListLabel[i]}'
+                overlays.append(Overlay(i, self.engine.fitDF.iloc[:, i], legend))
 
-                if self.responseType['sensitivity'] and self.sensitivityList:
-                    legend = legend + '\n' + self.sensitivityResultsList[i]
+            self.plotResponse(overlays)
 
-                self.ax1.plot(self.fitDF.iloc[:, i],
-                              linestyle='dashed',
-                              color=self.palette[i],
-                              label=legend)
+            for key in self.plottingControl.keys():
+                self.plottingControl[key] = False
 
-            self.ax1.legend(loc='best', shadow=True)
-            self.mainFigureCanvas.draw()
+            self.plottingControl['Fit'] = True
 
     def plotRespTimeData(self):
         """
@@ -2371,7 +2324,7 @@ class GasSensorDataAnalysisSystem(QMainWindow):
 
             ##########################################################
         """
-        if self.propertiesDF.empty:
+        if len(self.engine.properties) == 0:
             self.warningDialog('The properties DF is empty!')
 
         else:
@@ -2380,22 +2333,11 @@ class GasSensorDataAnalysisSystem(QMainWindow):
 
             self.plottingControl['RespTime'] = True
 
-            self.respTimeDF = pd.DataFrame()
-
-            self.respTimeDF.insert(
-                0, 'concentration', value=self.propertiesDF['concentration'])
-
-            for i, column in enumerate(self.visualizationDF.columns):
-                self.respTimeDF.insert(
-                    i+1, column+' respTime', value=self.propertiesDF[column+' respTime'])
-
-            self.respTimeDF.set_index('concentration', inplace=True)
-
-            self.plotDataFrame(self.respTimeDF,
-                               x_axis_name=f'Concentration ({self.concentrationUnitStr})',
-                               y_axis_name=f'Response time ({self.timeUnitStr})',
+            self.plotDataFrame(self.engine.respTimeDF,
+                               x_axis_name=f'Concentration ({self.engine.concentrationUnitStr})',
+                               y_axis_name=f'Response time ({self.engine.timeUnitStr})',
                                plot_titles=['Resp time'],
-                               plot_labels=self.visualizationDF.columns,
+                               plot_labels=self.engine.visualizationDF.columns,
                                number_of_axis=1,
                                marker='o',
                                linestyle='dashed')
@@ -2409,7 +2351,7 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             ##########################################################
         """
 
-        if self.propertiesDF.index.empty:
+        if len(self.engine.properties) == 0:
             self.warningDialog('The properties DF is empty!')
 
         else:
@@ -2418,22 +2360,11 @@ class GasSensorDataAnalysisSystem(QMainWindow):
 
             self.plottingControl['RecTime'] = True
 
-            self.recTimeDF = pd.DataFrame()
-
-            self.recTimeDF.insert(0, 'concentration',
-                                  value=self.propertiesDF['concentration'])
-
-            for i, column in enumerate(self.visualizationDF.columns):
-                self.recTimeDF.insert(
-                    i+1, column+' recTime', value=self.propertiesDF[column+' recTime'])
-
-            self.recTimeDF.set_index('concentration', inplace=True)
-
-            self.plotDataFrame(self.recTimeDF,
-                               x_axis_name=f'Concentration ({self.concentrationUnitStr})',
-                               y_axis_name=f'Recovery time ({self.timeUnitStr})',
+            self.plotDataFrame(self.engine.recTimeDF,
+                               x_axis_name=f'Concentration ({self.engine.concentrationUnitStr})',
+                               y_axis_name=f'Recovery time ({self.engine.timeUnitStr})',
                                plot_titles=['Rec time'],
-                               plot_labels=self.visualizationDF.columns,
+                               plot_labels=self.engine.visualizationDF.columns,
                                number_of_axis=1,
                                marker='o',
                                linestyle='dashed')
@@ -2443,19 +2374,17 @@ class GasSensorDataAnalysisSystem(QMainWindow):
             ##########################################################
 
             This function will export the data frames into CSV files
-            according to the folder that the user has chosen
+            (or the binary format chosen) according to the folder that
+            the user has chosen
 
             # 1 Gets the export file names from the input box
 
-            # 2 Create paths according to the exportDirectory
-                from the getExportFileDirectory function
-
-            # 3 Creates an header in each file containing the date time
-                and the name of the analysis chosen by the user. 
-                Export the data that is checked. The check boxes are disabled
-                if there is no data in the respective dataFrame. The fitDF
-                generates two tables, one with the data, another with the
-                fit info
+            # 2 The engine creates an header in each file containing the
+                date time and the name of the analysis chosen by the user
+                and exports the data that is checked. The check boxes are
+                disabled if there is no data in the respective dataFrame.
+                The fitDF generates two tables, one with the data, another
+                with the fit info. The files are written on a worker thread
 
             ##########################################################
         """
@@ -2464,102 +2393,14 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.exportFileName = self.exportFileNameInput.text()
 
         # 2
-        self.path1 = self.exportDirectory+'/'+self.exportFileName+' VIS_DATA.dat'
-        self.path2 = self.exportDirectory+'/'+self.exportFileName+' NORM_DATA.dat'
-        self.path3 = self.exportDirectory+'/'+self.exportFileName+' RESPONSE_DATA.dat'
-        self.path4 = self.exportDirectory+'/'+self.exportFileName+' FIT_INFO.dat'
-        self.path5 = self.exportDirectory+'/'+self.exportFileName+' FIT_DATA.dat'
-
-        # 3
-        t = datetime.now()
-
-        if self.exportVisDataCheck.isChecked():
-            self.visDataFile = open(self.path1, 'w')
-            self.visDataFile.write(f'# {t.strftime("%m/%d/%Y, %H:%M:%S")} \n')
-            self.visDataFile.write(f'# {self.exportFileName} \n\n')
-            self.visDataFile.write(f'# Visualization data\n')
-            self.visDataFile.write(f'# time unit: {self.timeUnitStr}\n')
-            self.visDataFile.write(
-                f'# channels unit: {self.channelsUnitStr}\n\n\n')
-            self.visDataFile.close()
-
-            self.visualizationDF.to_csv(
-                self.path1, float_format='%10.4f', sep=self.separator, mode='a', index=True)
-
-        if self.exportNormDataCheck.isChecked():
-            self.normDataFile = open(self.path2, 'w')
-            self.normDataFile.write(f'# {t.strftime("%m/%d/%Y, %H:%M:%S")} \n')
-            self.normDataFile.write(f'# {self.exportFileName} \n\n')
-            self.normDataFile.write(f'# Normalization data\n')
-            self.normDataFile.write(f'# time unit: {self.timeUnitStr}\n')
-            self.normDataFile.write(
-                f'# normalization point: {self.normalizationPoint} {self.timeUnitStr}\n\n\n')
-            self.normDataFile.close()
-
-            self.normalizationDF.to_csv(
-                self.path2, float_format='%10.7f', sep=self.separator, mode='a', index=True)
-
-        if self.exportPropDataCheck.isChecked():
-            self.propDataFile = open(self.path3, 'w')
-            self.propDataFile.write(f'# {t.strftime("%m/%d/%Y, %H:%M:%S")} \n')
-            self.propDataFile.write(f'# {self.exportFileName} \n\n')
-            self.propDataFile.write(f'# Properties data \n')
-
-            if self.responseType['dR/R0']:
-                if self.responseType['sigconc']:
-                    self.propDataFile.write(
-                        f'# Response in %/{self.concentrationUnitStr}\n')
-                else:
-                    self.propDataFile.write(f'# Response in %\n')
-
-            elif self.responseType['dR']:
-                if self.responseType['sigconc']:
-                    self.propDataFile.write(
-                        f'# Response in {self.channelsUnitStr}/{self.concentrationUnitStr}\n')
-                else:
-                    self.propDataFile.write(
-                        f'# Response in {self.channelsUnitStr}\n')
-
-            elif self.responseType['Rgas/Rair']:
-                if self.responseType['sigconc']:
-                    self.propDataFile.write(
-                        f'# Response in Rgas/Rair/{self.concentrationUnitStr}\n')
-                else:
-                    self.propDataFile.write(f'# Response in a.u. (Rgas/Rair)\n')
-
-            self.propDataFile.write(
-                f'# Resp and Rec times unit: {self.timeUnitStr}\n\n\n')
-            self.propDataFile.close()
-
-            self.propertiesDF.to_csv(
-                self.path3, float_format='%10.3f', sep=self.separator, mode='a', index=True)
-
-        if self.exportFitInfoCheck.isChecked():
-            self.fitDataFile = open(self.path4, 'w')
-            self.fitDataFile.write(f'# {t.strftime("%m/%d/%Y, %H:%M:%S")} \n')
-            self.fitDataFile.write(f'# {self.exportFileName} \n\n')
-
-            self.fitDataFile.write('Power Law Fit function\n')
-            self.fitDataFile.write('Response = a*(Conc.)^b\n\n\n')
-
-            for i, label in enumerate(self.fitListLabel):
-                self.fitDataFile.write(label+'\n')
-            
-                if self.responseType['sensitivity']:
-                    self.fitDataFile.write(self.sensitivityResultsList[i]+'\n')
-
-            self.fitDataFile.close()
-
-            self.fitDataFile2 = open(self.path5, 'w')
-            self.fitDataFile2.write(f'# {t.strftime("%m/%d/%Y, %H:%M:%S")} \n')
-            self.fitDataFile2.write(f'# {self.exportFileName} \n\n')
-            self.fitDataFile2.write(f'# Power Law Fit data\n\n\n')
-            self.fitDataFile2.close()
-
-            self.fitDF.to_csv(self.path5, float_format='%10.3f',
-                              sep=self.separator, mode='a', index=True)
-
-        self.warningDialog('Export done!')
+        self.startTask('export', self.engine.exportData,
+                       self.exportDirectory, self.exportFileName,
+                       visData=self.exportVisDataCheck.isChecked(),
+                       normData=self.exportNormDataCheck.isChecked(),
+                       propData=self.exportPropDataCheck.isChecked(),
+                       fitInfo=self.exportFitInfoCheck.isChecked(),
+                       fileFormat=self.exportFormatInput.currentText(),
+                       onFinished=lambda paths: self.warningDialog('Export done!'))
 
     def showAboutDialog(self):
         """
@@ -2638,20 +2479,63 @@ class GasSensorDataAnalysisSystem(QMainWindow):
         self.warningBox.setText(self.message)
         self.warningBox.exec_()
 
+    def saveProjectBeforeClosing(self):
+        """ Saves the project on this thread. Returns False if it was not saved. """
+
+        path = None
+
+        if self.engine.project is None:
+            path, _ = QFileDialog.getSaveFileName(self, 'Save Project', '',
+                                                  'GSDAS project (*.gsdas)')
+
+            if not path:
+                return False
+
+        try:
+            self.engine.saveProject(path)
+        except (OSError, ValueError) as error:
+            self.warningDialog(str(error))
+            return False
+
+        return True
+
     def closeEvent(self, event):
         """
             ##########################################################
 
-            Close event with a message to confirm.
+            Close event with a message to confirm. If there is data,
+            the user can save the project before quitting: the jobs
+            still running are then waited for, not cancelled, so a
+            half-done fit or calculation is never saved. Otherwise
+            they are cancelled and waited for.
 
             ##########################################################
         """
-        self.warningBox_2 = QMessageBox.question(self,
-                                                 'Close window',
-                                                 'Would you like to quit?',
-                                                 QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if self.engine.previewData is None:
+            self.warningBox_2 = QMessageBox.question(self,
+                                                     'Close window',
+                                                     'Would you like to quit?',
+                                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        else:
+            self.warningBox_2 = QMessageBox.question(self,
+                                                     'Close window',
+                                                     'Would you like to save the project before quitting?',
+                                                     QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel,
+                                                     QMessageBox.Cancel)
+
+        if self.warningBox_2 == QMessageBox.Save:
+            self.tasks.waitForDone()
+
+            if not self.saveProjectBeforeClosing():
+                event.ignore()
+                return
+
+            event.accept()
+
+        elif self.warningBox_2 in (QMessageBox.Yes, QMessageBox.Discard):
+            self.tasks.cancelAll()
+            self.tasks.waitForDone()
 
-        if self.warningBox_2 == QMessageBox.Yes:
             event.accept()
 
         else:
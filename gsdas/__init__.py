@@ -0,0 +1,14 @@
+from .engine import AnalysisEngine, powerLawFunc
+from .properties import PropertiesStore
+from .cache import DataCache
+from .lookup import TimeIndex, closestTime, closestTimes, getTimeIndex
+from .schedule import CycleSchedule
+from .decimate import decimateView, minMaxDecimate
+from .models import MODELS, CalibrationModel
+from .project import ProjectFile
+from .batch import AnalysisRecipe, analyzeFile, runBatch
+
+__all__ = ['AnalysisEngine', 'powerLawFunc', 'PropertiesStore', 'DataCache',
+           'TimeIndex', 'closestTime', 'closestTimes', 'getTimeIndex',
+           'CycleSchedule', 'decimateView', 'minMaxDecimate', 'MODELS', 'CalibrationModel',
+           'ProjectFile', 'AnalysisRecipe', 'analyzeFile', 'runBatch']
@@ -0,0 +1,70 @@
+import argparse
+import sys
+
+from .batch import AnalysisRecipe, findFiles, runBatch
+
+
+def batchCommand(args) -> int:
+    """ Runs the recipe on every file and prints one line per file. """
+
+    recipe = AnalysisRecipe.fromFile(args.recipe)
+    files, skipped = findFiles(args.inputs, args.pattern, recipe.channelsNeeded())
+
+    for fileName, reason in skipped:
+        print(f'skipped {fileName}: {reason}', file=sys.stderr)
+
+    if not files:
+        print('No data files found.', file=sys.stderr)
+        return 1
+
+    def report(result):
+        fileName, written, error = result
+
+        if error:
+            print(f'FAILED  {fileName}: {error}', file=sys.stderr)
+        else:
+            print(f'done    {fileName} ({len(written)} files)')
+
+    try:
+        results = runBatch(files, recipe, args.output,
+                           processes=args.processes, progress=report,
+                           useCache=not args.no_cache)
+
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    failed = sum(1 for result in results if result[2])
+    print(f'{len(results)-failed}/{len(results)} files analyzed')
+
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='gsdas', description='Gas Sensor Data Analysis System')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    batchParser = subparsers.add_parser(
+        'batch', help='analyze whole directories of acquisition files')
+    batchParser.add_argument('inputs', nargs='+',
+                             help='data files, directories or glob patterns')
+    batchParser.add_argument('-r', '--recipe', required=True,
+                             help='JSON file with the analysis recipe')
+    batchParser.add_argument('-o', '--output', default='results',
+                             help='folder of the exported files (default: results)')
+    batchParser.add_argument('-p', '--pattern', default='*.dat',
+                             help='file pattern used inside directories (default: *.dat)')
+    batchParser.add_argument('-j', '--processes', type=int, default=None,
+                             help='number of worker processes (default: number of CPUs)')
+    batchParser.add_argument('--no-cache', action='store_true',
+                             help='always parse the files instead of using the cache')
+    batchParser.set_defaults(func=batchCommand)
+
+    args = parser.parse_args(argv)
+
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import bz2
+import fnmatch
+import gzip
+import lzma
+import os
+import zipfile
+from typing import List, Optional, Tuple
+
+# a member of an archive is named 'archive.zip::folder/data.dat'
+MEMBER_SEPARATOR = '::'
+
+# each one opens a decompressing stream over the raw file
+COMPRESSED = {'.gz': lambda raw: gzip.GzipFile(fileobj=raw),
+              '.xz': lzma.LZMAFile,
+              '.bz2': bz2.BZ2File}
+ARCHIVES = ('.zip',) + tuple(COMPRESSED)
+
+
+def isArchive(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in ARCHIVES
+
+
+def splitMember(fileName: str) -> Tuple[str, Optional[str]]:
+    """ (archive path, member) of a member name, (fileName, None) otherwise. """
+
+    if MEMBER_SEPARATOR in fileName:
+        archive, member = fileName.split(MEMBER_SEPARATOR, 1)
+
+        if isArchive(archive):
+            return archive, member
+
+    return fileName, None
+
+
+def memberName(archive: str, member: str) -> str:
+    return f'{archive}{MEMBER_SEPARATOR}{member}'
+
+
+def sourcePath(fileName: str) -> str:
+    """ File on disk that holds fileName (the archive for members). """
+
+    return splitMember(fileName)[0]
+
+
+def displayName(fileName: str) -> str:
+    """ Name of the data without folders and compression extension. """
+
+    archive, member = splitMember(fileName)
+    name = os.path.basename(member or archive)
+
+    if member is None and os.path.splitext(name)[1].lower() in COMPRESSED:
+        name = os.path.splitext(name)[0]
+
+    return name
+
+
+class DataStream:
+    """
+        ##########################################################
+
+        Binary stream of a data file, a member of a .zip archive
+        or a .gz/.xz/.bz2 file, decompressed while it is read so
+        nothing is extracted to the disk:
+
+            with DataStream('data.zip::dataSample_1.dat') as stream:
+                pd.read_csv(stream.stream, ...)
+
+        fraction() tells how much of the data has been read, from
+        the position in the compressed file when the uncompressed
+        size is not known.
+
+        ##########################################################
+    """
+
+    def __init__(self, fileName: str) -> None:
+        archive, member = splitMember(fileName)
+        extension = os.path.splitext(archive)[1].lower()
+
+        self._archive = None
+        self._raw = None
+
+        if member is not None and extension == '.zip':
+            self._archive = zipfile.ZipFile(archive)
+
+            try:
+                info = self._archive.getinfo(member)
+                self.stream = self._archive.open(info)
+            except KeyError:
+                self._archive.close()
+                raise ValueError(f'{member} is not in {os.path.basename(archive)}!')
+
+            self.size = info.file_size
+            self._position = self.stream.tell
+
+        elif extension in COMPRESSED:
+            self._raw = open(archive, 'rb')
+            self.stream = COMPRESSED[extension](self._raw)
+            self.size = os.fstat(self._raw.fileno()).st_size
+            self._position = self._raw.tell
+
+        else:
+            self.stream = open(archive, 'rb')
+            self.size = os.fstat(self.stream.fileno()).st_size
+            self._position = self.stream.tell
+
+    def fraction(self) -> float:
+        return min(self._position()/max(self.size, 1), 1.0)
+
+    def close(self) -> None:
+        for item in (self.stream, self._raw, self._archive):
+            if item is not None:
+                item.close()
+
+    def __enter__(self) -> 'DataStream':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def listMembers(archive: str, pattern: Optional[str] = None) -> List[str]:
+    """ Names of the data in the archive, matching pattern if given. """
+
+    if os.path.splitext(archive)[1].lower() == '.zip':
+        with zipfile.ZipFile(archive) as zipArchive:
+            members = [memberName(archive, info.filename) for info in zipArchive.infolist()
+                       if not info.is_dir() and not info.filename.startswith('__MACOSX/')]
+    else:
+        members = [archive]
+
+    if pattern:
+        members = [member for member in members
+                   if fnmatch.fnmatch(displayName(member), pattern)]
+
+    return members
+
@@ -0,0 +1,472 @@
+import fnmatch
+import glob
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field, fields
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .archive import displayName, isArchive, listMembers, splitMember
+from .engine import AnalysisEngine
+from .export import EXPORT_FORMATS
+from .fitting import INFORMATION_CRITERIA, RESAMPLING_METHODS
+from .kinetics import KINETICS_MODELS
+from .models import MODELS
+from .normalize import NORMALIZATION_MODES
+from .response import RESPONSE_TYPES, T90_METHODS
+from .sniff import listDataMembers, rawTableProblem
+
+
+SEPARATORS = {'auto': None, 'tab': '\t', 'comma': ',', 'space': ' ', 'semicolon': ';'}
+
+
+@dataclass
+class AnalysisRecipe:
+    """
+        ##########################################################
+
+        RECIPE: Holds every parameter that the user enters in the
+        dialogs of the interface, so the same analysis can be
+        applied to many files without any clicking.
+
+        cycles is the exposure schedule, a list of
+        [concentration, start of exposure, end of exposure,
+        end of recovery] in the time unit of the visualization.
+        Instead of it, cycleDetection can find the cycles of each
+        file, which get the concentrations in order:
+
+            {"method": "signal", "threshold": 0.05, "minDwell": 5}
+            {"method": "periodic", "firstExposure": 50,
+             "exposureTime": 15, "recoveryTime": 60}
+
+        The other keys are the options of AnalysisEngine.detectCycles
+        and AnalysisEngine.periodicCycles. schedule is the path of a
+        CSV/JSON valve schedule (see gsdas.schedule.CycleSchedule),
+        relative to the recipe file.
+
+        normalizationMode is one of gsdas.normalize.NORMALIZATION_MODES
+        ('point' if only normalizationTime is given); the baseline
+        goes from normalizationTime to normalizationEndTime.
+
+        responseType is one of 'dR/R0', 'dR' or 'Rgas/Rair' and
+        t90Method one of 'closest' or 'crossing'. Without a
+        separator ('auto'), the layout of each file is sniffed.
+
+        fitModel is a model of gsdas.models.MODELS, or 'auto' for
+        the model with the lowest modelCriterion ('aic' or 'bic') of
+        each channel.
+
+        kineticsModel ('single' or 'double') fits exponentials to
+        the response and recovery transients of every cycle (see
+        gsdas.kinetics).
+
+        confidenceMethod ('bootstrap' or 'jackknife') adds the
+        confidence intervals of the fit, from numberOfResamples
+        resamples of the cycles drawn with randomSeed. The files are
+        already analyzed in parallel, so the refits of each file
+        run in its own process.
+
+        exportFormat is one of gsdas.export.EXPORT_FORMATS: 'dat'
+        text tables, or 'npz', 'parquet' and 'hdf5' binary tables.
+
+        ##########################################################
+    """
+
+    separator: Optional[str] = None
+    numberOfChannels: int = 8
+    timeFactor: float = 1
+    channelFactor: float = 1
+    timeUnit: str = 'unit'
+    channelsUnit: str = 'unit'
+    concentrationUnit: str = 'ppm'
+
+    channels: Optional[List[str]] = None
+    startTime: Optional[float] = None
+    endTime: Optional[float] = None
+    startZero: bool = False
+    normalizationTime: Optional[float] = None
+    normalizationMode: Optional[str] = None
+    normalizationEndTime: Optional[float] = None
+
+    cycles: List[List[float]] = field(default_factory=list)
+    concentrations: List[float] = field(default_factory=list)
+    cycleDetection: Optional[Dict] = None
+    schedule: Optional[str] = None
+    responseType: str = 'dR/R0'
+    sigconc: bool = False
+    sensitivity: bool = False
+    t90Method: str = 'closest'
+    kineticsModel: Optional[str] = None
+
+    fit: bool = True
+    numberOfFitPoints: int = 100
+    fitModel: str = 'power'
+    modelCriterion: str = 'aic'
+    confidenceMethod: Optional[str] = None
+    numberOfResamples: int = 1000
+    confidenceLevel: float = 0.95
+    randomSeed: int = 0
+    exportName: str = '{name}'
+    exportFormat: str = 'dat'
+
+    @classmethod
+    def fromDict(cls, values: Dict) -> 'AnalysisRecipe':
+        """ Builds a recipe from a dictionary, refusing unknown keys. """
+
+        known = {f.name for f in fields(cls)}
+        unknown = set(values) - known
+
+        if unknown:
+            raise ValueError(f'Unknown recipe keys: {", ".join(sorted(unknown))}')
+
+        recipe = cls(**values)
+        recipe.separator = SEPARATORS.get(recipe.separator, recipe.separator)
+
+        return recipe
+
+    @classmethod
+    def fromFile(cls, path: str) -> 'AnalysisRecipe':
+        """ Reads a recipe from a JSON file. """
+
+        with open(path) as recipeFile:
+            recipe = cls.fromDict(json.load(recipeFile))
+
+        if recipe.schedule:
+            recipe.schedule = os.path.join(os.path.dirname(os.path.abspath(path)),
+                                           recipe.schedule)
+
+        return recipe
+
+    def toDict(self) -> Dict:
+        return asdict(self)
+
+    def channelsNeeded(self) -> int:
+        """ Channels a file must have for the recipe: up to the last of channels, else one. """
+
+        numbers = [int(channel[2:]) for channel in self.channels or [] if channel[2:].isdigit()]
+
+        return max(numbers, default=1)
+
+    def applyTo(self, engine: AnalysisEngine) -> None:
+        """ Sets the units, response type and fit settings of the engine. """
+
+        if self.responseType not in RESPONSE_TYPES:
+            raise ValueError(f'Invalid response type: {self.responseType}')
+
+        if self.t90Method not in T90_METHODS:
+            raise ValueError(f'Invalid t90 method: {self.t90Method}')
+
+        if self.sigconc and self.sensitivity:
+            raise ValueError('Please, select only one between sensitivity or signal/conc')
+
+        if self.kineticsModel and self.kineticsModel not in KINETICS_MODELS:
+            raise ValueError(f'Invalid kinetics model: {self.kineticsModel}')
+
+        if self.fitModel != 'auto' and self.fitModel not in MODELS:
+            raise ValueError(f'Invalid fit model: {self.fitModel}')
+
+        if self.modelCriterion not in INFORMATION_CRITERIA:
+            raise ValueError(f'Invalid information criterion: {self.modelCriterion}')
+
+        if self.confidenceMethod and self.confidenceMethod not in RESAMPLING_METHODS:
+            raise ValueError(f'Invalid resampling method: {self.confidenceMethod}')
+
+        if self.normalizationMode and self.normalizationMode not in NORMALIZATION_MODES:
+            raise ValueError(f'Invalid normalization mode: {self.normalizationMode}')
+
+        if self.exportFormat not in EXPORT_FORMATS:
+            raise ValueError(f'Invalid export format: {self.exportFormat}')
+
+        engine.timeUnitStr = self.timeUnit
+        engine.channelsUnitStr = self.channelsUnit
+        engine.concentrationUnitStr = self.concentrationUnit
+        engine.numberOfFitPoints = int(self.numberOfFitPoints)
+
+        engine.fitModelName = self.fitModel
+        engine.modelCriterion = self.modelCriterion
+
+        engine.confidenceMethod = self.confidenceMethod
+        engine.numberOfResamples = int(self.numberOfResamples)
+        engine.confidenceLevel = float(self.confidenceLevel)
+        engine.randomSeed = int(self.randomSeed)
+        engine.resampleProcesses = 1
+
+        engine.t90Method = self.t90Method
+        engine.kineticsModel = self.kineticsModel
+        engine.kineticsProcesses = 1
+
+        for key in RESPONSE_TYPES:
+            engine.responseType[key] = key == self.responseType
+
+        engine.responseType['sigconc'] = self.sigconc
+        engine.responseType['sensitivity'] = self.sensitivity
+
+
+def detectRecipeCycles(engine: AnalysisEngine, recipe: AnalysisRecipe):
+    """ Cycle times found with the cycleDetection options of the recipe. """
+
+    options = dict(recipe.cycleDetection)
+    method = options.pop('method', 'signal')
+
+    if method == 'signal':
+        return engine.detectCycles(**options)
+
+    elif method == 'periodic':
+        return engine.periodicCycles(**options)
+
+    raise ValueError(f'Invalid cycle detection method: {method}')
+
+
+def analyzeFile(fileName: str, recipe: AnalysisRecipe,
+                outputDirectory: str, useCache: bool = True,
+                name: Optional[str] = None) -> Dict[str, str]:
+    """
+        ##########################################################
+
+        Runs the whole analysis of one file with the recipe and
+        writes the same VIS/NORM/RESPONSE/FIT files as the Export
+        Data dialog, named name (see exportNames) or, if None,
+        the exportName of the recipe with the name of the file.
+        Returns the paths of the written files. With useCache the
+        parsed file is kept in (or read from) the cache of parsed
+        files.
+
+        ##########################################################
+    """
+
+    engine = AnalysisEngine()
+    engine.cache.enabled = useCache
+    recipe.applyTo(engine)
+
+    engine.loadData(fileName, recipe.separator,
+                    numberOfChannels=recipe.numberOfChannels,
+                    timeFactor=recipe.timeFactor,
+                    channelFactor=recipe.channelFactor)
+
+    engine.setVisualizationDF(recipe.channels or engine.channels,
+                              startTime=recipe.startTime,
+                              endTime=recipe.endTime,
+                              startZero=recipe.startZero)
+
+    if recipe.cycleDetection:
+        engine.calcCycles(recipe.concentrations, detectRecipeCycles(engine, recipe))
+
+    elif recipe.schedule:
+        engine.loadSchedule(recipe.schedule)
+        engine.applySchedule()
+
+    elif recipe.cycles:
+        cycles = [list(cycle) for cycle in recipe.cycles]
+        engine.calcCycles([cycle[0] for cycle in cycles], [cycle[1:] for cycle in cycles])
+
+    # after the cycles, for the R0 of the first one
+    normalizationMode = recipe.normalizationMode or \
+        ('point' if recipe.normalizationTime is not None else None)
+
+    if normalizationMode:
+        engine.setNormalizationDF(recipe.normalizationTime, normalizationMode,
+                                  recipe.normalizationEndTime)
+
+    if recipe.fit and len(engine.properties) > 1:
+        engine.fitRespData()
+
+    if name is None:
+        name = recipe.exportName.format(name=os.path.splitext(displayName(fileName))[0])
+
+    os.makedirs(outputDirectory, exist_ok=True)
+
+    return engine.exportData(outputDirectory, name, fileFormat=recipe.exportFormat)
+
+
+def pathName(fileName: str, root: str) -> str:
+    """ Folders (from root), archive and name of the data without extensions, joined by '_'. """
+
+    archive, member = splitMember(fileName)
+    folder = os.path.relpath(os.path.dirname(os.path.abspath(archive)), root)
+
+    if member is not None:
+        folder = os.path.join(folder, os.path.splitext(os.path.basename(archive))[0],
+                              os.path.dirname(member))
+
+    parts = os.path.normpath(folder).replace('\\', '/').split('/')
+    name = os.path.splitext(displayName(fileName))[0]
+
+    return '_'.join([part for part in parts if part not in ('', '.')] + [name])
+
+
+def exportNames(files: Sequence[str], exportName: str = '{name}') -> Dict[str, str]:
+    """
+        ##########################################################
+
+        Name of the exported files of each file: exportName with
+        the name of the file without extension. Files with the same
+        name (a/run1.dat and b/run1.dat, or the same member of two
+        archives) get the folders and archive that tell them apart
+        instead, joined by '_' (a_run1, b_run1).
+
+        A ValueError is raised if two files would still be
+        exported with the same name, so none overwrites another.
+
+        ##########################################################
+    """
+
+    stems = {fileName: os.path.splitext(displayName(fileName))[0] for fileName in files}
+    counts = Counter(stems.values())
+    repeated = [fileName for fileName in files if counts[stems[fileName]] > 1]
+
+    if repeated:
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(splitMember(fileName)[0]))
+                                   for fileName in repeated])
+
+        for fileName in repeated:
+            stems[fileName] = pathName(fileName, root)
+
+    names = {}
+
+    for fileName in files:
+        name = exportName.format(name=stems[fileName])
+
+        if name in names.values():
+            other = next(key for key, value in names.items() if value == name)
+            raise ValueError(f'{other} and {fileName} would be exported as {name}!')
+
+        names[fileName] = name
+
+    return names
+
+
+def archiveFiles(archive: str, pattern: str,
+                 numberOfChannels: int = 1) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+        ##########################################################
+
+        Raw acquisition tables inside an archive (see gsdas.archive
+        and gsdas.sniff.rawTableProblem): the members matching
+        pattern or, when the pattern matches the archive itself
+        (e.g. '*.zip'), the first raw table of its candidates.
+
+        Returns the files and the (member, reason) of the matching
+        members that are left out, like the exported results that
+        are often kept in the same archive.
+
+        ##########################################################
+    """
+
+    if fnmatch.fnmatch(os.path.basename(archive), pattern):
+        for member in listDataMembers(archive):
+            if rawTableProblem(member, numberOfChannels) is None:
+                return [member], []
+
+        return [], [(archive, 'no raw data table')]
+
+    return rawFiles(listMembers(archive, pattern), numberOfChannels)
+
+
+def rawFiles(fileNames: Iterable[str],
+             numberOfChannels: int = 1) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """ The raw acquisition tables of fileNames, and the (fileName, reason) of the others. """
+
+    files = []
+    skipped = []
+
+    for fileName in fileNames:
+        problem = rawTableProblem(fileName, numberOfChannels)
+
+        if problem is None:
+            files.append(fileName)
+        else:
+            skipped.append((fileName, problem))
+
+    return files, skipped
+
+
+def findFiles(inputs: Iterable[str], pattern: str = '*.dat',
+              numberOfChannels: int = 1) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+        ##########################################################
+
+        Expands directories (with pattern) and globs into a sorted
+        file list. Archives are read without extracting them, and
+        their data files are given as 'archive.zip::member' names.
+
+        Only raw acquisition tables with at least numberOfChannels
+        channels are kept, so earlier exports found next to the
+        data are not analyzed as data: the others are returned
+        apart as sorted (fileName, reason) tuples.
+
+        ##########################################################
+    """
+
+    paths = []
+
+    for item in inputs:
+        if os.path.isdir(item):
+            paths += glob.glob(os.path.join(item, pattern))
+            paths += [os.path.join(item, name) for name in os.listdir(item)
+                      if isArchive(name)]
+        else:
+            paths += glob.glob(item)
+
+    files = set()
+    skipped = set()
+
+    for path in set(paths):
+        if not os.path.isfile(path):
+            continue
+
+        if isArchive(path):
+            found, left = archiveFiles(path, pattern, numberOfChannels)
+        else:
+            found, left = rawFiles([path], numberOfChannels)
+
+        files.update(found)
+        skipped.update(left)
+
+    return sorted(files), sorted(skipped)
+
+
+def runBatch(files: Iterable[str], recipe: AnalysisRecipe, outputDirectory: str,
+             processes: Optional[int] = None,
+             progress=None, useCache: bool = True) -> List[Tuple[str, Optional[Dict[str, str]], Optional[str]]]:
+    """
+        ##########################################################
+
+        Analyzes every file on a process pool. A file that fails
+        does not stop the batch: the result of each file is a tuple
+        (fileName, written paths, error message), with either the
+        paths or the error being None. The files are exported with
+        the names of exportNames, so a ValueError is raised before
+        any is analyzed if two of them would have the same name.
+
+        progress is an optional callable receiving each result as
+        soon as its file is done.
+
+        ##########################################################
+    """
+
+    files = list(files)
+    names = exportNames(files, recipe.exportName)
+    results = []
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {pool.submit(analyzeFile, fileName, recipe, outputDirectory, useCache,
+                               names[fileName]): fileName
+                   for fileName in files}
+
+        for future in as_completed(futures):
+            fileName = futures[future]
+
+            try:
+                result = (fileName, future.result(), None)
+            except Exception as error:
+                result = (fileName, None, f'{type(error).__name__}: {error}')
+
+            results.append(result)
+
+            if progress is not None:
+                progress(result)
+
+    order = {fileName: i for i, fileName in enumerate(files)}
+
+    return sorted(results, key=lambda result: order[result[0]])
@@ -0,0 +1,201 @@
+import hashlib
+import os
+from typing import List, Optional
+
+import numpy as np
+
+from .archive import sourcePath
+
+
+DEFAULT_MAX_SIZE = 1 << 30
+
+
+def defaultCacheDirectory() -> str:
+    """ GSDAS_CACHE_DIR, or a gsdas folder in the cache folder of the user. """
+
+    if os.environ.get('GSDAS_CACHE_DIR'):
+        return os.environ['GSDAS_CACHE_DIR']
+
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+
+    return os.path.join(base, 'gsdas')
+
+
+class DataCache:
+    """
+        ##########################################################
+
+        CACHE: Keeps the parsed columns of the data files as .npy
+        files, so a file that is opened again is memory-mapped
+        instead of parsed.
+
+        Each entry is named after the path, size, modification
+        time and layout (separator, header lines and decimal mark)
+        of the data file, so a changed file is never read from an
+        old entry. The arrays are stored before the time and
+        channel factors are applied, so the same entry serves any
+        factors.
+
+        When the entries take more than maxSize bytes, the least
+        recently used ones are removed (every hit touches its
+        entry). The cache is a convenience: any error reading or
+        writing it is ignored and the file is parsed as usual.
+
+        ##########################################################
+    """
+
+    def __init__(self, directory: Optional[str] = None,
+                 maxSize: int = DEFAULT_MAX_SIZE, enabled: bool = True) -> None:
+        self.directory = directory or defaultCacheDirectory()
+        self.maxSize = int(maxSize)
+        self.enabled = enabled
+
+    def entryPath(self, fileName: str, layout: str) -> Optional[str]:
+        """ Path of the entry of the file, None if the file cannot be read. """
+
+        try:
+            info = os.stat(sourcePath(fileName))
+        except OSError:
+            return None
+
+        key = '\0'.join([os.path.abspath(fileName), str(info.st_size),
+                         str(info.st_mtime_ns), layout])
+
+        return os.path.join(self.directory,
+                            hashlib.sha1(key.encode('utf-8')).hexdigest()+'.npy')
+
+    def load(self, fileName: str, layout: str, numberOfColumns: int) -> Optional[np.ndarray]:
+        """ Memory-mapped first numberOfColumns columns of the file, or None. """
+
+        if not self.enabled:
+            return None
+
+        path = self.entryPath(fileName, layout)
+
+        if path is None or not os.path.isfile(path):
+            return None
+
+        try:
+            data = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            self.remove(path)
+            return None
+
+        if data.ndim != 2 or data.shape[1] < numberOfColumns:
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return data[:, :numberOfColumns]
+
+    def save(self, fileName: str, layout: str, data: np.ndarray) -> bool:
+        """ Stores the parsed columns of the file. Returns False if it failed. """
+
+        if not self.enabled:
+            return False
+
+        path = self.entryPath(fileName, layout)
+
+        if path is None or data.nbytes > self.maxSize:
+            return False
+
+        temporaryPath = f'{path}.{os.getpid()}.tmp'
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+
+            with open(temporaryPath, 'wb') as entryFile:
+                np.save(entryFile, data)
+
+            # readers never see a half written entry
+            os.replace(temporaryPath, path)
+
+        except OSError:
+            self.remove(temporaryPath)
+            return False
+
+        self.evict()
+
+        return True
+
+    def entries(self) -> List[str]:
+        """ Paths of the entries, the least recently used first. """
+
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith('.npy')]
+        except OSError:
+            return []
+
+        paths = [os.path.join(self.directory, name) for name in names]
+        times = {}
+
+        for path in paths:
+            try:
+                times[path] = os.path.getmtime(path)
+            except OSError:
+                pass
+
+        return sorted(times, key=times.get)
+
+    def size(self) -> int:
+        """ Bytes taken by the entries. """
+
+        total = 0
+
+        for path in self.entries():
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+
+        return total
+
+    def evict(self) -> None:
+        """ Removes the least recently used entries until they fit in maxSize. """
+
+        entries = self.entries()
+        sizes = []
+
+        for path in entries:
+            try:
+                sizes.append(os.path.getsize(path))
+            except OSError:
+                sizes.append(0)
+
+        total = sum(sizes)
+
+        for path, size in zip(entries, sizes):
+            if total <= self.maxSize:
+                break
+
+            if self.remove(path):
+                total -= size
+
+    def purge(self) -> int:
+        """ Removes every entry. Returns the number of bytes freed. """
+
+        freed = 0
+
+        for path in self.entries():
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+
+            if self.remove(path):
+                freed += size
+
+        return freed
+
+    @staticmethod
+    def remove(path: str) -> bool:
+        try:
+            os.remove(path)
+        except OSError:
+            return False
+
+        return True
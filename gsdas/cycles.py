@@ -0,0 +1,260 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+DIRECTIONS = ('auto', 'up', 'down')
+
+
+def smoothSignal(signal: np.ndarray, window: int) -> np.ndarray:
+    """ Centered moving average of window samples (cumulative sum, O(n)). """
+
+    signal = np.asarray(signal, dtype=float)
+
+    if window <= 1 or len(signal) < window:
+        return signal
+
+    cumsum = np.cumsum(np.insert(signal, 0, 0.0))
+    smoothed = (cumsum[window:]-cumsum[:-window])/window
+
+    # keep the length of the signal by repeating the borders
+    before = (window-1)//2
+    after = len(signal)-len(smoothed)-before
+
+    return np.concatenate([np.full(before, smoothed[0]), smoothed,
+                           np.full(after, smoothed[-1])])
+
+
+def turningPoints(times: np.ndarray, signal: np.ndarray,
+                  threshold: float, minDwell: float = 0.0) -> np.ndarray:
+    """
+        ##########################################################
+
+        Finds the alternating minima and maxima of the signal with
+        a hysteresis (zigzag) filter: a maximum is only accepted
+        when the signal falls more than threshold below it, and a
+        minimum when it rises more than threshold above it. Two
+        turning points are never closer than minDwell in time.
+
+        The local extrema are found first with NumPy, so the loop
+        only runs over them and the whole pass is linear in the
+        number of samples. The last point is the extreme of the
+        move still in progress at the end of the signal.
+
+        Returns the positions of the turning points.
+
+        ##########################################################
+    """
+
+    times = np.asarray(times, dtype=float)
+    signal = np.asarray(signal, dtype=float)
+
+    valid = np.flatnonzero(~np.isnan(signal))
+
+    if len(valid) < 3:
+        return valid
+
+    # local extrema candidates: where the slope changes its sign
+    slope = np.sign(np.diff(signal[valid]))
+
+    if not slope.any():
+        return valid[[0, -1]]
+
+    # flat steps keep the slope of the previous step
+    lastNonZero = np.where(slope != 0, np.arange(len(slope)), 0)
+    slope = slope[np.maximum.accumulate(lastNonZero)]
+    changes = np.flatnonzero(slope[1:] != slope[:-1])+1
+    candidates = valid[np.concatenate([[0], changes, [len(valid)-1]])]
+
+    values = signal[candidates].tolist()
+    candidateTimes = times[candidates].tolist()
+
+    pivots = []
+    trend = 0
+    low = high = lastPivot = 0
+
+    for i in range(1, len(values)):
+        value = values[i]
+
+        if trend == 0:
+            if value < values[low]:
+                low = i
+            if value > values[high]:
+                high = i
+
+            if value-values[low] >= threshold:
+                pivots.append(low)
+                lastPivot, extreme, trend = low, i, 1
+
+            elif values[high]-value >= threshold:
+                pivots.append(high)
+                lastPivot, extreme, trend = high, i, -1
+
+        elif trend == 1:
+            if value > values[extreme]:
+                extreme = i
+
+            elif values[extreme]-value >= threshold and \
+                    candidateTimes[extreme]-candidateTimes[lastPivot] >= minDwell:
+                pivots.append(extreme)
+                lastPivot, extreme, trend = extreme, i, -1
+
+        else:
+            if value < values[extreme]:
+                extreme = i
+
+            elif value-values[extreme] >= threshold and \
+                    candidateTimes[extreme]-candidateTimes[lastPivot] >= minDwell:
+                pivots.append(extreme)
+                lastPivot, extreme, trend = extreme, i, 1
+
+    if trend != 0:
+        pivots.append(extreme)
+
+    return candidates[pivots]
+
+
+def moveOnsets(signal: np.ndarray, pivots: np.ndarray, onset: float) -> np.ndarray:
+    """
+        ##########################################################
+
+        For each move between two turning points, the onset is the
+        last sample that is still within onset times the amplitude
+        of the move from its first turning point. It is where the
+        step really starts when the baseline drifts before it.
+
+        ##########################################################
+    """
+
+    onsets = np.empty(len(pivots)-1, dtype=int)
+
+    for k in range(len(pivots)-1):
+        first, last = pivots[k], pivots[k+1]
+        window = signal[first:last+1]
+        amplitude = abs(signal[last]-signal[first])
+        within = np.flatnonzero(np.abs(window-signal[first]) <= onset*amplitude)
+        onsets[k] = first+within[-1] if len(within) else first
+
+    return onsets
+
+
+def detectCycles(times: Sequence[float], signal: Sequence[float],
+                 threshold: float = 0.05, minDwell: float = 0.0,
+                 direction: str = 'auto', smoothing: int = 1,
+                 onset: float = 0.05, endOfRecovery: str = 'last') -> np.ndarray:
+    """
+        ##########################################################
+
+        Finds the exposure-recovery cycles of one channel from its
+        signal. It returns an array with one row per cycle:
+
+            [start of exposure, end of exposure, end of recovery]
+
+        #1. The signal is smoothed with a moving average of
+            smoothing samples;
+
+        #2. The turning points are found with a hysteresis of
+            threshold times the range of the signal, and a minimum
+            dwell time of minDwell between them (see turningPoints);
+
+        #3. Each move between turning points starts at its onset
+            (see moveOnsets);
+
+        #4. direction tells if the signal goes 'up' or 'down' with
+            the gas. With 'auto' it is the direction of the faster
+            moves, because the exposure is usually shorter than the
+            recovery;
+
+        #5. The exposure goes from the onset of a move to the onset
+            of the recovery move that follows it, and the recovery
+            until the onset of the next exposure.
+            The recovery of the last cycle ends at the last sample
+            when endOfRecovery is 'last', otherwise that cycle is
+            left out.
+
+        ##########################################################
+    """
+
+    if direction not in DIRECTIONS:
+        raise ValueError(f'Invalid direction: {direction}')
+
+    times = np.asarray(times, dtype=float)
+
+    # 1
+    signal = smoothSignal(signal, int(smoothing))
+
+    # 2
+    signalRange = np.nanmax(signal)-np.nanmin(signal)
+
+    if not signalRange > 0:
+        return np.empty((0, 3))
+
+    pivots = turningPoints(times, signal, threshold*signalRange, minDwell)
+
+    if len(pivots) < 2:
+        return np.empty((0, 3))
+
+    # 3
+    onsets = moveOnsets(signal, pivots, onset)
+    moves = np.diff(signal[pivots])
+    durations = times[pivots[1:]]-times[onsets]
+
+    # 4
+    if direction == 'auto':
+        upDurations = durations[moves > 0]
+        downDurations = durations[moves < 0]
+
+        if len(upDurations) == 0 or len(downDurations) == 0:
+            direction = 'up' if len(upDurations) else 'down'
+        else:
+            direction = 'up' if np.median(upDurations) <= np.median(downDurations) else 'down'
+
+    # 5
+    exposures = np.flatnonzero(moves > 0) if direction == 'up' else np.flatnonzero(moves < 0)
+
+    cycles = []
+
+    for n, k in enumerate(exposures):
+        if n+1 < len(exposures):
+            endRecovery = times[onsets[exposures[n+1]]]
+        elif endOfRecovery == 'last' and pivots[k+1] < len(times)-1:
+            endRecovery = times[-1]
+        else:
+            continue
+
+        # the exposure ends where the recovery move starts
+        endExposure = times[onsets[k+1]] if k+1 < len(onsets) else times[pivots[k+1]]
+
+        cycles.append([times[onsets[k]], endExposure, endRecovery])
+
+    return np.array(cycles, dtype=float).reshape(-1, 3)
+
+
+def periodicCycles(firstExposure: float, exposureTime: float, recoveryTime: float,
+                   numberOfCycles: Optional[int] = None,
+                   lastTime: Optional[float] = None) -> np.ndarray:
+    """
+        ##########################################################
+
+        Builds the cycles of a periodic schedule, e.g. 15 min of
+        exposure followed by 60 min of recovery, starting at
+        firstExposure. It gives numberOfCycles cycles, or as many
+        as fit before lastTime.
+
+        ##########################################################
+    """
+
+    period = exposureTime+recoveryTime
+
+    if exposureTime <= 0 or recoveryTime <= 0:
+        raise ValueError('Exposure and recovery times must be positive!')
+
+    if numberOfCycles is None:
+        if lastTime is None:
+            raise ValueError('Give the number of cycles or the last time!')
+
+        numberOfCycles = int(np.floor((lastTime-firstExposure)/period + 1e-9))
+
+    starts = firstExposure + period*np.arange(max(numberOfCycles, 0))
+
+    return np.column_stack([starts, starts+exposureTime, starts+period])
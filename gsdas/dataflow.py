@@ -0,0 +1,95 @@
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+
+class Dataflow:
+    """
+        ##########################################################
+
+        DATAFLOW: Memoized products of the analysis. Each stage
+        knows the function that builds it, the names of its inputs
+        (sources or other stages) and a function giving its
+        parameters, and keeps its last value with the key it was
+        built for: the versions of its inputs and its parameters.
+
+        #1. A source is data set from outside (like the parsed
+            file), with a function giving its current version;
+
+        #2. get(name) builds a stage only if its key changed since
+            its last build, which gives it a new version, so the
+            stages that use it are built again when they are asked
+            for, and only then;
+
+        #3. peek(name) gives the last value of a stage while its
+            inputs did not change, without building it, even if its
+            parameters changed since. It is used for products that
+            are too expensive to build implicitly, like the fit.
+
+        ##########################################################
+    """
+
+    def __init__(self) -> None:
+        self.sources: Dict[str, Callable[[], Hashable]] = {}
+        self.stages: Dict[str, Tuple[Callable[[], Any], Tuple[str, ...],
+                                     Callable[[], Hashable]]] = {}
+        # name: (inputs versions, parameters, value)
+        self.memo: Dict[str, Tuple[Tuple, Hashable, Any]] = {}
+        self.versions: Dict[str, int] = {}
+
+    def addSource(self, name: str, version: Callable[[], Hashable]) -> None:
+        self.sources[name] = version
+
+    def addStage(self, name: str, build: Callable[[], Any], inputs: Sequence[str] = (),
+                 parameters: Callable[[], Hashable] = tuple) -> None:
+        self.stages[name] = (build, tuple(inputs), parameters)
+
+    def version(self, name: str) -> Hashable:
+        """ Current version of a source, or of a stage (built if needed). """
+
+        if name in self.sources:
+            return self.sources[name]()
+
+        self.get(name)
+
+        return self.versions[name]
+
+    def inputVersions(self, name: str) -> Tuple:
+        return tuple(self.version(inputName) for inputName in self.stages[name][1])
+
+    def get(self, name: str) -> Any:
+        """ The value of the stage, built again only if its inputs or parameters changed. """
+
+        build, inputs, parameters = self.stages[name]
+        key = (self.inputVersions(name), parameters())
+        memo = self.memo.get(name)
+
+        if memo is not None and memo[:2] == key:
+            return memo[2]
+
+        value = build()
+
+        self.memo[name] = key + (value,)
+        self.versions[name] = self.versions.get(name, 0) + 1
+
+        return value
+
+    def peek(self, name: str) -> Optional[Any]:
+        """ The last value of the stage if its inputs did not change, else None. """
+
+        memo = self.memo.get(name)
+
+        if memo is None or memo[0] != self.inputVersions(name):
+            return None
+
+        return memo[2]
+
+    def store(self, name: str, value: Any) -> None:
+        """ Keeps value as the stage built with the current inputs and parameters. """
+
+        self.memo[name] = (self.inputVersions(name), self.stages[name][2](), value)
+        self.versions[name] = self.versions.get(name, 0) + 1
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """ Forgets the value of the stage (of every stage if None). """
+
+        for stage in ([name] if name else list(self.memo)):
+            self.memo.pop(stage, None)
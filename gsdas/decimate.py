@@ -0,0 +1,80 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+# series up to this many points per bucket are drawn as they are
+MIN_POINTS_PER_BUCKET = 2
+
+
+def minMaxDecimate(x: np.ndarray, y: np.ndarray, buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        ##########################################################
+
+        LEVEL OF DETAIL: Reduces a series to at most 2*buckets+2
+        real samples that keep its shape on screen. The samples are
+        split in buckets of equal size (about one per pixel column)
+        and only the minimum and the maximum of each bucket are
+        kept, in their original order, together with the first
+        and the last sample. Spikes are never lost, unlike taking
+        every n-th sample.
+
+        Missing values are kept where a bucket has nothing else,
+        so gaps are still drawn as gaps.
+
+        ##########################################################
+    """
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    size = len(y)
+    buckets = max(int(buckets), 1)
+
+    if size <= MIN_POINTS_PER_BUCKET*buckets:
+        return x, y
+
+    bucketSize = -(-size // buckets)
+    padding = bucketSize*buckets - size
+
+    # NaN never wins: it becomes +inf for the minimum and -inf for the maximum
+    low = np.concatenate([np.where(np.isnan(y), np.inf, y), np.full(padding, np.inf)])
+    high = np.concatenate([np.where(np.isnan(y), -np.inf, y), np.full(padding, -np.inf)])
+
+    starts = np.arange(buckets)*bucketSize
+    lowPositions = starts + low.reshape(buckets, bucketSize).argmin(axis=1)
+    highPositions = starts + high.reshape(buckets, bucketSize).argmax(axis=1)
+
+    positions = np.unique(np.concatenate([[0, size-1], lowPositions, highPositions]))
+    positions = positions[positions < size]
+
+    return x[positions], y[positions]
+
+
+def visibleSlice(x: np.ndarray, xMin: float, xMax: float) -> slice:
+    """ Samples of a sorted x inside [xMin, xMax], plus one on each side. """
+
+    start = max(np.searchsorted(x, xMin, side='left') - 1, 0)
+    stop = min(np.searchsorted(x, xMax, side='right') + 1, len(x))
+
+    return slice(start, stop)
+
+
+def decimateView(x: np.ndarray, y: np.ndarray, buckets: int,
+                 xLimits: Optional[Tuple[float, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        ##########################################################
+
+        Samples of a series (x sorted) to draw in a view of
+        xLimits (all of it if None) that is buckets pixels wide.
+        Always computed from the full resolution arrays: when the
+        view is zoomed in far enough, every real sample in it is
+        returned.
+
+        ##########################################################
+    """
+
+    if xLimits is not None:
+        view = visibleSlice(x, *sorted(xLimits))
+        x, y = x[view], y[view]
+
+    return minMaxDecimate(x, y, buckets)
@@ -0,0 +1,1472 @@
+from datetime import datetime
+from dataclasses import asdict
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .lookup import closestTime, closestTimes, getTimeIndex
+from .properties import PropertiesStore
+from .cache import DataCache
+from .dataflow import Dataflow
+from .reader import loadColumns, parseLines
+from .cycles import detectCycles, periodicCycles
+from .fitting import (INFORMATION_CRITERIA, RESAMPLING_METHODS, FitIntervals, bestModels,
+                      commonDomain, fitModels, linearFit, resampleFit)
+from .models import MODELS, getModels
+from .normalize import NORMALIZATION_MODES, normalize
+from .kinetics import KINETICS_MODELS, cycleKinetics, kineticsColumns
+from .response import RESPONSE_TYPES, CycleProperties, calcCycleProperties
+from .export import EXPORT_FORMATS, EXTENSIONS, writeConcurrently, writeFrame
+from .project import ProjectFile
+from .schedule import CycleSchedule
+from .sniff import WHITESPACE, FileFormat, listDataMembers, readTailSample, sniffFormat
+from .views import windowView
+
+
+def powerLawFunc(x, a, b):
+    return a*(x**b)
+
+
+class AnalysisEngine:
+    """
+        ##########################################################
+
+        HEADLESS ENGINE: This class holds every step of the analysis
+        process without any dependency on Qt. The main window calls
+        into it, but it can also be used from scripts and workers:
+
+            load -> window -> normalize -> cycles -> properties
+                 -> fit -> export
+
+        Each step stores its result in the same DataFrames used by
+        the interface (previewDF, visualizationDF, normalizationDF,
+        propertiesDF and fitDF). Invalid parameters raise a
+        ValueError with a message that can be shown to the user.
+
+        The DataFrames derived from the previewDF are stages of a
+        Dataflow (see setDataflow): each one is built again only
+        when its inputs or parameters changed, when it is used.
+
+        ##########################################################
+    """
+
+    separatorList = ['\t', ',', ' ', ';']
+
+    # attributes saved in a project as they are (see saveProject)
+    projectAttributes = ('fileName', 'separator', 'decimal', 'headerLines', 'timeFactor',
+                         'channelFactor', 'numberOfChannels', 'timeUnitStr', 'channelsUnitStr',
+                         'concentrationUnitStr', 'startVisualizationTime',
+                         'endVisualizationTime', 'startZero', 'normalizationMode',
+                         'normalizationPoint', 'normalizationEnd', 'firstExposureTime',
+                         'responseType', 't90Method', 'kineticsModel', 'numberOfFitPoints',
+                         'fitModelName', 'autoModels', 'modelCriterion', 'confidenceMethod',
+                         'numberOfResamples', 'confidenceLevel', 'randomSeed')
+
+    fitAttributes = ('x_fit_values', 'coef1_list', 'coef2_list', 'fitListLabel', 'fitFailures',
+                     'channelModels', 'modelScoresList', 'sensitivityList',
+                     'sensitivityRValues', 'sensitivityResultsList')
+
+    def __init__(self) -> None:
+
+        #---DATA FRAMES---#
+        self.previewDF = pd.DataFrame()
+        self.previewVersion = 0
+
+        # the propertiesDF is built from this store when it is displayed
+        self.properties = PropertiesStore()
+
+        # time and channels columns of the file, under the previewDF
+        self.previewData = None
+
+        #---VARIABLES---#
+        self.fileName = ''
+        self.separator = '\t'
+        self.decimal = '.'
+        self.headerLines = 0
+
+        # used to import the data
+        self.timeFactor = 1.0
+        self.channelFactor = 1.0
+        self.numberOfChannels = 1
+        self.timeUnitStr = 'unit'
+        self.channelsUnitStr = 'unit'
+        self.concentrationUnitStr = 'ppm'
+
+        # parsed files are memory-mapped from here when opened again
+        self.cache = DataCache()
+
+        # used to visualize and normalize the data
+        self.visualizationChannels = []
+        self.startVisualizationTime = None
+        self.endVisualizationTime = None
+        self.startZero = False
+        # None, or one of NORMALIZATION_MODES (see setNormalizationDF)
+        self.normalizationMode = None
+        self.normalizationPoint = None
+        self.normalizationEnd = None
+
+        # used to calculate properties
+        self.firstExposureTime = None
+        self.startExposureTime = None
+        self.endExposureTime = None
+        self.endRecoveryTime = None
+        self.propertiesList = []
+        self.cycleProperties = None
+        self.propertiesTableColNames = []
+        self.settingColumnOrderList = []
+        self.propertiesColumnOrder = []
+
+        # used in the fitting process
+        self.numberOfFitPoints = 100
+        self.x_fit_values = []
+        self.coef1_list = []
+        self.coef2_list = []
+        self.fitListLabel = []
+        self.fitParameters = []
+        # channel: reason, for the channels that could not be fitted
+        self.fitFailures = {}
+
+        # a model of gsdas.models.MODELS, or 'auto' for the model of
+        # autoModels with the lowest modelCriterion ('aic' or 'bic')
+        self.fitModelName = 'power'
+        self.autoModels = list(MODELS)
+        self.modelCriterion = 'aic'
+        self.modelFits = {}
+        self.channelModels = []
+        self.modelScoresList = []
+
+        # confidence intervals from resampled cycles: None, 'bootstrap'
+        # or 'jackknife', see gsdas.fitting.resampleFit
+        self.confidenceMethod = None
+        self.numberOfResamples = 1000
+        self.confidenceLevel = 0.95
+        self.randomSeed = 0
+        self.resampleProcesses = None
+        self.fitIntervals = None
+
+        self.sensitivityList = []
+        self.sensitivityRValues = []
+        self.sensitivityResultsList = []
+
+        # 'closest' or 'crossing', see gsdas.response.t90Positions
+        self.t90Method = 'closest'
+
+        # None, 'single' or 'double' exponential fits of the transients
+        # of each cycle, see gsdas.kinetics and setKineticsModel
+        self.kineticsModel = None
+        self.kineticsProcesses = None
+        self.kineticsList = []
+
+        # valve schedule of the bench, kept when a new file is opened
+        self.schedule = None
+
+        # project of the session, saved incrementally (see saveProject)
+        self.project = None
+
+        #---DICTIONARIES---#
+        self.responseType = {'dR/R0': True,
+                             'dR': False,
+                             'Rgas/Rair': False,
+                             'sigconc': False,
+                             'sensitivity': False}
+
+        self.setDataflow()
+
+    def setDataflow(self) -> None:
+        """
+            ##########################################################
+
+            Builds the Dataflow of the derived DataFrames, with the
+            inputs and parameters of each one:
+
+                previewDF -> visualizationDF -> normalizationDF
+                                             -> respDF, respTimeDF,
+                                                recTimeDF, fitDF
+                properties ------------------^
+
+            The previewDF and the properties of the cycles are the
+            sources. visualizationDF, normalizationDF and the
+            properties by concentration are built when they are used
+            after a change. The fit is only run by fitRespData (again
+            only if something changed), and fitDF is empty once the
+            cycles or the channels it was fitted to change.
+
+            ##########################################################
+        """
+
+        self.frames = Dataflow()
+
+        self.frames.addSource('previewDF', lambda: self.previewVersion)
+        self.frames.addSource('properties', lambda: self.properties.version)
+
+        self.frames.addStage('visualizationDF', self.buildVisualizationDF, ['previewDF'],
+                             lambda: (tuple(self.visualizationChannels),
+                                      self.startVisualizationTime, self.endVisualizationTime,
+                                      self.startZero))
+
+        self.frames.addStage('normalizationDF', self.buildNormalizationDF, ['visualizationDF'],
+                             lambda: (self.normalizationMode, self.normalizationPoint,
+                                      self.normalizationEnd))
+
+        for name in ('resp', 'respTime', 'recTime'):
+            self.frames.addStage(f'{name}DF', partial(self.propertyByConcentration, name),
+                                 ['visualizationDF', 'properties'])
+
+        self.frames.addStage('fitDF', self.calcFit, ['visualizationDF', 'properties'],
+                             lambda: (self.fitModelName, tuple(self.autoModels),
+                                      self.modelCriterion, self.numberOfFitPoints,
+                                      self.confidenceMethod, self.numberOfResamples,
+                                      self.confidenceLevel, self.randomSeed,
+                                      tuple(self.responseType.items()),
+                                      self.channelsUnitStr, self.concentrationUnitStr))
+
+    def reset(self) -> None:
+        """ Empties every DataFrame before a new file is opened. """
+
+        self.previewDF = pd.DataFrame()
+        self.previewData = None
+        self.previewVersion += 1
+        self.visualizationChannels = []
+        self.normalizationMode = None
+        self.normalizationPoint = None
+        self.normalizationEnd = None
+        self.properties.clear()
+        self.frames.invalidate()
+        self.project = None
+
+    @property
+    def visualizationDF(self) -> pd.DataFrame:
+        return self.frames.get('visualizationDF')
+
+    @property
+    def normalizationDF(self) -> pd.DataFrame:
+        return self.frames.get('normalizationDF')
+
+    @property
+    def propertiesDF(self) -> pd.DataFrame:
+        """ The properties of the cycles as a DataFrame (see PropertiesStore). """
+
+        return self.properties.frame()
+
+    @property
+    def respDF(self) -> pd.DataFrame:
+        return self.frames.get('respDF')
+
+    @property
+    def respTimeDF(self) -> pd.DataFrame:
+        return self.frames.get('respTimeDF')
+
+    @property
+    def recTimeDF(self) -> pd.DataFrame:
+        return self.frames.get('recTimeDF')
+
+    @property
+    def fitDF(self) -> pd.DataFrame:
+        """ The last fit, while the cycles and channels it was fitted to are the same. """
+
+        fitDF = self.frames.peek('fitDF')
+
+        return pd.DataFrame() if fitDF is None else fitDF
+
+    @property
+    def channels(self) -> List[str]:
+        """ Names of the channels available in the previewDF. """
+
+        return list(self.previewDF.columns)
+
+    def sniffFile(self, fileName: str, separator: Optional[str] = None) -> FileFormat:
+        """ Layout of the file from its first few KB (see gsdas.sniff.sniffFormat). """
+
+        return sniffFormat(fileName, separator)
+
+    @staticmethod
+    def listDataMembers(archive: str) -> List[str]:
+        """ Data files inside a .zip/.gz/.xz archive, as 'archive::member' names. """
+
+        return listDataMembers(archive)
+
+    def setFileFormat(self, fileName: str, separator: Optional[str] = None,
+                      numberOfChannels: int = 1, timeFactor: float = 1,
+                      channelFactor: float = 1) -> FileFormat:
+        """
+            ##########################################################
+
+            Sets the file and how it will be read, without reading
+            more than its first few KB:
+
+            #1. Sniffs the file to find its header lines, decimal
+                mark, number of columns and, if it is None, the
+                separator. If the file does not have at least 2
+                columns, the separator is probably wrong and a 
+                ValueError is raised;
+
+            #2. Only the time column and the channels ch1, ch2, ch3…
+                up to numberOfChannels will be read. If the file has
+                fewer columns, it takes all of them; numberOfChannels
+                is then updated so the caller can warn the user.
+
+            ##########################################################
+        """
+
+        # 1
+        fileFormat = self.sniffFile(fileName, separator)
+
+        self.fileName = fileName
+        self.separator = fileFormat.separator
+        self.decimal = fileFormat.decimal
+        self.headerLines = fileFormat.headerLines
+        self.timeFactor = float(timeFactor)
+        self.channelFactor = float(channelFactor)
+
+        # 2
+        self.numberOfChannels = min(numberOfChannels, fileFormat.numberOfColumns-1)
+
+        return fileFormat
+
+    def sampleFrame(self, lines: Sequence[str]) -> pd.DataFrame:
+        """ A few data lines of the file laid out like the previewDF. """
+
+        data = parseLines(list(lines), self.separator, self.numberOfChannels+1,
+                          timeFactor=self.timeFactor,
+                          channelFactor=self.channelFactor,
+                          decimal=self.decimal)
+
+        return pd.DataFrame(data[:, 1:], index=pd.Index(data[:, 0], name='Time'),
+                            columns=[f'ch{i}' for i in range(1, self.numberOfChannels+1)])
+
+    def previewSample(self, fileName: str, separator: Optional[str] = None,
+                      numberOfChannels: int = 1, timeFactor: float = 1,
+                      channelFactor: float = 1,
+                      rows: int = 5) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+            ##########################################################
+
+            Quick look at the file before it is loaded: sets the file
+            format (see setFileFormat) and parses only the first and
+            the last rows of the file, found in its first and last
+            few KB. Returns the head and tail DataFrames; the tail is
+            empty when the whole file is in the head or the file is
+            compressed. The previewDF is not touched: loadData reads
+            the whole file later.
+
+            ##########################################################
+        """
+
+        fileFormat = self.setFileFormat(fileName, separator, numberOfChannels,
+                                        timeFactor, channelFactor)
+
+        headLines = [line for line in fileFormat.sample if line.strip()]
+        tailLines = readTailSample(fileName)
+
+        if len(headLines) <= rows or not tailLines or tailLines[-rows:] == headLines[-rows:]:
+            tailLines = []
+
+        return self.sampleFrame(headLines[:rows]), self.sampleFrame(tailLines[-rows:])
+
+    def loadData(self, fileName: str, separator: Optional[str] = None,
+                 numberOfChannels: int = 1, timeFactor: float = 1,
+                 channelFactor: float = 1,
+                 progress: Optional[Callable[[float], None]] = None) -> pd.DataFrame:
+        """
+            ##########################################################
+
+            Reads the data file and builds the previewDF. fileName
+            can also be a member of an archive ('data.zip::data.dat')
+            or a .gz/.xz/.bz2 file, read without extracting it:
+
+            #1. Sniffs the first few KB of the file to find its header
+                lines, decimal mark, number of columns and, if it is
+                None, the separator (see setFileFormat);
+
+            #2. Only the time column and the channels ch1, ch2, ch3…
+                up to numberOfChannels are read. If the file has fewer
+                columns, it takes all of them; numberOfChannels is then
+                updated so the caller can warn the user;
+
+            #3. The file is memory-mapped from the cache if it was
+                parsed before. Otherwise it is parsed in chunks that 
+                are divided by the time and channel factors in place
+                (see gsdas.reader.loadColumns), and progress receives
+                the fraction of the file read. The previewDF is built
+                on top of that array (previewData) without copying it.
+
+            ##########################################################
+        """
+
+        # 1, 2
+        self.setFileFormat(fileName, separator, numberOfChannels, timeFactor, channelFactor)
+
+        # 3
+        # here it assumes that the first column is the time data
+        data = loadColumns(fileName, self.separator, self.numberOfChannels+1,
+                           timeFactor=self.timeFactor,
+                           channelFactor=self.channelFactor,
+                           headerLines=self.headerLines,
+                           decimal=self.decimal,
+                           progress=progress, cache=self.cache)
+
+        return self.setPreviewData(data)
+
+    def setPreviewData(self, data: np.ndarray) -> pd.DataFrame:
+        """ Builds the previewDF on top of the time and channels columns of data, without copying them. """
+
+        self.previewData = data
+        self.previewVersion += 1
+        self.previewDF = pd.DataFrame(data[:, 1:],
+                                      index=pd.Index(data[:, 0], name='Time', copy=False),
+                                      columns=[f'ch{i}' for i in range(1, data.shape[1])],
+                                      copy=False)
+
+        return self.previewDF
+
+    def setVisualizationDF(self, channels: Sequence[str],
+                           startTime: Optional[float] = None,
+                           endTime: Optional[float] = None,
+                           startZero: bool = False) -> pd.DataFrame:
+        """
+            ##########################################################
+
+            Cuts the previewDF between the closest values of startTime
+            and endTime (first and last values if None), optionally sets
+            the initial time to zero and keeps only the chosen channels.
+
+            It also builds the columns of the properties (see
+            setPropertiesColumns). The same parameters as the last
+            time do not cut the previewDF again (see setDataflow);
+            the normalization times are moved to the closest times
+            of the new visualizationDF.
+
+            ##########################################################
+        """
+
+        if len(channels) == 0:
+            raise ValueError('No data Select')
+
+        if startTime is None:
+            self.startVisualizationTime = self.previewDF.first_valid_index()
+        else:
+            self.startVisualizationTime = closestTime(
+                self.previewDF.index, float(startTime))
+
+        if endTime is None:
+            self.endVisualizationTime = self.previewDF.last_valid_index()
+        else:
+            self.endVisualizationTime = closestTime(
+                self.previewDF.index, float(endTime))
+
+        self.visualizationChannels = list(channels)
+        self.startZero = bool(startZero)
+
+        visualizationDF = self.visualizationDF
+
+        if not visualizationDF.empty:
+            if self.normalizationPoint is not None:
+                self.normalizationPoint = closestTime(visualizationDF.index,
+                                                      float(self.normalizationPoint))
+
+            if self.normalizationEnd is not None:
+                self.normalizationEnd = closestTime(visualizationDF.index,
+                                                    float(self.normalizationEnd))
+
+        self.setPropertiesColumns()
+
+        return visualizationDF
+
+    def buildVisualizationDF(self) -> pd.DataFrame:
+        """
+            ##########################################################
+
+            The previewDF cut by the parameters of setVisualizationDF,
+            as a view of the previewData (see gsdas.views.windowView):
+            the rows are the same as previewDF.loc[start:end] and the
+            channels are picked without copying them.
+
+            With startZero the times are shifted into a new column
+            when the window is built, not when they are read: every
+            later step (cycles, normalization times, responses,
+            plots, exports) works in the times of this index. It is
+            the only array allocated, once per window (see
+            setDataflow).
+
+            ##########################################################
+        """
+
+        if not self.visualizationChannels or self.previewData is None:
+            return pd.DataFrame()
+
+        columns = self.previewDF.columns.get_indexer(self.visualizationChannels)
+
+        if (columns < 0).any():
+            raise ValueError('Unknown channels: ' + ', '.join(
+                channel for channel, column in zip(self.visualizationChannels, columns)
+                if column < 0))
+
+        rows = self.previewDF.index.slice_indexer(self.startVisualizationTime,
+                                                  self.endVisualizationTime)
+        times = self.previewData[rows, 0]
+
+        if self.startZero:
+            times = times - self.startVisualizationTime
+
+        # the channels are the columns after the time in the previewData
+        return windowView(self.previewData, rows, columns+1, self.visualizationChannels, times)
+
+    def setPropertiesColumns(self) -> None:
+        """
+            ##########################################################
+
+            Builds the propertiesTableColNames (order of the
+            propertiesList) and the settingColumnOrderList (order of
+            the properties table) of the channels of the
+            visualizationDF, followed by the kinetics columns if a
+            kineticsModel is set (see gsdas.kinetics). The cycles are
+            cleared if the columns change.
+
+            ##########################################################
+        """
+
+        columns = list(self.visualizationDF.columns)
+
+        self.propertiesTableColNames = ['concentration']
+
+        for column in columns:
+            self.propertiesTableColNames.append(f'{column} resp')
+            self.propertiesTableColNames.append(f'{column} respTime')
+            self.propertiesTableColNames.append(f'{column} recTime')
+
+        self.settingColumnOrderList = ['concentration']
+        self.settingColumnOrderList += [f'{column} resp' for column in columns]
+        self.settingColumnOrderList += [f'{column} respTime' for column in columns]
+        self.settingColumnOrderList += [f'{column} recTime' for column in columns]
+
+        # the rows of the propertiesList are stored in the order of the table
+        self.propertiesColumnOrder = [self.propertiesTableColNames.index(column)
+                                      for column in self.settingColumnOrderList]
+
+        if self.kineticsModel:
+            self.settingColumnOrderList += kineticsColumns(columns, self.kineticsModel)
+
+        if self.properties.columns != self.settingColumnOrderList:
+            self.properties.clear(self.settingColumnOrderList)
+
+    def setKineticsModel(self, model: Optional[str]) -> None:
+        """ Sets the kinetics model (None, 'single' or 'double'), clearing the cycles if it changes. """
+
+        if model and model not in KINETICS_MODELS:
+            raise ValueError(f'Invalid kinetics model: {model}')
+
+        self.kineticsModel = model or None
+        self.kineticsList = []
+
+        if not self.visualizationDF.empty:
+            self.setPropertiesColumns()
+
+    def setNormalizationDF(self, normTime: Optional[float] = None, mode: str = 'point',
+                           endTime: Optional[float] = None) -> pd.DataFrame:
+        """
+            ##########################################################
+
+            Normalizes every channel of the visualizationDF at once
+            (see gsdas.normalize.normalize), in one of the
+            NORMALIZATION_MODES:
+
+            point:    divides each channel by its own value at the
+                      time closest to normTime (the
+                      normalizationPoint);
+
+            baseline: divides by the mean of each channel between
+                      normTime and endTime (the normalizationPoint
+                      and normalizationEnd);
+
+            minmax:   scales each channel from 0 to 1;
+
+            zscore:   subtracts the mean of each channel and divides
+                      by its standard deviation;
+
+            r0:       divides by the R0 of the first cycle, the value
+                      at the start of its exposure.
+
+            ##########################################################
+        """
+
+        if mode not in NORMALIZATION_MODES:
+            raise ValueError(f'Invalid normalization mode: {mode}')
+
+        index = self.visualizationDF.index
+        point = end = None
+
+        if mode in ('point', 'baseline'):
+            if normTime is None:
+                raise ValueError('Choose the normalization time!')
+
+            point = closestTime(index, float(normTime))
+
+        if mode == 'baseline':
+            if endTime is None:
+                raise ValueError('Choose the end of the baseline!')
+
+            end = closestTime(index, float(endTime))
+
+            if end <= point:
+                raise ValueError('The end of the baseline must come after its start!')
+
+        elif mode == 'r0':
+            if len(self.properties) == 0 or self.firstExposureTime is None:
+                raise ValueError('Calculate the first cycle to normalize by its R0!')
+
+            point = closestTime(index, float(self.firstExposureTime))
+
+        self.normalizationMode = mode
+        self.normalizationPoint = point
+        self.normalizationEnd = end
+
+        return self.normalizationDF
+
+    def buildNormalizationDF(self) -> pd.DataFrame:
+        """ The visualizationDF normalized by the parameters of setNormalizationDF, in one array. """
+
+        visualizationDF = self.visualizationDF
+
+        if self.normalizationMode is None or visualizationDF.empty:
+            return pd.DataFrame()
+
+        index = visualizationDF.index
+        values = visualizationDF.to_numpy(dtype=float)
+        row = rows = None
+
+        if self.normalizationPoint is not None:
+            row = getTimeIndex(index).nearestPosition(self.normalizationPoint)
+
+        if self.normalizationEnd is not None:
+            rows = index.slice_indexer(self.normalizationPoint, self.normalizationEnd)
+
+        # a window of many blocks was already copied by to_numpy
+        inPlace = values.flags.writeable and not np.may_share_memory(values, self.previewData)
+
+        normalized = normalize(values, self.normalizationMode, row, rows,
+                               out=values if inPlace else None)
+
+        return pd.DataFrame(normalized, index=index, copy=False,
+                            columns=[f'ch{position+1} norm'
+                                     for position in range(len(visualizationDF.columns))])
+
+    def normalizationStr(self) -> str:
+        """ Description of the normalization, for the header of the exported data. """
+
+        if self.normalizationMode == 'baseline':
+            return (f'normalization: baseline mean from {self.normalizationPoint} '
+                    f'to {self.normalizationEnd} {self.timeUnitStr}')
+
+        elif self.normalizationMode == 'minmax':
+            return 'normalization: min-max'
+
+        elif self.normalizationMode == 'zscore':
+            return 'normalization: z-score'
+
+        elif self.normalizationMode == 'r0':
+            return f'normalization: R0 of the first cycle, at {self.normalizationPoint} {self.timeUnitStr}'
+
+        return f'normalization point: {self.normalizationPoint} {self.timeUnitStr}'
+
+    def selectedResponseType(self) -> str:
+        """ The response type chosen in the responseType dictionary. """
+
+        for responseType in RESPONSE_TYPES:
+            if self.responseType[responseType]:
+                return responseType
+
+        raise ValueError('No response type selected!')
+
+    def calcResponse(self, concentration: float, startExposure: float,
+                     endExposure: float, endRecovery: float) -> List[float]:
+        """
+            ##########################################################
+
+            Calculates the response, the response time and the recovery
+            time of one exposure-recovery cycle for all channels in the
+            visualizationDF.
+
+            #1. Snaps the three times to the visualizationDF in one
+                binary search and finds the rows of the exposure and
+                of the recovery;
+
+            #2. Calculates the properties of every channel at once
+                with calcCycleProperties (see gsdas.response), using
+                the t90Method criterion for the 90% times;
+
+            #3. Picks the response according to the responseType
+                (see propertiesRow);
+
+            #4. If a kineticsModel is set, fits it to the response and
+                recovery transients of every channel (see
+                gsdas.kinetics.cycleKinetics) into the kineticsList.
+
+            The result is the propertiesList: the concentration followed
+            by response, response time and recovery time of each channel.
+
+            ##########################################################
+        """
+
+        # 1
+        self.startExposureTime, self.endExposureTime, self.endRecoveryTime = closestTimes(
+            self.visualizationDF.index, [startExposure, endExposure, endRecovery])
+
+        # 2
+        self.cycleProperties = self.cyclePropertiesAt(
+            self.startExposureTime, self.endExposureTime, self.endRecoveryTime)
+
+        # 3
+        self.propertiesList = self.propertiesRow(concentration, self.cycleProperties)
+
+        # 4
+        self.kineticsList = []
+
+        if self.kineticsModel:
+            self.kineticsList = cycleKinetics(
+                *self.visualizationArrays(),
+                [self.cycleSlices(self.startExposureTime, self.endExposureTime, self.endRecoveryTime)],
+                self.kineticsModel, processes=1)[0].tolist()
+
+        return self.propertiesList
+
+    def visualizationArrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """ Times and (rows x channels) values of the visualizationDF as float arrays. """
+
+        return (self.visualizationDF.index.to_numpy(dtype=float),
+                self.visualizationDF.to_numpy(dtype=float))
+
+    def propertyByConcentration(self, name: str) -> pd.DataFrame:
+        """ A property ('resp', 'respTime' or 'recTime') of each channel, indexed by the concentration. """
+
+        if len(self.properties) == 0:
+            return pd.DataFrame()
+
+        columns = [f'{column} {name}' for column in self.visualizationDF.columns]
+        values = self.properties.values[:, [self.properties.columns.index(column)
+                                            for column in columns]]
+
+        return pd.DataFrame(values, columns=columns,
+                            index=pd.Index(self.properties.column('concentration').copy(),
+                                           name='concentration'))
+
+    def cyclePropertiesAt(self, startExposureTime: float, endExposureTime: float,
+                          endRecoveryTime: float,
+                          arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> CycleProperties:
+        """ Properties of the cycle between three times of the visualizationDF. """
+
+        times, values = arrays or self.visualizationArrays()
+
+        return calcCycleProperties(times, values,
+                                   *self.cycleSlices(startExposureTime, endExposureTime,
+                                                     endRecoveryTime),
+                                   self.t90Method)
+
+    def cycleSlices(self, startExposureTime: float, endExposureTime: float,
+                    endRecoveryTime: float) -> Tuple[slice, slice]:
+        """ Rows of the exposure and of the recovery of a cycle, both including their last row. """
+
+        index = self.visualizationDF.index
+
+        return (index.slice_indexer(startExposureTime, endExposureTime),
+                index.slice_indexer(endExposureTime, endRecoveryTime))
+
+    def propertiesRow(self, concentration: float, cycleProperties: CycleProperties) -> List[float]:
+        """ The concentration followed by resp, respTime and recTime of each channel. """
+
+        concentration = float(concentration)
+        response = cycleProperties.responses[self.selectedResponseType()]
+
+        if self.responseType['sigconc']:
+            response = response/concentration
+
+        properties = np.column_stack([response,
+                                      cycleProperties.responseTime,
+                                      cycleProperties.recoveryTime])
+
+        return [concentration] + properties.ravel().tolist()
+
+    def detectCycles(self, channel: Optional[str] = None, **options) -> np.ndarray:
+        """
+            ##########################################################
+
+            Finds the exposure-recovery cycles in the signal of one
+            channel of the visualizationDF (the first one if None).
+            The options are those of gsdas.cycles.detectCycles
+            (threshold, minDwell, direction, smoothing, onset).
+
+            Returns one row per cycle with the start of exposure,
+            end of exposure and end of recovery times.
+
+            ##########################################################
+        """
+
+        if self.visualizationDF.empty:
+            raise ValueError('Empty Data Frame!')
+
+        channel = channel or self.visualizationDF.columns[0]
+
+        return detectCycles(self.visualizationDF.index.to_numpy(dtype=float),
+                            self.visualizationDF[channel].to_numpy(dtype=float),
+                            **options)
+
+    def periodicCycles(self, firstExposure: float, exposureTime: float,
+                       recoveryTime: float, numberOfCycles: Optional[int] = None) -> np.ndarray:
+        """ Cycles of a periodic schedule, until the end of the visualizationDF. """
+
+        return periodicCycles(firstExposure, exposureTime, recoveryTime, numberOfCycles,
+                              lastTime=self.visualizationDF.last_valid_index())
+
+    def calcCycles(self, concentrations: Sequence[float],
+                   cycleTimes: Sequence[Sequence[float]],
+                   progress: Optional[Callable[[float], None]] = None) -> None:
+        """
+            ##########################################################
+
+            Calculates the properties of many cycles in one call and
+            appends all of them to the propertiesDF.
+
+            cycleTimes has one row per cycle with the start of
+            exposure, end of exposure and end of recovery times, and
+            concentrations one value per cycle (or a single value
+            for all of them). Every time is snapped to the
+            visualizationDF in one binary search, and its values are
+            turned into one array for all cycles. progress, if given,
+            receives the fraction of the cycles calculated; the rows
+            are only appended after the last one. With a
+            kineticsModel, the transients of all the cycles are then
+            fitted in one job on a process pool (see
+            gsdas.kinetics.cycleKinetics).
+
+            ##########################################################
+        """
+
+        cycleTimes = np.asarray(cycleTimes, dtype=float).reshape(-1, 3)
+        concentrations = np.asarray(concentrations, dtype=float).ravel()
+
+        if len(concentrations) == 1:
+            concentrations = np.repeat(concentrations, len(cycleTimes))
+
+        if len(concentrations) != len(cycleTimes):
+            raise ValueError(
+                f'{len(cycleTimes)} cycles need {len(cycleTimes)} concentration values!')
+
+        if len(cycleTimes) == 0:
+            return
+
+        snappedTimes = closestTimes(self.visualizationDF.index,
+                                    cycleTimes.ravel()).reshape(-1, 3)
+
+        arrays = self.visualizationArrays()
+        rows = []
+
+        for concentration, times in zip(concentrations, snappedTimes):
+            rows.append(self.propertiesRow(concentration, self.cyclePropertiesAt(*times, arrays)))
+
+            if progress is not None:
+                progress(len(rows)/len(snappedTimes))
+
+        kinetics = None
+
+        if self.kineticsModel:
+            kinetics = cycleKinetics(*arrays, [self.cycleSlices(*times) for times in snappedTimes],
+                                     self.kineticsModel, self.kineticsProcesses)
+
+        if len(self.properties) == 0:
+            self.firstExposureTime = snappedTimes[0][0]
+
+        self.appendRows(rows, kinetics)
+
+    def loadSchedule(self, path: str) -> CycleSchedule:
+        """ Reads a CSV/JSON valve schedule and keeps it for the next files. """
+
+        self.schedule = CycleSchedule.fromFile(path)
+
+        return self.schedule
+
+    def scheduleFits(self) -> bool:
+        """ True if the schedule lies inside the time of the visualizationDF. """
+
+        if self.schedule is None or self.visualizationDF.empty:
+            return False
+
+        return self.schedule.fitsIn(self.visualizationDF.first_valid_index(),
+                                    self.visualizationDF.last_valid_index())
+
+    def applySchedule(self, progress: Optional[Callable[[float], None]] = None) -> None:
+        """
+            ##########################################################
+
+            Calculates the properties of every cycle of the schedule
+            in one calcCycles call, replacing the cycles already in
+            the propertiesDF. The last recovery ends at the end of
+            the visualizationDF unless the schedule gives it.
+
+            ##########################################################
+        """
+
+        if self.schedule is None:
+            raise ValueError('No schedule loaded!')
+
+        if self.visualizationDF.empty:
+            raise ValueError('Empty Data Frame!')
+
+        if not self.scheduleFits():
+            raise ValueError('The schedule does not fit in the visualization time!')
+
+        cycleTimes = self.schedule.cycleTimes(self.visualizationDF.last_valid_index())
+
+        self.properties.clear()
+        self.calcCycles(self.schedule.concentrations, cycleTimes, progress=progress)
+
+    def hasNegativeTimes(self) -> bool:
+        """ True if any resp/rec time in the propertiesList is negative. """
+
+        return any(value < 0 for value in self.propertiesList[2::3]+self.propertiesList[3::3])
+
+    def appendResponseToDF(self) -> None:
+        """ Appends the propertiesList as a new cycle of the propertiesDF. """
+
+        if len(self.properties) == 0:
+            self.firstExposureTime = self.startExposureTime
+
+        self.appendRows([self.propertiesList], [self.kineticsList] if self.kineticsList else None)
+
+    def appendRows(self, rows: Sequence[Sequence[float]],
+                   kinetics: Optional[Sequence[Sequence[float]]] = None) -> None:
+        """
+            ##########################################################
+
+            Appends rows built like the propertiesList as new cycles
+            of the properties store, with the columns in the order of
+            the table: response first, response time second and
+            recovery time third. With a kineticsModel, the kinetics
+            rows (see gsdas.kinetics.cycleKinetics) follow them, NaN
+            if they are not given.
+
+            ##########################################################
+        """
+
+        rows = np.asarray(rows, dtype=float).reshape(-1, len(self.propertiesTableColNames))
+        rows = rows[:, self.propertiesColumnOrder]
+
+        if self.kineticsModel:
+            numberOfColumns = len(self.settingColumnOrderList) - rows.shape[1]
+
+            if kinetics is None:
+                kinetics = np.full((len(rows), numberOfColumns), np.nan)
+
+            kinetics = np.asarray(kinetics, dtype=float).reshape(len(rows), numberOfColumns)
+            rows = np.hstack([rows, kinetics])
+
+        self.properties.extend(rows)
+
+    def clearLastResponse(self) -> None:
+        """ Removes the last cycle of the propertiesDF. """
+
+        self.properties.popLast()
+
+    def clearAllResponse(self) -> None:
+        """ Removes all cycles of the propertiesDF. """
+
+        if len(self.properties) == 0:
+            raise ValueError('The DF is empty!')
+
+        self.properties.clear()
+
+    def sensitivityUnit(self) -> str:
+        """ Unit of the sensitivity according to the responseType. """
+
+        if self.responseType['dR']:
+            return f'{self.channelsUnitStr}/{self.concentrationUnitStr}'
+
+        elif self.responseType['Rgas/Rair']:
+            return f'/{self.concentrationUnitStr}'
+
+        return f'%/{self.concentrationUnitStr}'
+
+    def fitRespData(self) -> pd.DataFrame:
+        """ The fit of the response data (see calcFit), run again only if the cycles, channels or fit settings changed. """
+
+        return self.frames.get('fitDF')
+
+    def calcFit(self) -> pd.DataFrame:
+        """
+            ##########################################################
+
+            Fits the response data of all channels to a calibration
+            model of gsdas.models (the power law of powerLawFunc by
+            default), each model in one vectorized call over the
+            channels (see gsdas.fitting.fitModel) seeded from its
+            closed-form or linearized guess and fitted with its
+            analytic Jacobian.
+
+            #1. The x_fit_values go from zero to the maximum
+                concentration in numberOfFitPoints steps;
+
+            #2. fitModelName is the model of all the channels, or
+                'auto' to fit every model of autoModels and keep for
+                each channel the one with the lowest modelCriterion
+                ('aic' or 'bic'). The models are fitted (and
+                resampled) on the concentrations that all of them are
+                defined at, so their criteria compare the same points
+                (see gsdas.fitting.fitModels). The fits are kept in
+                modelFits and the model of each channel in
+                channelModels;
+
+            #3. If confidenceMethod is set, the cycles are resampled
+                (bootstrap or jackknife) and refitted on a process pool
+                (see gsdas.fitting.resampleFit) for the confidence
+                intervals of the parameters and the sensitivity,
+                appended to their strings as [lower, upper];
+
+            #4. The parameters of each channel are stored in
+                fitParameters (the first two also in coef1_list and
+                coef2_list), and the legend strings in fitListLabel.
+                A channel that cannot be fitted does not stop the
+                others: its parameters and fit curve are NaN, its
+                legend says why and it is listed in fitFailures
+                (channel: reason);
+
+            #5. If sensitivity is set, a linear regression of all the
+                channels at once gives the slope as sensitivity and
+                the R-squared value.
+
+            The settings are read once, before the fit starts: the
+            fit runs on a worker thread, and the resampling can take
+            a while.
+
+            ##########################################################
+        """
+
+        modelName = self.fitModelName
+        criterion = self.modelCriterion
+        autoModels = list(self.autoModels)
+        numberOfFitPoints = self.numberOfFitPoints
+        confidenceMethod = self.confidenceMethod
+        numberOfResamples = self.numberOfResamples
+        randomSeed = self.randomSeed
+        confidenceLevel = self.confidenceLevel
+        resampleProcesses = self.resampleProcesses
+        sensitivity = self.responseType['sensitivity']
+
+        if len(self.properties) < 2:
+            raise ValueError('At least two cycles are needed for the fit!')
+
+        if criterion not in INFORMATION_CRITERIA:
+            raise ValueError(f'Invalid information criterion: {criterion}')
+
+        columns = list(self.visualizationDF.columns)
+        concentrations = self.properties.column('concentration')
+        responses = self.properties.values[:, [self.properties.columns.index(f'{column} resp')
+                                               for column in columns]]
+
+        # 1
+        step = max(concentrations)/numberOfFitPoints
+        self.x_fit_values = [i*step for i in range(numberOfFitPoints)]
+
+        # 2
+        models = getModels(autoModels if modelName == 'auto' else [modelName])
+        fitResponses = np.where(commonDomain(models, concentrations)[:, np.newaxis],
+                                responses, np.nan)
+
+        if modelName == 'auto':
+            self.modelFits = fitModels(models, concentrations, fitResponses)
+            self.channelModels = bestModels(self.modelFits, criterion)
+        else:
+            self.modelFits = fitModels(models, concentrations, fitResponses)
+            self.channelModels = [modelName if success else None
+                                  for success in self.modelFits[modelName].success]
+
+        usedModels = {name: [i for i, model in enumerate(self.channelModels) if model == name]
+                      for name in self.modelFits if name in self.channelModels}
+
+        # 3
+        self.fitIntervals = None
+
+        if confidenceMethod:
+            if confidenceMethod not in RESAMPLING_METHODS:
+                raise ValueError(f'Invalid resampling method: {confidenceMethod}')
+
+            parameterBounds = [None]*len(columns)
+            slopeBounds = np.full((len(columns), 2), np.nan)
+
+            for name, channels in usedModels.items():
+                intervals = resampleFit(MODELS[name], concentrations, fitResponses[:, channels],
+                                        confidenceMethod, numberOfResamples,
+                                        randomSeed, confidenceLevel, resampleProcesses)
+
+                for i, channel in enumerate(channels):
+                    parameterBounds[channel] = intervals.parameters[i]
+
+                slopeBounds[channels] = intervals.slope
+
+            if usedModels:
+                self.fitIntervals = intervals._replace(parameters=parameterBounds,
+                                                       slope=slopeBounds)
+
+        # 4
+        self.fitParameters = []
+        self.fitListLabel = []
+        self.fitFailures = {}
+        self.modelScoresList = []
+
+        # placeholder of a failed channel: the parameters of the requested
+        # model, or of the largest one of 'auto'
+        numberOfParameters = max(len(model.parameters) for model in models)
+
+        fitX = np.asarray(self.x_fit_values)[:, np.newaxis]
+        fitValues = np.full((len(fitX), len(columns)), np.nan)
+
+        for name, channels in usedModels.items():
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                fitValues[:, channels] = MODELS[name].evaluate(
+                    fitX, self.modelFits[name].parameters[:, channels])
+
+        for i, (column, name) in enumerate(zip(columns, self.channelModels)):
+            if name is None:
+                message = ('no model could be fitted' if modelName == 'auto'
+                           else self.modelFits[modelName].messages[i])
+
+                self.fitParameters.append(np.full(numberOfParameters, np.nan))
+                self.fitFailures[column] = message
+                self.fitListLabel.append(f'fit {column}: failed ({message})')
+                self.modelScoresList.append('')
+                continue
+
+            model = MODELS[name]
+            fit = self.modelFits[name]
+            parameters = fit.parameters[:, i]
+            values = ', '.join(f'{parameter}={value:.2f}{self.intervalStr(i, k)}'
+                               for k, (parameter, value) in enumerate(zip(model.parameters,
+                                                                         parameters)))
+
+            self.fitParameters.append(parameters)
+            self.fitListLabel.append(f'fit {column}: {values}' if name == 'power'
+                                     else f'fit {column} ({name}): {values}')
+            self.modelScoresList.append(f'AIC = {fit.aic[i]:.2f}, BIC = {fit.bic[i]:.2f}')
+
+        self.coef1_list = [parameters[0] for parameters in self.fitParameters]
+        self.coef2_list = [parameters[1] for parameters in self.fitParameters]
+
+        fitDF = pd.DataFrame(fitValues,
+                             index=pd.Index(self.x_fit_values, name='x_fit_values'),
+                             columns=[f'y_fit_{i+1}' for i in range(len(columns))])
+
+        # 5
+        self.sensitivityList = []
+        self.sensitivityRValues = []
+        self.sensitivityResultsList = []
+
+        if sensitivity:
+            regression = linearFit(concentrations, responses)
+
+            self.sensitivityList = regression.slope.tolist()
+            self.sensitivityRValues = regression.rSquared.tolist()
+
+            for i, (slope, rSquared) in enumerate(zip(self.sensitivityList, self.sensitivityRValues)):
+                finalStrP1 = f'sensitivity = {slope:.2f}{self.intervalStr(i)} {self.sensitivityUnit()},'
+                finalStrP2 = f' R-sq = {rSquared:.3f}'
+
+                self.sensitivityResultsList.append(finalStrP1+finalStrP2)
+
+        return fitDF
+
+    def intervalStr(self, channel: int, parameter: Optional[int] = None) -> str:
+        """ ' [lower, upper]' of a parameter of the channel (of the sensitivity if None), if computed. """
+
+        if self.fitIntervals is None or self.fitIntervals.parameters[channel] is None:
+            return ''
+
+        if parameter is None:
+            lower, upper = self.fitIntervals.slope[channel]
+        else:
+            lower, upper = self.fitIntervals.parameters[channel][parameter]
+
+        return f' [{lower:.2f}, {upper:.2f}]'
+
+    def responseUnitHeader(self) -> str:
+        """ Header line describing the unit of the response. """
+
+        if self.responseType['dR']:
+            if self.responseType['sigconc']:
+                return f'# Response in {self.channelsUnitStr}/{self.concentrationUnitStr}\n'
+            return f'# Response in {self.channelsUnitStr}\n'
+
+        elif self.responseType['Rgas/Rair']:
+            if self.responseType['sigconc']:
+                return f'# Response in Rgas/Rair/{self.concentrationUnitStr}\n'
+            return f'# Response in a.u. (Rgas/Rair)\n'
+
+        if self.responseType['sigconc']:
+            return f'# Response in %/{self.concentrationUnitStr}\n'
+        return f'# Response in %\n'
+
+    def exportData(self, exportDirectory: str, exportFileName: str,
+                   visData: bool = True, normData: bool = True,
+                   propData: bool = True, fitInfo: bool = True,
+                   fileFormat: str = 'dat') -> Dict[str, str]:
+        """
+            ##########################################################
+
+            Exports the DataFrames into files inside exportDirectory,
+            in one of the formats of gsdas.export: 'dat' text tables
+            (the default) or 'npz', 'parquet' and 'hdf5' binary
+            tables at full precision. DataFrames that are empty are
+            skipped. The fitDF generates two tables, one with the
+            data, another with the fit info (always a text report).
+
+            Each text file has a header with the date time and the
+            name of the analysis; the binary files carry the same
+            information as attributes. The files are written at the
+            same time on a thread pool (see writeConcurrently).
+
+            Returns a dictionary with the paths of the written files.
+
+            ##########################################################
+        """
+
+        if fileFormat not in EXPORT_FORMATS:
+            raise ValueError(f'Invalid export format: {fileFormat}')
+
+        extension = EXTENSIONS[fileFormat]
+
+        paths = {'VIS': f'{exportDirectory}/{exportFileName} VIS_DATA{extension}',
+                 'NORM': f'{exportDirectory}/{exportFileName} NORM_DATA{extension}',
+                 'RESPONSE': f'{exportDirectory}/{exportFileName} RESPONSE_DATA{extension}',
+                 'FIT_INFO': f'{exportDirectory}/{exportFileName} FIT_INFO.dat',
+                 'FIT': f'{exportDirectory}/{exportFileName} FIT_DATA{extension}'}
+
+        t = datetime.now()
+        date = t.strftime("%m/%d/%Y, %H:%M:%S")
+        header = f'# {date} \n# {exportFileName} \n\n'
+
+        def tableJob(key: str, frame: pd.DataFrame, floatFormat: str,
+                     lines: str, metadata: Dict[str, str]) -> Callable[[], None]:
+            metadata = {'date': date, 'name': exportFileName, **metadata}
+
+            return lambda: writeFrame(paths[key], frame, metadata, fileFormat,
+                                      header+lines, floatFormat, self.exportSeparator())
+
+        jobs = {}
+
+        if visData and not self.visualizationDF.empty:
+            jobs['VIS'] = tableJob(
+                'VIS', self.visualizationDF, '%10.4f',
+                f'# Visualization data\n'
+                f'# time unit: {self.timeUnitStr}\n'
+                f'# channels unit: {self.channelsUnitStr}\n\n\n',
+                {'data': 'Visualization data', 'time unit': self.timeUnitStr,
+                 'channels unit': self.channelsUnitStr})
+
+        if normData and not self.normalizationDF.empty:
+            jobs['NORM'] = tableJob(
+                'NORM', self.normalizationDF, '%10.7f',
+                f'# Normalization data\n'
+                f'# time unit: {self.timeUnitStr}\n'
+                f'# {self.normalizationStr()}\n\n\n',
+                {'data': 'Normalization data', 'time unit': self.timeUnitStr,
+                 'normalization': self.normalizationStr()})
+
+        if propData and not self.propertiesDF.empty:
+            jobs['RESPONSE'] = tableJob(
+                'RESPONSE', self.propertiesDF, '%10.3f',
+                f'# Properties data \n'
+                f'{self.responseUnitHeader()}'
+                f'# Resp and Rec times unit: {self.timeUnitStr}\n\n\n',
+                {'data': 'Properties data', 'response unit': self.responseUnitHeader()[2:-1],
+                 'resp and rec times unit': self.timeUnitStr})
+
+        if fitInfo and not self.fitDF.empty:
+            jobs['FIT_INFO'] = lambda: self.writeFitInfo(paths['FIT_INFO'], header)
+
+            jobs['FIT'] = tableJob('FIT', self.fitDF, '%10.3f', f'{self.fitDataHeader()}\n\n',
+                                   {'data': 'Fit data', 'models': ', '.join(self.usedModels())})
+
+        writeConcurrently(jobs)
+
+        return {key: paths[key] for key in paths if key in jobs}
+
+    def exportSeparator(self) -> str:
+        """ Separator of the exported text tables: the one of the file, or a tab for runs of whitespace. """
+
+        # r'\s+' is a pattern to read the file, not a string to write
+        return '\t' if self.separator == WHITESPACE else self.separator
+
+    def usedModels(self) -> List[str]:
+        """ Names of the models of the channels of the fit, in the order of MODELS. """
+
+        return [name for name in MODELS if name in self.channelModels]
+
+    def fitDataHeader(self) -> str:
+        """ Header line of the fit data, naming its models. """
+
+        usedModels = self.usedModels()
+
+        if usedModels in ([], ['power']):
+            return '# Power Law Fit data\n'
+
+        return f'# Fit data: {", ".join(usedModels)}\n'
+
+    def writeFitInfo(self, path: str, header: str) -> None:
+        """ Writes the fit report: the fit functions and the legend and sensitivity of each channel. """
+
+        with open(path, 'w') as fitDataFile:
+            fitDataFile.write(header)
+            usedModels = self.usedModels()
+
+            if usedModels in ([], ['power']):
+                fitDataFile.write('Power Law Fit function\n')
+                fitDataFile.write('Response = a*(Conc.)^b\n')
+            else:
+                fitDataFile.write('Fit functions\n')
+
+                for name in usedModels:
+                    fitDataFile.write(f'{name}: {MODELS[name].formula}\n')
+
+            if self.fitModelName == 'auto':
+                fitDataFile.write(f'Model of each channel: lowest {self.modelCriterion.upper()}\n')
+
+                concentrations = self.properties.column('concentration')
+                leftOut = concentrations[~commonDomain(getModels(self.autoModels), concentrations)]
+
+                if len(leftOut):
+                    fitDataFile.write('Concentrations left out, outside the domain of a model: ' +
+                                      ', '.join(f'{value:g}' for value in leftOut) + '\n')
+
+            if self.fitIntervals is not None:
+                seed = f', seed {self.randomSeed}' if self.fitIntervals.method == 'bootstrap' else ''
+
+                fitDataFile.write(f'{self.fitIntervals.level:.0%} confidence intervals [lower, upper]: '
+                                  f'{self.fitIntervals.method}, {self.fitIntervals.numberOfResamples} '
+                                  f'resamples of the cycles{seed}\n')
+
+            fitDataFile.write('\n\n')
+
+            for i, label in enumerate(self.fitListLabel):
+                fitDataFile.write(label+'\n')
+
+                if self.fitModelName == 'auto' and self.modelScoresList[i]:
+                    fitDataFile.write(self.modelScoresList[i]+'\n')
+
+                if self.responseType['sensitivity']:
+                    fitDataFile.write(self.sensitivityResultsList[i]+'\n')
+
+    def saveProject(self, path: Optional[str] = None) -> Tuple[str, ...]:
+        """
+            ##########################################################
+
+            Saves the session as a project (see gsdas.project): the
+            parsed columns of the file, the properties of the cycles
+            and the fit data as binary arrays, and the parameters of
+            every step, the schedule and the fit results in its JSON
+            file. Without a path (or with the same path) the project
+            is saved again incrementally: only the arrays that
+            changed are written.
+
+            Returns the names of the arrays written.
+
+            ##########################################################
+        """
+
+        if self.previewData is None:
+            raise ValueError('There is no data to save!')
+
+        if path is not None and (self.project is None or
+                                 ProjectFile(path).path != self.project.path):
+            self.project = ProjectFile(path)
+
+        if self.project is None:
+            raise ValueError('Choose a project file!')
+
+        state = {name: getattr(self, name) for name in self.projectAttributes}
+
+        state['channels'] = list(self.visualizationDF.columns)
+        state['schedule'] = asdict(self.schedule) if self.schedule else None
+        state['propertiesColumns'] = self.properties.columns
+        state['fit'] = None
+
+        arrays = {'preview': self.previewData,
+                  'properties': self.properties.values if len(self.properties) else None,
+                  'fit': None}
+
+        if not self.fitDF.empty:
+            state['fit'] = {name: getattr(self, name) for name in self.fitAttributes}
+            state['fit']['fitParameters'] = self.fitParameters
+            state['fit']['fitIntervals'] = self.fitIntervals._asdict() if self.fitIntervals else None
+            state['fit']['columns'] = list(self.fitDF.columns)
+
+            arrays['fit'] = self.fitDF.to_numpy()
+
+        return self.project.save(state, arrays)
+
+    def openProject(self, path: str) -> None:
+        """
+            ##########################################################
+
+            Opens a project saved by saveProject and brings the
+            session back without reading the data file again:
+
+            #1. The parameters are set and the previewDF is built on
+                the memory-mapped columns of the file, read only as
+                they are used;
+
+            #2. The visualizationDF and the normalizationDF are cut
+                and normalized again with the saved parameters, when
+                they are used (see setDataflow);
+
+            #3. The cycles and the fit are restored as they were
+                saved, without calculating them again.
+
+            ##########################################################
+        """
+
+        project = ProjectFile(path)
+        state, arrays = project.open()
+
+        # 1
+        self.reset()
+
+        for name in self.projectAttributes:
+            if name in state:
+                setattr(self, name, state[name])
+
+        if 'preview' not in arrays:
+            raise ValueError('The project has no data!')
+
+        self.setPreviewData(arrays['preview'])
+        self.schedule = CycleSchedule(**state['schedule']) if state.get('schedule') else None
+
+        # 2
+        if state.get('channels'):
+            self.setVisualizationDF(state['channels'], self.startVisualizationTime,
+                                    self.endVisualizationTime, self.startZero)
+
+        # 3
+        self.properties.clear(state.get('propertiesColumns', self.properties.columns))
+
+        if 'properties' in arrays:
+            self.properties.extend(arrays['properties'])
+
+        fit = state.get('fit')
+
+        if fit and 'fit' in arrays:
+            for name in self.fitAttributes:
+                setattr(self, name, fit[name])
+
+            self.fitParameters = [np.asarray(parameters, dtype=float)
+                                  for parameters in fit['fitParameters']]
+
+            intervals = fit.get('fitIntervals')
+            self.fitIntervals = None if intervals is None else FitIntervals(**dict(
+                intervals, slope=np.asarray(intervals['slope'], dtype=float),
+                parameters=[None if bounds is None else np.asarray(bounds, dtype=float)
+                            for bounds in intervals['parameters']]))
+
+            self.frames.store('fitDF', pd.DataFrame(np.asarray(arrays['fit']),
+                                                    index=pd.Index(self.x_fit_values,
+                                                                   name='x_fit_values'),
+                                                    columns=fit['columns']))
+
+        self.project = project
@@ -0,0 +1,175 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+
+EXPORT_FORMATS = ('dat', 'npz', 'parquet', 'hdf5')
+EXTENSIONS = {'dat': '.dat', 'npz': '.npz', 'parquet': '.parquet', 'hdf5': '.h5'}
+
+# rows formatted by one string operation
+ROWS_PER_BLOCK = 10000
+
+
+def quoted(field: str, separator: str) -> str:
+    """ The field quoted like the csv module does if it holds the separator or a quote. """
+
+    if separator in field or '"' in field or '\n' in field:
+        return '"' + field.replace('"', '""') + '"'
+
+    return field
+
+
+def formatRows(frame: pd.DataFrame, floatFormat: str = '%10.4f',
+               separator: str = '\t') -> Iterator[str]:
+    """
+        ##########################################################
+
+        TEXT TABLE: The lines of frame as DataFrame.to_csv writes
+        them with float_format and sep (header line, then the index
+        and the values of each row, NaN as empty fields), but much
+        faster: the rows are joined in blocks of ROWS_PER_BLOCK and
+        each block is formatted by a single % operation on one row
+        format repeated for the whole block, instead of one call
+        per value.
+
+        Integer indexes (like the cycles of the properties) are
+        written as integers. With a space separator the padded
+        values would need quoting, so to_csv writes those tables.
+
+        ##########################################################
+    """
+
+    names = [frame.index.name or ''] + [str(column) for column in frame.columns]
+
+    yield separator.join(quoted(name, separator) for name in names) + '\n'
+
+    if frame.empty:
+        return
+
+    if separator == ' ':
+        yield frame.to_csv(float_format=floatFormat, sep=separator, header=False)
+        return
+
+    integerIndex = pd.api.types.is_integer_dtype(frame.index.dtype)
+    rowFormat = separator.join(['%d' if integerIndex else floatFormat] +
+                               [floatFormat]*len(frame.columns)) + '\n'
+    missing = floatFormat % np.nan
+
+    data = np.column_stack([frame.index.to_numpy(dtype=float), frame.to_numpy(dtype=float)])
+
+    for start in range(0, len(data), ROWS_PER_BLOCK):
+        block = data[start:start+ROWS_PER_BLOCK]
+        text = (rowFormat*len(block)) % tuple(block.ravel().tolist())
+
+        yield text.replace(missing, '') if np.isnan(block).any() else text
+
+
+def writeText(path: str, frame: pd.DataFrame, header: str = '',
+              floatFormat: str = '%10.4f', separator: str = '\t') -> None:
+    """ Writes the '#' header and the table in one pass over one open file. """
+
+    with open(path, 'w') as textFile:
+        textFile.write(header)
+        textFile.writelines(formatRows(frame, floatFormat, separator))
+
+
+def writeNpz(path: str, frame: pd.DataFrame, metadata: Dict[str, str]) -> None:
+    """ index, values and columns arrays, with the metadata as a JSON string. """
+
+    np.savez(path, index=frame.index.to_numpy(), values=frame.to_numpy(dtype=float),
+             columns=np.array([str(column) for column in frame.columns]),
+             indexName=np.array(frame.index.name or ''),
+             metadata=np.array(json.dumps(metadata)))
+
+
+def writeParquet(path: str, frame: pd.DataFrame, metadata: Dict[str, str]) -> None:
+    """ The frame as a Parquet table, with the metadata in the schema ('gsdas' key). """
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError('Parquet export needs the pyarrow package!')
+
+    table = pa.Table.from_pandas(frame)
+    schemaMetadata = dict(table.schema.metadata or {})
+    schemaMetadata[b'gsdas'] = json.dumps(metadata).encode()
+
+    pq.write_table(table.replace_schema_metadata(schemaMetadata), path)
+
+
+def writeHdf5(path: str, frame: pd.DataFrame, metadata: Dict[str, str]) -> None:
+    """ index and values datasets, with the columns and the metadata as attributes. """
+
+    try:
+        import h5py
+    except ImportError:
+        raise ValueError('HDF5 export needs the h5py package!')
+
+    with h5py.File(path, 'w') as hdfFile:
+        hdfFile.create_dataset('index', data=frame.index.to_numpy())
+        values = hdfFile.create_dataset('values', data=frame.to_numpy(dtype=float))
+
+        values.attrs['columns'] = [str(column) for column in frame.columns]
+        values.attrs['indexName'] = frame.index.name or ''
+
+        for key, value in metadata.items():
+            hdfFile.attrs[key] = value
+
+
+def writeFrame(path: str, frame: pd.DataFrame, metadata: Dict[str, str],
+               fileFormat: str = 'dat', header: str = '',
+               floatFormat: str = '%10.4f', separator: str = '\t') -> None:
+    """
+        ##########################################################
+
+        Writes frame in one of the EXPORT_FORMATS. The text format
+        ('dat') has the '#' header and the values rounded by
+        floatFormat; the binary ones keep the full precision and
+        carry the metadata as attributes of the file instead.
+
+        ##########################################################
+    """
+
+    if fileFormat == 'dat':
+        writeText(path, frame, header, floatFormat, separator)
+
+    elif fileFormat == 'npz':
+        writeNpz(path, frame, metadata)
+
+    elif fileFormat == 'parquet':
+        writeParquet(path, frame, metadata)
+
+    elif fileFormat == 'hdf5':
+        writeHdf5(path, frame, metadata)
+
+    else:
+        raise ValueError(f'Invalid export format: {fileFormat}')
+
+
+def writeConcurrently(jobs: Dict[str, Callable[[], None]],
+                      threads: Optional[int] = None) -> None:
+    """
+        ##########################################################
+
+        Runs the writing jobs (output name: function) on a thread
+        pool, so the files are written at the same time: the disk
+        writes, NumPy and the binary writers release the GIL.
+        Waits for all of them and raises the first error.
+
+        ##########################################################
+    """
+
+    if len(jobs) <= 1:
+        for job in jobs.values():
+            job()
+        return
+
+    with ThreadPoolExecutor(max_workers=threads or len(jobs)) as pool:
+        futures = [pool.submit(job) for job in jobs.values()]
+
+        for future in futures:
+            future.result()
@@ -0,0 +1,240 @@
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from .decimate import MIN_POINTS_PER_BUCKET, decimateView
+
+
+def subplotGrid(numberOfAxis: int) -> Tuple[int, int]:
+    """
+        ##########################################################
+
+        Rows and columns of the subplot grid for numberOfAxis axes,
+        about twice as wide as tall like the main window: 2 axes
+        are stacked, 3-4 make a 2x2 grid, 5-6 a 2x3, 7-8 a 2x4,
+        16 a 3x6, 32 a 4x8 and so on.
+
+        ##########################################################
+    """
+
+    if numberOfAxis <= 2:
+        return max(numberOfAxis, 1), 1
+
+    rows = math.ceil(math.sqrt(numberOfAxis/2))
+
+    return rows, math.ceil(numberOfAxis/rows)
+
+
+def channelColors(palette: Sequence[str], numberOfChannels: int,
+                  colormap: str = 'turbo') -> List:
+    """ The palette if it has a color per channel, else colors spread over the colormap. """
+
+    if numberOfChannels <= len(palette):
+        return list(palette)
+
+    return list(matplotlib.colormaps[colormap](np.linspace(0, 1, numberOfChannels)))
+
+
+class Overlay:
+    """ An extra line drawn over the axis of a channel, like the fit curves. """
+
+    def __init__(self, channel: int, series: pd.Series, label: str,
+                 linestyle: str = 'dashed') -> None:
+        self.channel = channel
+        self.series = series
+        self.label = label
+        self.linestyle = linestyle
+
+
+class FigureModel:
+    """
+        ##########################################################
+
+        FIGURE MODEL: Keeps the axes and the Line2D of each channel
+        of the main figure between plots, so a replot only updates
+        what changed instead of clearing the figure:
+
+        #1. The layout of a plot is its number of axes, columns,
+            marker and line style. A plot with a new layout clears
+            the figure and builds the axes, lines, legends and axis
+            labels once;
+
+        #2. A plot with the same layout (a new cycle, a palette
+            change in the settings, a new fit) sets the data, color
+            and label of the existing lines in place, rescales the
+            axes and asks the canvas for one coalesced redraw;
+
+        #3. Long sorted series are decimated to the width of their
+            axis (see gsdas.decimate) and decimated again from the
+            full resolution arrays when the view limits change.
+
+        ##########################################################
+    """
+
+    def __init__(self, figure: Figure) -> None:
+        self.figure = figure
+        self.clear()
+
+    def clear(self) -> None:
+        """ Clears the figure; the next plot builds everything again. """
+
+        self.figure.clf()
+
+        self.layout = None
+        self.axes: List = []
+        self.lines: List = []
+        self.overlays: Dict[int, object] = {}
+        self.fullData: Dict[object, Tuple[np.ndarray, np.ndarray]] = {}
+        self.xLabelText = None
+        self.yLabelText = None
+
+    def plot(self, dataFrame: pd.DataFrame, xLabel: str, yLabel: str,
+             titles: Sequence[str], labels: Sequence[str], numberOfAxis: int,
+             colors: Sequence[str], marker: str = '', linestyle: str = '',
+             overlays: Sequence[Overlay] = ()) -> None:
+        """
+            ##########################################################
+
+            Plots the columns of dataFrame against its index: all in
+            one axis if numberOfAxis is 1, otherwise one axis per
+            column. overlays are drawn over the axis of their
+            channel and removed when they are not given again.
+
+            ##########################################################
+        """
+
+        if numberOfAxis == 1:
+            channels = list(range(len(dataFrame.columns)))
+        else:
+            numberOfAxis = min(numberOfAxis, len(dataFrame.columns))
+            channels = list(range(numberOfAxis))
+
+        rows, columns = subplotGrid(numberOfAxis)
+
+        layout = (numberOfAxis, tuple(dataFrame.columns), marker, linestyle)
+
+        # 1
+        if layout != self.layout:
+            self.build(numberOfAxis, rows, columns, xLabel, yLabel)
+            self.layout = layout
+
+        else:
+            self.xLabelText.set_text(xLabel)
+            self.yLabelText.set_text(yLabel)
+
+        for k, ax in enumerate(self.axes):
+            ax.set_title(titles[k], visible=False)
+
+        # 2
+        style = {'marker': marker, 'linestyle': linestyle} if marker else {}
+        x = dataFrame.index.to_numpy(dtype=float)
+
+        for i in channels:
+            ax = self.axisOf(i)
+            y = dataFrame.iloc[:, i].to_numpy(dtype=float)
+
+            if i < len(self.lines):
+                self.setLineData(self.lines[i], ax, x, y)
+            else:
+                self.lines.append(self.addLine(ax, x, y, **style))
+
+            self.lines[i].set_color(colors[i % len(colors)])
+            self.lines[i].set_label(labels[i])
+
+        for channel in set(self.overlays) - {overlay.channel for overlay in overlays}:
+            self.removeLine(self.overlays.pop(channel))
+
+        for overlay in overlays:
+            ax = self.axisOf(overlay.channel)
+            x = overlay.series.index.to_numpy(dtype=float)
+            y = overlay.series.to_numpy(dtype=float)
+
+            if overlay.channel in self.overlays:
+                line = self.overlays[overlay.channel]
+                self.setLineData(line, ax, x, y)
+                line.set_linestyle(overlay.linestyle)
+            else:
+                line = self.overlays[overlay.channel] = self.addLine(
+                    ax, x, y, linestyle=overlay.linestyle)
+
+            line.set_color(colors[overlay.channel % len(colors)])
+            line.set_label(overlay.label)
+
+        for ax in self.axes:
+            ax.relim()
+            ax.autoscale_view()
+            ax.legend(loc='best' if len(self.axes) == 1 else 'upper right', shadow=True)
+
+        self.draw()
+
+    def build(self, numberOfAxis: int, rows: int, columns: int,
+              xLabel: str, yLabel: str) -> None:
+        """ Clears the figure and creates the axes and the axis labels. """
+
+        self.clear()
+
+        self.xLabelText = self.figure.text(0.55, 0.025, xLabel,
+                                           ha='center', va='center', fontsize=18)
+
+        self.yLabelText = self.figure.text(0.025, 0.5, yLabel,
+                                           ha='center', va='center', rotation=90, fontsize=18)
+
+        for k in range(numberOfAxis):
+            ax = self.figure.add_subplot(rows, columns, k+1)
+            ax.callbacks.connect('xlim_changed', self.redecimate)
+            self.axes.append(ax)
+
+        self.figure.subplots_adjust(top=0.975, bottom=0.09, left=0.075,
+                                    right=0.975, hspace=0.15, wspace=0.15)
+
+    def axisOf(self, channel: int):
+        return self.axes[0] if len(self.axes) == 1 else self.axes[channel]
+
+    @staticmethod
+    def buckets(ax) -> int:
+        """ Width of the axis in pixels: one min/max pair is drawn per pixel column. """
+
+        return max(int(ax.bbox.width), 100)
+
+    def isDecimated(self, ax, x: np.ndarray) -> bool:
+        # only sorted series can be cut to the view
+        return len(x) > MIN_POINTS_PER_BUCKET*self.buckets(ax) and not np.any(x[1:] < x[:-1])
+
+    def addLine(self, ax, x: np.ndarray, y: np.ndarray, **style):
+        line = ax.plot([], [], **style)[0]
+        self.setLineData(line, ax, x, y)
+
+        return line
+
+    def setLineData(self, line, ax, x: np.ndarray, y: np.ndarray) -> None:
+        """ Sets the data of the line, decimated if it is long. """
+
+        if self.isDecimated(ax, x):
+            self.fullData[line] = (x, y)
+            line.set_data(*decimateView(x, y, self.buckets(ax)))
+        else:
+            self.fullData.pop(line, None)
+            line.set_data(x, y)
+
+    def removeLine(self, line) -> None:
+        self.fullData.pop(line, None)
+        line.remove()
+
+    def redecimate(self, ax) -> None:
+        """ Decimates again the lines of ax for its new view limits. """
+
+        for line, (x, y) in self.fullData.items():
+            if line.axes is ax:
+                line.set_data(*decimateView(x, y, self.buckets(ax), ax.get_xlim()))
+
+        self.draw()
+
+    def draw(self) -> None:
+        """ One redraw of the canvas, merged with the others asked before it paints. """
+
+        if self.figure.canvas is not None:
+            self.figure.canvas.draw_idle()
@@ -0,0 +1,503 @@
+import math
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+
+MAX_ITERATIONS = 200
+TOLERANCE = 1.49012e-08
+MAX_DAMPING = 1e16
+
+RESAMPLING_METHODS = ('bootstrap', 'jackknife')
+INFORMATION_CRITERIA = ('aic', 'bic')
+# fewest channel fits of resamples sent to a worker process: about
+# 0.1 s of fitting (~50 us each), what starting the worker costs
+MIN_FITS_PER_CHUNK = 2000
+
+
+class ModelFit(NamedTuple):
+    """
+        ##########################################################
+
+        Fit of one calibration model (see gsdas.models) to every
+        channel: parameters is (parameters x channels), NaN where
+        the fit failed, rss the residual sum of squares of count
+        points, and aic and bic the Akaike and Bayesian
+        information criteria of each channel (lower is better).
+
+        ##########################################################
+    """
+
+    model: str
+    parameters: np.ndarray
+    success: np.ndarray
+    messages: List[str]
+    rss: np.ndarray
+    count: np.ndarray
+    aic: np.ndarray
+    bic: np.ndarray
+
+
+class LinearFit(NamedTuple):
+    """ Least squares line of each channel, like scipy.stats.linregress. """
+
+    slope: np.ndarray
+    intercept: np.ndarray
+    rSquared: np.ndarray
+
+
+class FitIntervals(NamedTuple):
+    """ (lower, upper) bounds of the model parameters (channels x parameters x 2) and of the sensitivity slope. """
+
+    parameters: np.ndarray
+    slope: np.ndarray
+    level: float
+    method: str
+    numberOfResamples: int
+
+
+def asChannels(x: Sequence[float], y: Sequence) -> tuple:
+    """ x as a column (or points x channels) and y as a (points x channels) array, with the mask of valid points. """
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    if x.ndim == 1:
+        x = x[:, np.newaxis]
+
+    if y.ndim == 1:
+        y = y[:, np.newaxis]
+
+    valid = np.isfinite(x) & np.isfinite(y)
+
+    return x, np.where(valid, y, 0.0), valid
+
+
+def linearFit(x: Sequence[float], y: Sequence) -> LinearFit:
+    """ Slope, intercept and R-squared of every channel in one pass (NaN points are skipped). """
+
+    x, y, valid = asChannels(x, y)
+    count = valid.sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        xMean = np.where(valid, x, 0.0).sum(axis=0)/count
+        yMean = y.sum(axis=0)/count
+
+        dx = np.where(valid, x-xMean, 0.0)
+        dy = np.where(valid, y-yMean, 0.0)
+
+        sxx = (dx*dx).sum(axis=0)
+        syy = (dy*dy).sum(axis=0)
+        sxy = (dx*dy).sum(axis=0)
+
+        slope = sxy/sxx
+        rSquared = np.clip(sxy*sxy/(sxx*syy), 0.0, 1.0)
+
+    return LinearFit(slope, yMean-slope*xMean, rSquared)
+
+
+def solveNormal(matrix: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+    """ Solutions of the (channels x k x k) systems at once, NaN for the singular ones. """
+
+    with np.errstate(invalid='ignore', over='ignore'):
+        finite = np.isfinite(matrix).all(axis=(1, 2)) & np.isfinite(rhs).all(axis=1)
+        safe = np.where(finite[:, np.newaxis, np.newaxis], matrix, 0.0)
+        singular = ~finite | ~(np.linalg.cond(safe) < 1/np.finfo(float).eps)
+
+    identity = np.broadcast_to(np.eye(matrix.shape[1]), matrix.shape)
+    solution = np.linalg.solve(np.where(singular[:, np.newaxis, np.newaxis], identity, safe),
+                               np.where(singular[:, np.newaxis], 0.0, rhs)[..., np.newaxis])[..., 0]
+
+    return np.where(singular[:, np.newaxis], np.nan, solution)
+
+
+def normalEquations(weights: np.ndarray, derivatives: Sequence[np.ndarray],
+                    residuals: np.ndarray) -> tuple:
+    """ J'WJ (channels x k x k) and J'Wr (channels x k) of the derivatives of every channel. """
+
+    k = len(derivatives)
+
+    with np.errstate(invalid='ignore', over='ignore'):
+        matrix = np.stack([np.stack([(weights*derivatives[i]*derivatives[j]).sum(axis=0)
+                                     for j in range(k)], axis=-1) for i in range(k)], axis=-2)
+        rhs = np.stack([(weights*residuals*derivative).sum(axis=0) for derivative in derivatives],
+                       axis=-1)
+
+    return matrix, rhs
+
+
+def leastSquares(basis: Sequence[np.ndarray], y: Sequence) -> np.ndarray:
+    """
+        ##########################################################
+
+        Closed-form least squares of y (points x channels) on the
+        basis functions (each broadcastable to y), for the models
+        that are linear in their parameters or linearized. NaN
+        points are skipped. Returns (len(basis) x channels).
+
+        ##########################################################
+    """
+
+    y = np.asarray(y, dtype=float)
+    basis = [np.broadcast_to(function, y.shape) for function in basis]
+    valid = np.isfinite(y)
+
+    for function in basis:
+        valid = valid & np.isfinite(function)
+
+    basis = [np.where(valid, function, 0.0) for function in basis]
+    matrix, rhs = normalEquations(valid.astype(float), basis, np.where(valid, y, 0.0))
+
+    return solveNormal(matrix, rhs).T
+
+
+def informationCriteria(rss: np.ndarray, count: np.ndarray, numberOfParameters: int) -> tuple:
+    """ AIC and BIC of least squares fits with Gaussian errors. """
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logLikelihood = count*np.log(rss/count)
+
+        return (logLikelihood + 2*numberOfParameters,
+                logLikelihood + numberOfParameters*np.log(count))
+
+
+def fitModel(model, x: Sequence[float], y: Sequence,
+             maxIterations: int = MAX_ITERATIONS,
+             tolerance: float = TOLERANCE) -> ModelFit:
+    """
+        ##########################################################
+
+        Fits a calibration model (see gsdas.models) to every channel
+        (column of y) at once with a Levenberg-Marquardt iteration
+        vectorized over the channels:
+
+        #1. Each channel starts from the closed-form or linearized
+            guess of the model, close to the solution even for ppb
+            concentrations where a default start (all ones) fails;
+
+        #2. Each step solves the damped normal equations of all
+            channels together, with the analytic Jacobian of the
+            model. A channel whose step lowers its squared error
+            takes it and lowers its damping, otherwise the damping
+            grows, so every channel converges on its own;
+
+        #3. A channel has converged when its step and its change of
+            squared error are below tolerance (relative). Points
+            with missing responses, or outside the domain of the
+            model (e.g. zero for a logarithm), are left out of their
+            channel.
+
+        The fit never aborts: channels with fewer points than
+        parameters, no initial guess, non-finite results or no
+        convergence in maxIterations get NaN parameters, success
+        False and a message.
+
+        ##########################################################
+    """
+
+    x, y, valid = asChannels(x, y)
+    valid = valid & model.domain(x)
+    y = np.where(valid, y, 0.0)
+    weights = valid.astype(float)
+    numberOfParameters = len(model.parameters)
+    numberOfChannels = y.shape[1]
+    count = valid.sum(axis=0)
+
+    # 1
+    parameters = np.array(model.seed(np.where(valid, x, np.nan), np.where(valid, y, np.nan)),
+                          dtype=float).reshape(numberOfParameters, numberOfChannels)
+    seeded = np.isfinite(parameters).all(axis=0)
+    parameters = np.where(seeded, parameters, 0.0)
+    damping = np.full(numberOfChannels, 1e-3)
+
+    def squaredError(parameters):
+        values = model.evaluate(x, parameters)
+
+        with np.errstate(invalid='ignore', over='ignore'):
+            return np.where(valid, (y-values)**2, 0.0).sum(axis=0)
+
+    error = squaredError(parameters)
+    converged = np.zeros(numberOfChannels, dtype=bool)
+    active = (count >= numberOfParameters) & seeded
+
+    for _ in range(maxIterations):
+        running = active & ~converged
+
+        if not running.any():
+            break
+
+        # 2
+        values, derivatives = model.jacobian(x, parameters)
+
+        # the model may not be finite where there are no points
+        derivatives = [np.where(valid, derivative, 0.0) for derivative in derivatives]
+        matrix, rhs = normalEquations(weights, derivatives, np.where(valid, y-values, 0.0))
+
+        diagonal = np.arange(numberOfParameters)
+        matrix[:, diagonal, diagonal] *= (1+damping)[:, np.newaxis]
+
+        step = solveNormal(matrix, rhs).T
+        step = np.where(running & np.isfinite(step).all(axis=0), step, 0.0)
+
+        newError = squaredError(parameters+step)
+        better = running & np.isfinite(newError) & (newError <= error)
+
+        # 3
+        with np.errstate(invalid='ignore', divide='ignore'):
+            smallStep = (np.abs(step) <= tolerance*(np.abs(parameters)+tolerance)).all(axis=0)
+            smallChange = np.abs(error-newError) <= tolerance*error
+
+        # no step lowers the error any more even with the largest damping
+        stuck = ~better & (damping >= MAX_DAMPING)
+
+        converged |= running & ((better & smallStep & smallChange) | stuck | (error == 0))
+
+        parameters = np.where(better, parameters+step, parameters)
+        error = np.where(better, newError, error)
+        damping = np.where(better, damping/10, np.minimum(damping*10, MAX_DAMPING))
+
+    finite = np.isfinite(parameters).all(axis=0)
+    success = active & converged & finite
+    messages = []
+
+    for channel in range(numberOfChannels):
+        if count[channel] < numberOfParameters:
+            messages.append(f'less than {numberOfParameters} valid points')
+        elif not seeded[channel]:
+            messages.append('no initial guess')
+        elif not finite[channel]:
+            messages.append('non-finite coefficients')
+        elif not converged[channel]:
+            messages.append(f'no convergence in {maxIterations} iterations')
+        else:
+            messages.append('')
+
+    rss = np.where(success, error, np.nan)
+    aic, bic = informationCriteria(rss, count, numberOfParameters)
+
+    return ModelFit(model.name, np.where(success, parameters, np.nan), success, messages,
+                    rss, count, aic, bic)
+
+
+def commonDomain(models: Sequence, x: Sequence[float]) -> np.ndarray:
+    """ Mask of the concentrations x that every model is defined at. """
+
+    x = np.asarray(x, dtype=float)
+
+    return np.logical_and.reduce([model.domain(x) for model in models] + [np.isfinite(x)])
+
+
+def fitModels(models: Sequence, x: Sequence[float], y: Sequence) -> Dict[str, ModelFit]:
+    """
+        ##########################################################
+
+        Fits of each model to all the channels, one vectorized pass
+        per model. Only the points in the domain of every model are
+        used (see commonDomain: no zero concentration next to a
+        logarithm), so all the fits have the same points and their
+        information criteria can be compared by bestModels.
+
+        ##########################################################
+    """
+
+    x, y, valid = asChannels(x, y)
+    y = np.where(valid & commonDomain(models, x), y, np.nan)
+
+    return {model.name: fitModel(model, x, y) for model in models}
+
+
+def bestModels(fits: Dict[str, ModelFit], criterion: str = 'aic') -> List[Optional[str]]:
+    """
+        ##########################################################
+
+        Name of the model with the lowest information criterion
+        ('aic' or 'bic') of each channel, among the models that
+        could be fitted to it (None if none could). Ties, like the
+        power law and Freundlich isotherm that are the same curve,
+        go to the model given first.
+
+        The criteria only compare fits of the same points (see
+        fitModels): a model fitted on fewer points of a channel
+        than the others is left out for that channel.
+
+        ##########################################################
+    """
+
+    if criterion not in INFORMATION_CRITERIA:
+        raise ValueError(f'Invalid information criterion: {criterion}')
+
+    names = list(fits)
+    counts = np.array([fits[name].count for name in names])
+    comparable = counts == counts.max(axis=0)
+    scores = np.array([np.where(fits[name].success, getattr(fits[name], criterion), np.inf)
+                       for name in names])
+    scores = np.where(comparable, scores, np.inf)
+    scores = np.where(np.isnan(scores), np.inf, scores)
+    best = scores.argmin(axis=0)
+
+    return [names[model] if np.isfinite(scores[model, channel]) else None
+            for channel, model in enumerate(best)]
+
+
+def resampleIndices(numberOfCycles: int, method: str = 'bootstrap',
+                    numberOfResamples: int = 1000, seed: int = 0) -> np.ndarray:
+    """
+        ##########################################################
+
+        Cycles of each resample, one row per resample: bootstrap
+        draws numberOfCycles cycles with replacement
+        numberOfResamples times from a generator seeded with seed,
+        jackknife leaves each cycle out once (numberOfCycles rows).
+
+        All the rows are drawn here, before the work is split, so
+        the intervals only depend on the seed and never on the
+        number of processes.
+
+        ##########################################################
+    """
+
+    if method == 'bootstrap':
+        rng = np.random.default_rng(seed)
+        return rng.integers(0, numberOfCycles, (int(numberOfResamples), numberOfCycles))
+
+    if method == 'jackknife':
+        kept = np.arange(numberOfCycles-1)
+        return kept[np.newaxis, :] + (kept[np.newaxis, :] >= np.arange(numberOfCycles)[:, np.newaxis])
+
+    raise ValueError(f'Invalid resampling method: {method}')
+
+
+def fitResamples(model, x: np.ndarray, y: np.ndarray, indices: np.ndarray) -> tuple:
+    """
+        ##########################################################
+
+        Model and linear fits of every resample (row of indices) of
+        every channel: the parameters as (parameters x resamples x
+        channels) and the slope as (resamples x channels). The
+        resamples are stacked as extra channels, so all of them are
+        fitted by a single call of fitModel and linearFit. Resamples
+        with only one distinct concentration cannot be fitted and
+        are NaN.
+
+        ##########################################################
+    """
+
+    numberOfResamples, numberOfPoints = indices.shape
+    numberOfChannels = y.shape[1]
+
+    xs = x[indices]
+    ys = y[indices]
+
+    stackedX = np.repeat(xs.T[:, :, np.newaxis], numberOfChannels, axis=2)
+    stackedX = stackedX.reshape(numberOfPoints, numberOfResamples*numberOfChannels)
+    stackedY = ys.transpose(1, 0, 2).reshape(numberOfPoints, numberOfResamples*numberOfChannels)
+
+    fit = fitModel(model, stackedX, stackedY)
+    regression = linearFit(stackedX, stackedY)
+
+    shape = (numberOfResamples, numberOfChannels)
+    degenerate = (np.ptp(xs, axis=1) == 0)[:, np.newaxis]
+
+    parameters = fit.parameters.reshape((len(model.parameters),) + shape)
+
+    return (np.where(degenerate, np.nan, parameters),
+            np.where(degenerate, np.nan, regression.slope.reshape(shape)))
+
+
+def jackknifeBounds(estimate: np.ndarray, replicates: np.ndarray, level: float,
+                    axis: int = 0) -> np.ndarray:
+    """ Normal interval around the estimate with the jackknife standard error of the replicates (along axis). """
+
+    count = np.sum(np.isfinite(replicates), axis=axis)
+    spread = np.nanmean((replicates-np.nanmean(replicates, axis=axis, keepdims=True))**2, axis=axis)
+    error = np.sqrt((count-1)*spread)
+    z = NormalDist().inv_cdf(0.5+level/2)
+
+    return np.stack([estimate-z*error, estimate+z*error])
+
+
+def fitsPerChunk(numberOfFits: int, processes: Optional[int] = None,
+                 minimum: int = 1) -> int:
+    """ Fits per chunk to share numberOfFits among the workers (os.cpu_count() if None), at least minimum. """
+
+    workers = processes or os.cpu_count() or 1
+
+    return max(math.ceil(numberOfFits/workers), minimum, 1)
+
+
+def resampleFit(model, x: Sequence[float], y: Sequence, method: str = 'bootstrap',
+                numberOfResamples: int = 1000, seed: int = 0, level: float = 0.95,
+                processes: Optional[int] = None) -> FitIntervals:
+    """
+        ##########################################################
+
+        CONFIDENCE INTERVALS of the parameters of the model (see
+        gsdas.models) and of the sensitivity slope of every channel,
+        from refits of resampled cycles (rows of y):
+
+        #1. The resamples are drawn at once from the seed (see
+            resampleIndices);
+
+        #2. They are split in one chunk per worker (processes, or
+            one per CPU if None), fitted on a process pool. A chunk
+            has at least MIN_FITS_PER_CHUNK channel fits, so a small
+            job is not spread over more processes than it is worth;
+            a job of a single chunk, or processes=1, is fitted in
+            this process;
+
+        #3. bootstrap gives the percentile interval of the refits at
+            level, jackknife the normal interval around the fit of
+            all the cycles with the jackknife standard error.
+            Resamples that could not be fitted are left out, a
+            channel without any fitted resample gets NaN bounds.
+
+        ##########################################################
+    """
+
+    if not 0 < level < 1:
+        raise ValueError('The confidence level must be between 0 and 1!')
+
+    x, y, valid = asChannels(x, y)
+    x = x[:, 0]
+    y = np.where(valid, y, np.nan)
+    numberOfChannels = y.shape[1]
+
+    # 1
+    indices = resampleIndices(len(x), method, numberOfResamples, seed)
+
+    # 2
+    chunkSize = math.ceil(fitsPerChunk(len(indices)*numberOfChannels, processes,
+                                       MIN_FITS_PER_CHUNK)/numberOfChannels)
+    chunks = [indices[start:start+chunkSize] for start in range(0, len(indices), chunkSize)]
+
+    if processes == 1 or len(chunks) == 1:
+        results = [fitResamples(model, x, y, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            results = list(pool.map(fitResamples, [model]*len(chunks), [x]*len(chunks),
+                                    [y]*len(chunks), chunks))
+
+    parameters = np.concatenate([result[0] for result in results], axis=1)
+    slopes = np.concatenate([result[1] for result in results])
+
+    # 3
+    with warnings.catch_warnings():
+        # channels without any fitted resample
+        warnings.simplefilter('ignore', RuntimeWarning)
+
+        if method == 'bootstrap':
+            tail = 50*(1-level)
+            parameterBounds = np.nanpercentile(parameters, [tail, 100-tail], axis=1)
+            slopeBounds = np.nanpercentile(slopes, [tail, 100-tail], axis=0)
+
+        else:
+            parameterBounds = jackknifeBounds(fitModel(model, x, y).parameters, parameters, level, axis=1)
+            slopeBounds = jackknifeBounds(linearFit(x, y).slope, slopes, level)
+
+    # (2 x parameters x channels) -> (channels x parameters x 2)
+    return FitIntervals(parameterBounds.transpose(2, 1, 0), slopeBounds.T,
+                        level, method, len(indices))
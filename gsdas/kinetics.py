@@ -0,0 +1,288 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .fitting import fitModel, fitsPerChunk, linearFit
+from .models import CalibrationModel
+
+
+# points of the fitted curve searched for its 90% time
+T90_GRID_POINTS = 1024
+
+# fewest transient points fitted by a worker process: about 0.1 s of
+# fitting (2-5 us a point), what starting the worker costs
+MIN_POINTS_PER_CHUNK = 50000
+
+
+class SingleExponential(CalibrationModel):
+    """ Transient y = c + A*exp(-t/tau), t from the start of the transient. """
+
+    name = 'single'
+    formula = 'S = c + A*exp(-t/tau)'
+    parameters = ('c', 'A', 'tau')
+    timeConstants = (2,)
+
+    def jacobian(self, x, parameters):
+        c, a, tau = parameters
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            decay = np.exp(-x/tau)
+
+            return c+a*decay, [np.ones_like(decay), decay, a*decay*x/(tau*tau)]
+
+    def seed(self, x, y):
+        """
+            ##########################################################
+
+            The plateau c is the last value of the transient and A its
+            first value minus c. tau comes from a linear regression of
+            ln((y-c)/A) on t, over the points between 10% and 90% of
+            the change, or is a third of the transient if that is not
+            usable.
+
+            ##########################################################
+        """
+
+        x = np.broadcast_to(x, y.shape)
+        valid = np.isfinite(x) & np.isfinite(y)
+        rows = np.arange(len(y))[:, np.newaxis]
+        columns = np.arange(y.shape[1])
+
+        first = y[np.where(valid, rows, len(y)).argmin(axis=0), columns]
+        last = y[np.where(valid, rows, -1).argmax(axis=0), columns]
+        duration = np.nanmax(np.where(valid, x, np.nan), axis=0)
+
+        c = last
+        a = first-last
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = (y-c)/a
+            usable = valid & (fraction > 0.1) & (fraction < 0.9)
+            regression = linearFit(np.where(usable, x, np.nan),
+                                   np.where(usable, np.log(np.where(usable, fraction, 1.0)), np.nan))
+
+            tau = -1/regression.slope
+
+        tau = np.where(np.isfinite(tau) & (tau > 0), tau, duration/3)
+
+        return np.array([c, a, tau])
+
+    def domain(self, x):
+        return np.isfinite(x) & (x >= 0)
+
+
+class DoubleExponential(SingleExponential):
+    """ Transient y = c + A1*exp(-t/tau1) + A2*exp(-t/tau2), with a fast and a slow process. """
+
+    name = 'double'
+    formula = 'S = c + A1*exp(-t/tau1) + A2*exp(-t/tau2)'
+    parameters = ('c', 'A1', 'tau1', 'A2', 'tau2')
+    timeConstants = (2, 4)
+
+    def jacobian(self, x, parameters):
+        c, a1, tau1, a2, tau2 = parameters
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            decay1 = np.exp(-x/tau1)
+            decay2 = np.exp(-x/tau2)
+
+            return c+a1*decay1+a2*decay2, [np.ones_like(decay1),
+                                           decay1, a1*decay1*x/(tau1*tau1),
+                                           decay2, a2*decay2*x/(tau2*tau2)]
+
+    def seed(self, x, y):
+        """ Half of the change on each process, three times faster and slower than the single exponential. """
+
+        c, a, tau = super().seed(x, y)
+
+        return np.array([c, a/2, tau/3, a/2, 3*tau])
+
+
+KINETICS_MODELS: Dict[str, SingleExponential] = {model.name: model for model in (
+    SingleExponential(), DoubleExponential())}
+
+
+class TransientFits(NamedTuple):
+    """ Time constants (transients x timeConstants, fastest first) and fitted 90% times of each transient. """
+
+    tau: np.ndarray
+    t90: np.ndarray
+    success: np.ndarray
+
+
+def transientArrays(times: np.ndarray, values: np.ndarray,
+                    slices: Sequence[slice]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        ##########################################################
+
+        Stacks the windows of values (rows x channels) given by
+        slices as columns of two (points x transients) arrays, the
+        channels of each window next to each other: the times from
+        the start of each window and the values, both padded with
+        NaN up to the longest window.
+
+        ##########################################################
+    """
+
+    numberOfChannels = values.shape[1]
+    lengths = [len(times[window]) for window in slices]
+    t = np.full((max(lengths, default=0), len(slices)*numberOfChannels), np.nan)
+    y = np.full(t.shape, np.nan)
+
+    for i, (window, length) in enumerate(zip(slices, lengths)):
+        columns = slice(i*numberOfChannels, (i+1)*numberOfChannels)
+        windowTimes = times[window]
+
+        t[:length, columns] = (windowTimes-windowTimes[:1])[:, np.newaxis]
+        y[:length, columns] = values[window]
+
+    return t, y
+
+
+def fittedT90(model: SingleExponential, parameters: np.ndarray, durations: np.ndarray) -> np.ndarray:
+    """
+        ##########################################################
+
+        Time in which each fitted curve covers 90% of its change
+        over its transient, like the respTime/recTime of the data
+        (see gsdas.response) but free of noise and of the sample
+        interval: the curve is evaluated on T90_GRID_POINTS times
+        and the first crossing of the 90% level is interpolated
+        linearly between them.
+
+        ##########################################################
+    """
+
+    grid = np.linspace(0, 1, T90_GRID_POINTS)[:, np.newaxis]*durations
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        curve = model.evaluate(grid, parameters)
+
+        start = curve[0]
+        change = curve[-1]-start
+        progress = (curve-start)/change
+
+    crossed = progress >= 0.9
+    after = np.clip(crossed.argmax(axis=0), 1, T90_GRID_POINTS-1)
+    columns = np.arange(curve.shape[1])
+
+    before = progress[after-1, columns]
+    fraction = (0.9-before)/(progress[after, columns]-before)
+    t90 = grid[after-1, columns] + fraction*(grid[after, columns]-grid[after-1, columns])
+
+    return np.where(crossed.any(axis=0) & np.isfinite(t90), t90, np.nan)
+
+
+def fitTransientChunk(model: SingleExponential, t: np.ndarray, y: np.ndarray) -> TransientFits:
+    """ Fits of the transients (columns) of t and y in one vectorized call of fitModel. """
+
+    fit = fitModel(model, t, y)
+    durations = np.nanmax(np.where(np.isfinite(y), t, np.nan), axis=0)
+
+    tau = np.abs(fit.parameters[list(model.timeConstants)].T)
+
+    return TransientFits(np.sort(tau, axis=1), fittedT90(model, fit.parameters, durations),
+                         fit.success)
+
+
+def fitTransients(t: np.ndarray, y: np.ndarray, model: str = 'single',
+                  processes: Optional[int] = None) -> TransientFits:
+    """
+        ##########################################################
+
+        Fits an exponential model of KINETICS_MODELS ('single' or
+        'double') to every transient (column) of t and y, as given
+        by transientArrays. The columns are split in one chunk per
+        worker (processes, or one per CPU if None), fitted on a
+        process pool. A chunk has at least MIN_POINTS_PER_CHUNK
+        points, so a few short transients are not spread over more
+        processes than they are worth; a job of a single chunk, or
+        processes=1, is fitted in this process. Transients that
+        cannot be fitted get NaN.
+
+        ##########################################################
+    """
+
+    if model not in KINETICS_MODELS:
+        raise ValueError(f'Invalid kinetics model: {model}')
+
+    kineticsModel = KINETICS_MODELS[model]
+    chunkSize = fitsPerChunk(t.shape[1], processes,
+                             math.ceil(MIN_POINTS_PER_CHUNK/max(len(t), 1)))
+    chunks = [(t[:, start:start+chunkSize], y[:, start:start+chunkSize])
+              for start in range(0, t.shape[1], chunkSize)]
+
+    if processes == 1 or len(chunks) <= 1:
+        results = [fitTransientChunk(kineticsModel, *chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            results = list(pool.map(fitTransientChunk, [kineticsModel]*len(chunks),
+                                    *zip(*chunks)))
+
+    if not results:
+        numberOfTaus = len(kineticsModel.timeConstants)
+        return TransientFits(np.empty((0, numberOfTaus)), np.empty(0), np.empty(0, dtype=bool))
+
+    tau, t90, success = (np.concatenate(values) for values in zip(*results))
+
+    return TransientFits(np.where(success[:, np.newaxis], tau, np.nan),
+                         np.where(success, t90, np.nan), success)
+
+
+def kineticsColumns(channels: Sequence[str], model: str = 'single') -> List[str]:
+    """ Properties columns of the kinetics: fitted 90% times, then the time constants of each transient. """
+
+    suffixes = [''] if len(KINETICS_MODELS[model].timeConstants) == 1 else \
+        [str(i+1) for i in range(len(KINETICS_MODELS[model].timeConstants))]
+
+    columns = []
+
+    for prefix in ('resp', 'rec'):
+        columns += [f'{channel} {prefix}TimeFit' for channel in channels]
+
+    for prefix in ('resp', 'rec'):
+        for suffix in suffixes:
+            columns += [f'{channel} {prefix}Tau{suffix}' for channel in channels]
+
+    return columns
+
+
+def cycleKinetics(times: np.ndarray, values: np.ndarray,
+                  cycleSlices: Sequence[Tuple[slice, slice]], model: str = 'single',
+                  processes: Optional[int] = None) -> np.ndarray:
+    """
+        ##########################################################
+
+        KINETICS of many cycles: fits the exponential model to the
+        response (exposure) and recovery transient of every channel
+        of every cycle, all of them in one fitTransients job.
+
+        cycleSlices has the (exposure, recovery) rows of each cycle.
+        Returns one row per cycle with the values of the
+        kineticsColumns: the fitted respTime and recTime of every
+        channel, then their time constants (the fast one first for
+        the double exponential).
+
+        ##########################################################
+    """
+
+    values = np.asarray(values, dtype=float)
+
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+
+    numberOfCycles = len(cycleSlices)
+    numberOfChannels = values.shape[1]
+
+    slices = [window for cycle in cycleSlices for window in cycle]
+    fits = fitTransients(*transientArrays(times, values, slices), model, processes)
+
+    # transients are ordered cycle, (response, recovery), channel
+    shape = (numberOfCycles, 2, numberOfChannels)
+    t90 = fits.t90.reshape(shape)
+    tau = fits.tau.reshape(shape + (-1,)).transpose(0, 1, 3, 2)
+
+    return np.concatenate([t90.reshape(numberOfCycles, -1),
+                           tau.reshape(numberOfCycles, -1)], axis=1)
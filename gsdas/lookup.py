@@ -0,0 +1,128 @@
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class TimeIndex:
+    """
+        ##########################################################
+
+        LOOKUP SERVICE: Snaps user times to the closest value of a
+        time table with a binary search (numpy searchsorted), so
+        each lookup is O(log n) instead of a Python scan of the
+        whole index.
+
+        Sorted tables (the usual case) are searched directly. For
+        unsorted or duplicated timestamps the unique values are
+        sorted once, remembering where each one first appears, so
+        the answer is the same as
+
+            min(times, key=lambda x: abs(value - x))
+
+        including the tie-break: when two values are equally
+        close, the one that appears first in the table wins.
+
+        ##########################################################
+    """
+
+    def __init__(self, times: Sequence[float]) -> None:
+        self.times = np.asarray(times, dtype=float)
+
+        if len(self.times) == 0:
+            raise ValueError('Empty time table!')
+
+        self.isSorted = bool(np.all(self.times[1:] >= self.times[:-1]))
+
+        if self.isSorted:
+            self.sortedTimes = self.times
+            self.firstPositions = None
+
+        else:
+            valid = np.flatnonzero(~np.isnan(self.times))
+
+            if len(valid) == 0:
+                raise ValueError('Empty time table!')
+
+            self.sortedTimes, first = np.unique(self.times[valid], return_index=True)
+            self.firstPositions = valid[first]
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def nearestPositions(self, values: Sequence[float]) -> np.ndarray:
+        """ Positions in the table of the closest time to each value. """
+
+        values = np.asarray(values, dtype=float)
+
+        if np.isnan(values).any():
+            raise ValueError('Invalid time value!')
+
+        last = len(self.sortedTimes)-1
+        right = np.clip(np.searchsorted(self.sortedTimes, values, side='left'), 0, last)
+        left = np.clip(right-1, 0, last)
+
+        leftDistance = np.abs(values - self.sortedTimes[left])
+        rightDistance = np.abs(values - self.sortedTimes[right])
+
+        if self.isSorted:
+            # the first occurrence of each candidate comes first in the table
+            left = np.searchsorted(self.sortedTimes, self.sortedTimes[left], side='left')
+            return np.where(leftDistance <= rightDistance, left, right)
+
+        leftFirst = self.firstPositions[left]
+        rightFirst = self.firstPositions[right]
+        useLeft = (leftDistance < rightDistance) | \
+            ((leftDistance == rightDistance) & (leftFirst < rightFirst))
+
+        return np.where(useLeft, leftFirst, rightFirst)
+
+    def nearestPosition(self, value: float) -> int:
+        return int(self.nearestPositions([value])[0])
+
+    def nearestMany(self, values: Sequence[float]) -> np.ndarray:
+        """ Snaps a whole array of times in one call. """
+
+        return self.times[self.nearestPositions(values)]
+
+    def nearest(self, value: float) -> float:
+        return self.times[self.nearestPosition(value)]
+
+
+# pandas Index objects are immutable, so their lookup tables can be
+# shared between every dialog until the DataFrame is rebuilt
+_timeIndexCache = {}
+_timeIndexCacheSize = 8
+
+
+def getTimeIndex(index: Sequence[float]) -> TimeIndex:
+    """ Returns the (cached, for pandas indexes) TimeIndex of index. """
+
+    if not isinstance(index, pd.Index):
+        return TimeIndex(index)
+
+    cached = _timeIndexCache.get(id(index))
+
+    if cached is not None and cached[0] is index:
+        return cached[1]
+
+    timeIndex = TimeIndex(index)
+
+    if len(_timeIndexCache) >= _timeIndexCacheSize:
+        _timeIndexCache.pop(next(iter(_timeIndexCache)))
+
+    _timeIndexCache[id(index)] = (index, timeIndex)
+
+    return timeIndex
+
+
+def closestTime(index: Sequence[float], value: float) -> float:
+    """ Returns the value of the index that is the closest to value. """
+
+    return getTimeIndex(index).nearest(value)
+
+
+def closestTimes(index: Sequence[float], values: Sequence[float]) -> np.ndarray:
+    """ Returns the values of the index that are the closest to values. """
+
+    return getTimeIndex(index).nearestMany(values)
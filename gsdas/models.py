@@ -0,0 +1,238 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .fitting import leastSquares, linearFit
+
+
+class CalibrationModel:
+    """
+        ##########################################################
+
+        CALIBRATION MODEL: Response as a function of the
+        concentration, with the parameters of every channel fitted
+        at once by gsdas.fitting.fitModel. A model gives:
+
+        #1. evaluate(x, parameters): the responses at x (points x
+            channels, or a column) of the (parameters x channels)
+            array of parameters;
+
+        #2. jacobian(x, parameters): the responses and the list of
+            their analytic derivatives by each parameter;
+
+        #3. seed(x, y): a closed-form or linearized guess of the
+            parameters of every channel (NaN where there is none),
+            from x and y with NaN at the missing points;
+
+        #4. domain(x): the concentrations the model is defined at.
+
+        New models are added to MODELS with their name.
+
+        ##########################################################
+    """
+
+    name = ''
+    formula = ''
+    parameters: Tuple[str, ...] = ()
+
+    def evaluate(self, x: np.ndarray, parameters: np.ndarray) -> np.ndarray:
+        return self.jacobian(x, parameters)[0]
+
+    def jacobian(self, x: np.ndarray, parameters: np.ndarray) -> Tuple[np.ndarray, List[np.ndarray]]:
+        raise NotImplementedError
+
+    def seed(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def domain(self, x: np.ndarray) -> np.ndarray:
+        return np.isfinite(x)
+
+
+def logOf(x: np.ndarray) -> np.ndarray:
+    """ ln x where x is positive, 0 elsewhere (for terms like x^b*ln x that vanish at zero). """
+
+    return np.log(np.where(x > 0, x, 1.0))
+
+
+def powerLawSeed(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+        ##########################################################
+
+        Initial guess of a and b of a*x^b for every channel from a
+        linear regression of log|y| on log(x): b is the slope and
+        |a| the exponential of the intercept, with the sign of the
+        mean response (dR responses of a decreasing sensor are
+        negative). Channels without two usable points start from
+        a = mean response and b = 1.
+
+        ##########################################################
+    """
+
+    x = np.broadcast_to(x, y.shape)
+    valid = np.isfinite(x) & np.isfinite(y)
+    usable = valid & (x > 0) & (y != 0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        regression = linearFit(logOf(x), np.where(usable, np.log(np.abs(np.where(usable, y, 1.0))),
+                                                  np.nan))
+
+        sign = np.where(np.nansum(y, axis=0) < 0, -1.0, 1.0)
+        a = sign*np.exp(regression.intercept)
+        b = regression.slope
+
+    fallback = ~(np.isfinite(a) & np.isfinite(b))
+    meanResponse = np.nansum(y, axis=0)/np.maximum(valid.sum(axis=0), 1)
+
+    return np.array([np.where(fallback, meanResponse, a), np.where(fallback, 1.0, b)])
+
+
+class PowerLaw(CalibrationModel):
+    """ Response = a*x^b, the model of powerLawFunc. """
+
+    name = 'power'
+    formula = 'Response = a*(Conc.)^b'
+    parameters = ('a', 'b')
+
+    def jacobian(self, x, parameters):
+        a, b = parameters
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            power = x**b
+            values = a*power
+
+            return values, [power, values*logOf(x)]
+
+    def seed(self, x, y):
+        return powerLawSeed(x, y)
+
+
+class Freundlich(CalibrationModel):
+    """ Freundlich isotherm, Response = K*x^(1/n): a power law with b = 1/n. """
+
+    name = 'freundlich'
+    formula = 'Response = K*(Conc.)^(1/n)'
+    parameters = ('K', 'n')
+
+    def jacobian(self, x, parameters):
+        k, n = parameters
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            power = x**(1/n)
+            values = k*power
+
+            return values, [power, -values*logOf(x)/(n*n)]
+
+    def seed(self, x, y):
+        a, b = powerLawSeed(x, y)
+
+        with np.errstate(divide='ignore'):
+            return np.array([a, np.where(b != 0, 1/b, 1.0)])
+
+
+class Langmuir(CalibrationModel):
+    """ Langmuir isotherm, Response = S*K*x/(1+K*x), saturating at S. """
+
+    name = 'langmuir'
+    formula = 'Response = S*K*(Conc.)/(1+K*(Conc.))'
+    parameters = ('S', 'K')
+
+    def jacobian(self, x, parameters):
+        s, k = parameters
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            denominator = 1+k*x
+            values = s*k*x/denominator
+
+            return values, [k*x/denominator, s*x/(denominator*denominator)]
+
+    def seed(self, x, y):
+        """
+            ##########################################################
+
+            Linearized (Lineweaver-Burk) guess: 1/y = 1/S + 1/(S*K*x),
+            so a regression of 1/y on 1/x gives S = 1/intercept and
+            K = intercept/slope. Where that is not usable, S is twice
+            the largest response and K the inverse of the median
+            concentration.
+
+            ##########################################################
+        """
+
+        x = np.broadcast_to(x, y.shape)
+        usable = (x > 0) & np.isfinite(y) & (y != 0)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            regression = linearFit(np.where(usable, 1/x, np.nan), np.where(usable, 1/y, np.nan))
+
+            s = 1/regression.intercept
+            k = regression.intercept/regression.slope
+
+            largest = np.nanmax(np.abs(y), axis=0)
+            sign = np.where(np.nansum(y, axis=0) < 0, -1.0, 1.0)
+            median = np.nanmedian(np.where(x > 0, x, np.nan), axis=0)
+
+        fallback = ~(np.isfinite(s) & np.isfinite(k) & (k > 0))
+
+        return np.array([np.where(fallback, 2*sign*largest, s), np.where(fallback, 1/median, k)])
+
+    def domain(self, x):
+        return np.isfinite(x) & (x >= 0)
+
+
+class LogLinear(CalibrationModel):
+    """ Response = a + b*ln(x), linear in its parameters. """
+
+    name = 'loglinear'
+    formula = 'Response = a + b*ln(Conc.)'
+    parameters = ('a', 'b')
+
+    def jacobian(self, x, parameters):
+        a, b = parameters
+        # undefined at and below zero (the fit curve starts at zero)
+        logX = np.where(self.domain(x), logOf(x), np.nan)
+
+        return a+b*logX, [np.ones_like(logX), logX]
+
+    def seed(self, x, y):
+        return leastSquares([np.ones_like(x), logOf(x)], y)
+
+    def domain(self, x):
+        return np.isfinite(x) & (x > 0)
+
+
+class Polynomial(CalibrationModel):
+    """ Response = c0 + c1*x + ... + cn*x^n, linear in its parameters. """
+
+    def __init__(self, degree: int) -> None:
+        self.degree = degree
+        self.name = {1: 'linear', 2: 'quadratic', 3: 'cubic'}.get(degree, f'polynomial{degree}')
+        self.parameters = tuple(f'c{power}' for power in range(degree+1))
+        self.formula = 'Response = ' + ' + '.join(
+            ['c0'] + [f'c{power}*(Conc.)' + (f'^{power}' if power > 1 else '')
+                      for power in range(1, degree+1)])
+
+    def basis(self, x: np.ndarray) -> List[np.ndarray]:
+        return [x**power for power in range(self.degree+1)]
+
+    def jacobian(self, x, parameters):
+        basis = self.basis(x)
+
+        return sum(c*function for c, function in zip(parameters, basis)), basis
+
+    def seed(self, x, y):
+        return leastSquares(self.basis(x), y)
+
+
+MODELS: Dict[str, CalibrationModel] = {model.name: model for model in (
+    PowerLaw(), Freundlich(), Langmuir(), LogLinear(), Polynomial(1), Polynomial(2))}
+
+
+def getModels(names: Sequence[str]) -> List[CalibrationModel]:
+    """ The models of MODELS with these names. """
+
+    unknown = [name for name in names if name not in MODELS]
+
+    if unknown:
+        raise ValueError(f'Unknown fit models: {", ".join(unknown)}')
+
+    return [MODELS[name] for name in names]
@@ -0,0 +1,128 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+# 'point' and 'r0' divide by one row, 'baseline' by the mean of some
+# rows, 'minmax' and 'zscore' use the statistics of the whole window
+NORMALIZATION_MODES = ('point', 'baseline', 'minmax', 'zscore', 'r0')
+
+# rows reduced at a time by columnMean and columnStd
+ROWS_PER_BLOCK = 1 << 16
+
+
+def blockSums(block: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ Sum and number of the values of each column of block, skipping NaN. """
+
+    sums = block.sum(axis=0)
+    counts = np.full(block.shape[1], float(len(block)))
+
+    # NaN only turn up in the sums of the columns that have them
+    missing = np.flatnonzero(np.isnan(sums))
+
+    if len(missing):
+        columns = block[:, missing]
+        valid = ~np.isnan(columns)
+
+        sums[missing] = np.where(valid, columns, 0.0).sum(axis=0)
+        counts[missing] = valid.sum(axis=0)
+
+    return sums, counts
+
+
+def columnMean(values: np.ndarray) -> np.ndarray:
+    """ Mean of each column, skipping NaN, in blocks of rows (no full size temporary array). """
+
+    total = np.zeros(values.shape[1])
+    count = np.zeros(values.shape[1])
+
+    for start in range(0, len(values), ROWS_PER_BLOCK):
+        sums, counts = blockSums(values[start:start+ROWS_PER_BLOCK])
+
+        total += sums
+        count += counts
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return total/count
+
+
+def columnStd(values: np.ndarray, mean: np.ndarray) -> np.ndarray:
+    """ Standard deviation (ddof=0) of each column around mean, skipping NaN, in blocks of rows. """
+
+    total = np.zeros(values.shape[1])
+    count = np.zeros(values.shape[1])
+
+    for start in range(0, len(values), ROWS_PER_BLOCK):
+        deviation = values[start:start+ROWS_PER_BLOCK] - mean
+        sums, counts = blockSums(np.multiply(deviation, deviation, out=deviation))
+
+        total += sums
+        count += counts
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.sqrt(total/count)
+
+
+def normalize(values: np.ndarray, mode: str = 'point', row: Optional[int] = None,
+              rows: Optional[slice] = None, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+        ##########################################################
+
+        NORMALIZATION of every channel (column) of values at once:
+        the statistics of all the channels are one row, and the
+        window is normalized by a single broadcast operation into
+        one new array (or into out, which can be values itself):
+
+        point, r0: values / values[row], row being the chosen time
+                   or the start of the exposure of the first cycle;
+
+        baseline:  values / mean of values[rows], the baseline
+                   interval;
+
+        minmax:    (values - min) / (max - min);
+
+        zscore:    (values - mean) / standard deviation.
+
+        NaN are skipped by the statistics. A channel that is zero
+        at the row (or flat, for minmax and zscore) gives inf/NaN,
+        as a division by zero does.
+
+        ##########################################################
+    """
+
+    values = np.asarray(values, dtype=float)
+
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+
+    if out is None:
+        out = np.empty(values.shape)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if mode in ('point', 'r0'):
+            if row is None:
+                raise ValueError('Choose the normalization time!')
+
+            return np.divide(values, values[row].copy(), out=out)
+
+        elif mode == 'baseline':
+            if rows is None or len(values[rows]) == 0:
+                raise ValueError('Empty baseline interval!')
+
+            return np.divide(values, columnMean(values[rows]), out=out)
+
+        elif mode == 'minmax':
+            low = np.fmin.reduce(values, axis=0)
+            high = np.fmax.reduce(values, axis=0)
+
+            np.subtract(values, low, out=out)
+            return np.divide(out, high-low, out=out)
+
+        elif mode == 'zscore':
+            mean = columnMean(values)
+            std = columnStd(values, mean)
+
+            np.subtract(values, mean, out=out)
+            return np.divide(out, std, out=out)
+
+    raise ValueError(f'Invalid normalization mode: {mode}')
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+import numpy as np
+
+
+PROJECT_VERSION = 1
+PROJECT_EXTENSION = '.gsdas'
+
+# folder of the arrays, next to the project file
+ARRAYS_SUFFIX = '.arrays'
+
+
+def jsonValue(value):
+    """ NumPy scalars and arrays as plain JSON values. """
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+
+    raise TypeError(f'{type(value).__name__} cannot be saved in a project')
+
+
+def arrayDigest(array: np.ndarray) -> str:
+    """ Hash of the dtype, shape and bytes of the array. """
+
+    digest = hashlib.blake2b(f'{array.dtype.str}{array.shape}'.encode(), digest_size=16)
+    digest.update(np.ascontiguousarray(array).data)
+
+    return digest.hexdigest()
+
+
+class ProjectArrays(Mapping):
+    """
+        ##########################################################
+
+        LAZY ARRAYS: The arrays of a project by name. Nothing is
+        read when the project is opened: each .npy file is only
+        memory-mapped when its array is asked for, and then its
+        pages are read as they are used.
+
+        ##########################################################
+    """
+
+    def __init__(self, directory: str, manifest: Dict[str, Dict]) -> None:
+        self.directory = directory
+        self.manifest = manifest
+        self.opened = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self.opened:
+            entry = self.manifest[name]
+
+            try:
+                array = np.load(os.path.join(self.directory, entry['file']), mmap_mode='r')
+            except (OSError, ValueError):
+                raise ValueError(f'The array {name} of the project cannot be read!')
+
+            if list(array.shape) != entry['shape']:
+                raise ValueError(f'The array {name} of the project is damaged!')
+
+            self.opened[name] = array
+
+        return self.opened[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.manifest)
+
+    def __len__(self) -> int:
+        return len(self.manifest)
+
+
+class ProjectFile:
+    """
+        ##########################################################
+
+        PROJECT FILE: A whole session saved as a self-describing
+        JSON file (the format version, the parameters and results
+        of the analysis and a manifest of its arrays, with the
+        dtype, shape and digest of each one) and a folder next to
+        it, path + ARRAYS_SUFFIX, with one .npy file per array.
+
+        #1. save(state, arrays) writes only the arrays that changed
+            since the last save: an array that is the same object
+            that was saved or opened, or that has the same digest,
+            is kept as it is. A changed array is written to a new
+            file named after its digest instead of replacing the
+            old one, which may still be memory-mapped (Windows does
+            not replace or remove a mapped file). The JSON file is
+            replaced last, so a project is never left half written,
+            and then the files it no longer uses are removed, or
+            left for a later save while they are mapped;
+
+        #2. open() reads only the JSON file and returns the state
+            and the arrays as ProjectArrays, memory-mapped when
+            they are used.
+
+        ##########################################################
+    """
+
+    def __init__(self, path: str) -> None:
+        if not path.endswith(PROJECT_EXTENSION):
+            path += PROJECT_EXTENSION
+
+        self.path = path
+        self.directory = path + ARRAYS_SUFFIX
+        self.manifest = {}
+        # arrays known to be in the folder, by name
+        self.stored = {}
+
+    def save(self, state: Dict, arrays: Dict[str, Optional[np.ndarray]]) -> Tuple[str, ...]:
+        """ Writes the project (see #1). Returns the names of the arrays written. """
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        manifest = {}
+        written = []
+
+        for name, array in arrays.items():
+            if array is None:
+                continue
+
+            saved = self.manifest.get(name)
+
+            if saved is not None and array is self.stored.get(name):
+                manifest[name] = saved
+                continue
+
+            digest = arrayDigest(array)
+            entry = {'file': f'{name}.{digest[:16]}.npy', 'dtype': array.dtype.str,
+                     'shape': list(array.shape), 'digest': digest}
+
+            if saved is not None and all(saved.get(key) == entry[key]
+                                         for key in ('dtype', 'shape', 'digest')) and \
+                    os.path.isfile(os.path.join(self.directory, saved['file'])):
+                entry = saved
+
+            elif not os.path.isfile(os.path.join(self.directory, entry['file'])):
+                self.writeArray(entry['file'], array)
+                written.append(name)
+
+            manifest[name] = entry
+            self.stored[name] = array
+
+        for name in set(self.manifest) - set(manifest):
+            self.stored.pop(name, None)
+
+        document = {'format': 'gsdas project', 'version': PROJECT_VERSION,
+                    'arrays': manifest, **state}
+
+        temporaryPath = f'{self.path}.{os.getpid()}.tmp'
+
+        with open(temporaryPath, 'w') as projectFile:
+            json.dump(document, projectFile, indent=1, default=jsonValue)
+
+        os.replace(temporaryPath, self.path)
+        self.manifest = manifest
+        self.removeUnused()
+
+        return tuple(written)
+
+    def removeUnused(self) -> None:
+        """ Removes the .npy files of the folder that the manifest does not use, except the mapped ones. """
+
+        used = {entry['file'] for entry in self.manifest.values()}
+
+        for fileName in os.listdir(self.directory):
+            if fileName.endswith('.npy') and fileName not in used:
+                try:
+                    os.remove(os.path.join(self.directory, fileName))
+                except OSError:
+                    pass
+
+    def writeArray(self, fileName: str, array: np.ndarray) -> None:
+        """ Writes one .npy file through a temporary file. """
+
+        path = os.path.join(self.directory, fileName)
+        temporaryPath = f'{path}.{os.getpid()}.tmp'
+
+        with open(temporaryPath, 'wb') as arrayFile:
+            np.save(arrayFile, array)
+
+        os.replace(temporaryPath, path)
+
+    def open(self) -> Tuple[Dict, ProjectArrays]:
+        """ The state and the lazy arrays of the project (see #2). """
+
+        try:
+            with open(self.path) as projectFile:
+                document = json.load(projectFile)
+        except (OSError, ValueError):
+            raise ValueError('Invalid project file!')
+
+        if not isinstance(document, dict) or document.get('format') != 'gsdas project':
+            raise ValueError('Invalid project file!')
+
+        if document.get('version', 0) > PROJECT_VERSION:
+            raise ValueError('The project was saved by a newer version of GSDAS!')
+
+        self.manifest = document.pop('arrays', {})
+        arrays = ProjectArrays(self.directory, self.manifest)
+
+        # the mapped arrays are the saved ones until they are replaced
+        self.stored = arrays.opened
+
+        return document, arrays
@@ -0,0 +1,123 @@
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class PropertiesStore:
+    """
+        ##########################################################
+
+        PROPERTIES STORE: Keeps the properties of the cycles in a
+        preallocated NumPy buffer, one row per cycle and one
+        column per property, in the order of the table (columns).
+
+        The buffer doubles its size when it is full, so appending
+        a cycle is O(1) amortized and appending many cycles at once
+        copies each of them only once. Removing the last cycle just
+        moves the end of the table.
+
+        The DataFrame (index 'cycle' starting at 1) is only built
+        when it is asked for by frame(), and kept until the next
+        change. Every change also increments version, so the
+        products derived from the cycles know when to be updated
+        (see gsdas.dataflow).
+
+        ##########################################################
+    """
+
+    initialCapacity = 16
+
+    def __init__(self, columns: Sequence[str] = (), capacity: Optional[int] = None) -> None:
+        self.columns = list(columns)
+        self.buffer = np.empty((capacity or self.initialCapacity, len(self.columns)))
+        self.size = 0
+        self.version = 0
+        self._frame = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def values(self) -> np.ndarray:
+        """ View of the filled rows of the buffer. """
+
+        return self.buffer[:self.size]
+
+    def reserve(self, capacity: int) -> None:
+        """ Grows the buffer (doubling it) until it holds capacity rows. """
+
+        if capacity <= len(self.buffer):
+            return
+
+        newCapacity = max(len(self.buffer), 1)
+
+        while newCapacity < capacity:
+            newCapacity *= 2
+
+        buffer = np.empty((newCapacity, len(self.columns)))
+        buffer[:self.size] = self.values
+        self.buffer = buffer
+
+    def append(self, row: Sequence[float]) -> None:
+        """ Appends one cycle with a value for each column. """
+
+        self.extend([row])
+
+    def extend(self, rows: Sequence[Sequence[float]]) -> None:
+        """ Appends many cycles at once. """
+
+        rows = np.asarray(rows, dtype=float)
+
+        if rows.ndim != 2 or rows.shape[1] != len(self.columns):
+            raise ValueError(f'Each cycle needs {len(self.columns)} values!')
+
+        self.reserve(self.size + len(rows))
+        self.buffer[self.size:self.size+len(rows)] = rows
+        self.size += len(rows)
+        self.changed()
+
+    def popLast(self) -> np.ndarray:
+        """ Removes the last cycle and returns its values. """
+
+        if self.size == 0:
+            raise ValueError('The DF is empty!')
+
+        self.size -= 1
+        self.changed()
+
+        return self.buffer[self.size].copy()
+
+    def clear(self, columns: Optional[Sequence[str]] = None) -> None:
+        """ Removes every cycle, optionally changing the columns. """
+
+        if columns is not None and list(columns) != self.columns:
+            self.columns = list(columns)
+            self.buffer = np.empty((self.initialCapacity, len(self.columns)))
+
+        self.size = 0
+        self.changed()
+
+    def changed(self) -> None:
+        """ Drops the DataFrame and increments the version after a change. """
+
+        self._frame = None
+        self.version += 1
+
+    def column(self, name: str) -> np.ndarray:
+        """ View of the values of one column, without building the DataFrame. """
+
+        return self.values[:, self.columns.index(name)]
+
+    def frame(self) -> pd.DataFrame:
+        """ The properties as a DataFrame, for display and export. """
+
+        if self._frame is None:
+            if self.size == 0:
+                self._frame = pd.DataFrame()
+            else:
+                index = pd.RangeIndex(1, self.size+1, name='cycle')
+                self._frame = pd.DataFrame(self.values.copy(), index=index,
+                                           columns=list(self.columns))
+
+        return self._frame
@@ -0,0 +1,166 @@
+import io
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .archive import DataStream
+from .cache import DataCache
+
+
+CHUNK_SIZE = 100000
+
+
+def countLines(fileName: str, blockSize: int = 1 << 20) -> int:
+    """ Number of lines of the file, counted on raw byte blocks. """
+
+    lines = 0
+    lastByte = b'\n'
+
+    with DataStream(fileName) as dataFile:
+        for block in iter(lambda: dataFile.stream.read(blockSize), b''):
+            lines += block.count(b'\n')
+            lastByte = block[-1:]
+
+    # the last line may not end with a new line
+    return lines + (lastByte != b'\n')
+
+
+def readColumns(fileName: str, separator: str, numberOfColumns: int,
+                timeFactor: float = 1, channelFactor: float = 1,
+                headerLines: int = 0, decimal: str = '.',
+                chunkSize: int = CHUNK_SIZE,
+                progress: Optional[Callable[[float], None]] = None) -> np.ndarray:
+    """
+        ##########################################################
+
+        STREAMING READER: Parses the first numberOfColumns columns
+        of the file (or archive member, see gsdas.archive) chunk by
+        chunk, so the whole text is never in memory as a DataFrame
+        and the unused columns are never built. The first
+        headerLines lines are skipped and decimal is the decimal
+        mark of the numbers (see gsdas.sniff).
+
+        #1. The lines are counted first on raw bytes (much faster
+            than parsing) to allocate the array only once, in
+            column order so that each channel is contiguous;
+
+        #2. Each chunk is copied into its rows and divided by the
+            time factor (first column) and the channel factor
+            (the others) in place;
+
+        #3. progress, if given, receives the fraction of the file
+            read after each chunk.
+
+        Returns the (rows x numberOfColumns) float array.
+
+        ##########################################################
+    """
+
+    # 1
+    capacity = countLines(fileName)
+    data = np.empty((capacity, numberOfColumns), order='F')
+    size = 0
+
+    with DataStream(fileName) as dataFile:
+        reader = pd.read_csv(dataFile.stream, sep=separator, header=None,
+                             skiprows=headerLines, decimal=decimal,
+                             usecols=range(numberOfColumns), dtype=float,
+                             chunksize=chunkSize)
+
+        with reader:
+            for chunk in reader:
+                # 2
+                rows = slice(size, size+len(chunk))
+                data[rows] = chunk.to_numpy()
+
+                data[rows, 0] /= timeFactor
+                data[rows, 1:] /= channelFactor
+
+                size += len(chunk)
+
+                # 3
+                if progress is not None:
+                    progress(dataFile.fraction())
+
+    if progress is not None:
+        progress(1.0)
+
+    return data[:size]
+
+
+def parseLines(lines: List[str], separator: str, numberOfColumns: int,
+               timeFactor: float = 1, channelFactor: float = 1,
+               decimal: str = '.') -> np.ndarray:
+    """ Parses a few data lines (e.g. the sample of the file) like readColumns. """
+
+    if not lines:
+        return np.empty((0, numberOfColumns))
+
+    data = pd.read_csv(io.StringIO('\n'.join(lines)), sep=separator, header=None,
+                       decimal=decimal, usecols=range(numberOfColumns),
+                       dtype=float).to_numpy()
+
+    return scaleColumns(data, timeFactor, channelFactor)
+
+
+def scaleColumns(data: np.ndarray, timeFactor: float = 1, channelFactor: float = 1,
+                 out: Optional[np.ndarray] = None) -> np.ndarray:
+    """ Divides the time column and the channels by their factors (in place if out is data). """
+
+    if out is None:
+        out = np.empty(data.shape, order='F')
+
+    np.divide(data[:, :1], timeFactor, out=out[:, :1])
+    np.divide(data[:, 1:], channelFactor, out=out[:, 1:])
+
+    return out
+
+
+def loadColumns(fileName: str, separator: str, numberOfColumns: int,
+                timeFactor: float = 1, channelFactor: float = 1,
+                headerLines: int = 0, decimal: str = '.',
+                progress: Optional[Callable[[float], None]] = None,
+                cache: Optional[DataCache] = None) -> np.ndarray:
+    """
+        ##########################################################
+
+        Same as readColumns, but going through the cache of parsed
+        files (see gsdas.cache.DataCache):
+
+        #1. If the file is in the cache, its columns are memory-
+            mapped. Without factors the mapped (read-only) array is
+            used as it is, otherwise the factors are applied in one
+            NumPy pass;
+
+        #2. Otherwise the file is parsed, stored in the cache before
+            the factors are applied, and then divided in place.
+
+        ##########################################################
+    """
+
+    if cache is None or not cache.enabled:
+        return readColumns(fileName, separator, numberOfColumns, timeFactor,
+                           channelFactor, headerLines, decimal, progress=progress)
+
+    # the entries depend on the whole layout of the file
+    layout = f'{separator}|{headerLines}|{decimal}'
+
+    # 1
+    data = cache.load(fileName, layout, numberOfColumns)
+
+    if data is not None:
+        if progress is not None:
+            progress(1.0)
+
+        if timeFactor == 1 and channelFactor == 1:
+            return data
+
+        return scaleColumns(data, timeFactor, channelFactor)
+
+    # 2
+    data = readColumns(fileName, separator, numberOfColumns,
+                       headerLines=headerLines, decimal=decimal, progress=progress)
+    cache.save(fileName, layout, data)
+
+    return scaleColumns(data, timeFactor, channelFactor, out=data)
@@ -0,0 +1,138 @@
+from typing import Dict, NamedTuple
+
+import numpy as np
+
+
+RESPONSE_TYPES = ('dR/R0', 'dR', 'Rgas/Rair')
+T90_METHODS = ('closest', 'crossing')
+
+
+class CycleProperties(NamedTuple):
+    """ Properties of one exposure-recovery cycle, one value per channel. """
+
+    r0: np.ndarray
+    rf: np.ndarray
+    rf2: np.ndarray
+    responses: Dict[str, np.ndarray]
+    responseTime: np.ndarray
+    recoveryTime: np.ndarray
+
+
+def responseOf(r0: np.ndarray, rf: np.ndarray, responseType: str) -> np.ndarray:
+    """ Response of every channel for one of the RESPONSE_TYPES. """
+
+    if responseType == 'dR/R0':
+        return (np.abs(rf-r0)*100)/r0
+
+    elif responseType == 'dR':
+        return rf-r0
+
+    elif responseType == 'Rgas/Rair':
+        return rf/r0
+
+    raise ValueError(f'Invalid response type: {responseType}')
+
+
+def t90Positions(window: np.ndarray, target: np.ndarray, method: str = 'closest') -> np.ndarray:
+    """
+        ##########################################################
+
+        Row of the window in which each channel reaches its 90%
+        target level:
+
+        closest:  first row whose value is the closest to the
+                  target. This is the original criterion of the
+                  software and the default.
+
+        crossing: first row in which the signal crosses the target
+                  coming from its first value. Channels that never
+                  cross are given -1.
+
+        ##########################################################
+    """
+
+    if method == 'closest':
+        distance = np.abs(target - window)
+        distance[np.isnan(distance)] = np.inf
+
+        return np.argmin(distance, axis=0)
+
+    elif method == 'crossing':
+        goingDown = target < window[0]
+        crossed = np.where(goingDown, window <= target, window >= target)
+        positions = np.argmax(crossed, axis=0)
+
+        return np.where(crossed.any(axis=0), positions, -1)
+
+    raise ValueError(f'Invalid t90 method: {method}')
+
+
+def calcCycleProperties(times: np.ndarray, values: np.ndarray,
+                        respSlice: slice, recSlice: slice,
+                        t90Method: str = 'closest') -> CycleProperties:
+    """
+        ##########################################################
+
+        Calculates the properties of one cycle for all channels in
+        one NumPy pass over the 2D window array (rows x channels).
+
+        respSlice and recSlice are the rows of the exposure and of
+        the recovery, both including their last row, as given by
+        the label slices of the visualizationDF.
+
+        #1. r0, rf and rf2 are the first and last rows of the
+            exposure and the last row of the recovery;
+
+        #2. The response is calculated for every response type;
+
+        #3. The 90% levels are r0 +/- 0.9*|rf-r0| for the response
+            and rf -/+ 0.9*|rf2-rf| for the recovery, the sign
+            depending on whether the signal increases or decreases
+            with the gas;
+
+        #4. The response and recovery times are the times of the
+            t90 rows minus the start and end of exposure times.
+
+        ##########################################################
+    """
+
+    times = np.asarray(times, dtype=float)
+    values = np.asarray(values, dtype=float)
+
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+
+    respWindow = values[respSlice]
+    recWindow = values[recSlice]
+
+    if len(respWindow) == 0 or len(recWindow) == 0:
+        raise ValueError('Empty exposure or recovery! Verify your cycle time values!')
+
+    # 1
+    r0 = respWindow[0]
+    rf = respWindow[-1]
+    rf2 = recWindow[-1]
+
+    deltaR1 = np.abs(rf-r0)
+    deltaR2 = np.abs(rf2-rf)
+
+    # 2
+    responses = {responseType: responseOf(r0, rf, responseType)
+                 for responseType in RESPONSE_TYPES}
+
+    # 3
+    rising = rf > r0
+    resp90Target = np.where(rising, r0+(0.9*deltaR1), r0-(0.9*deltaR1))
+    rec90Target = np.where(rising, rf-(0.9*deltaR2), rf+(0.9*deltaR2))
+
+    resp90 = t90Positions(respWindow, resp90Target, t90Method)
+    rec90 = t90Positions(recWindow, rec90Target, t90Method)
+
+    # 4
+    respTimes = times[respSlice]
+    recTimes = times[recSlice]
+
+    responseTime = np.where(resp90 >= 0, respTimes[resp90]-respTimes[0], np.nan)
+    recoveryTime = np.where(rec90 >= 0, recTimes[rec90]-recTimes[0], np.nan)
+
+    return CycleProperties(r0, rf, rf2, responses, responseTime, recoveryTime)
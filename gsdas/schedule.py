@@ -0,0 +1,223 @@
+import csv
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+SCHEDULE_COLUMNS = ('concentration', 'startExposure', 'endExposure', 'endRecovery')
+
+
+@dataclass
+class CycleSchedule:
+    """
+        ##########################################################
+
+        SCHEDULE: The valve schedule logged by the gas mixing
+        bench, one row per cycle with the concentration and the
+        start and end of the exposure. The end of the recovery is
+        optional: by default each recovery lasts until the next
+        exposure starts, and the last one until the end of the
+        data.
+
+        The times are in the time unit of the visualization, the
+        same values the user would type in the Response dialog.
+
+        ##########################################################
+    """
+
+    concentrations: List[float] = field(default_factory=list)
+    startExposure: List[float] = field(default_factory=list)
+    endExposure: List[float] = field(default_factory=list)
+    endRecovery: Optional[List[float]] = None
+    source: str = ''
+
+    def __post_init__(self) -> None:
+        numberOfCycles = len(self.concentrations)
+
+        columns = [self.startExposure, self.endExposure]
+
+        if self.endRecovery is not None:
+            columns.append(self.endRecovery)
+
+        if any(len(column) != numberOfCycles for column in columns):
+            raise ValueError('Every cycle of the schedule needs the same number of values!')
+
+        if numberOfCycles == 0:
+            raise ValueError('Empty schedule!')
+
+        times = np.asarray(self.startExposure, dtype=float)
+
+        if np.any(np.asarray(self.endExposure, dtype=float) <= times):
+            raise ValueError('The end of exposure must come after its start!')
+
+        if np.any(np.diff(times) <= 0):
+            raise ValueError('The exposures of the schedule must be in order!')
+
+    def __len__(self) -> int:
+        return len(self.concentrations)
+
+    @classmethod
+    def fromRows(cls, rows: Sequence[Sequence[float]], source: str = '') -> 'CycleSchedule':
+        """ Builds a schedule from [conc, start, end(, end of recovery)] rows. """
+
+        try:
+            rows = [[float(value) for value in row] for row in rows]
+        except (TypeError, ValueError):
+            raise ValueError('Invalid schedule values!')
+
+        widths = {len(row) for row in rows}
+
+        if len(widths) > 1 or not widths <= {3, 4}:
+            raise ValueError(
+                'Each cycle of the schedule needs concentration, start and end of exposure!')
+
+        columns = [list(column) for column in zip(*rows)] or [[], [], []]
+
+        return cls(concentrations=columns[0],
+                   startExposure=columns[1],
+                   endExposure=columns[2],
+                   endRecovery=columns[3] if len(columns) == 4 else None,
+                   source=source)
+
+    @classmethod
+    def fromDict(cls, values: Dict, source: str = '') -> 'CycleSchedule':
+        """
+            ##########################################################
+
+            Builds a schedule from a JSON object, either with one list
+            per column:
+
+                {"concentration": [...], "startExposure": [...],
+                 "endExposure": [...]}
+
+            or with a list of cycles, each one a list of values or an
+            object with those keys:
+
+                {"cycles": [[0.5, 50, 60], [1, 110, 120]]}
+
+            ##########################################################
+        """
+
+        if 'cycles' in values:
+            values = values['cycles']
+
+        if isinstance(values, dict):
+            if 'concentrations' in values:
+                values = dict(values, concentration=values['concentrations'])
+
+            try:
+                rows = list(zip(*[values[key] for key in SCHEDULE_COLUMNS
+                                  if values.get(key) is not None or key != 'endRecovery']))
+            except KeyError as key:
+                raise ValueError(f'Missing schedule column: {key}')
+
+            return cls.fromRows(rows, source)
+
+        rows = []
+
+        for cycle in values:
+            if isinstance(cycle, dict):
+                try:
+                    cycle = [cycle[key] for key in SCHEDULE_COLUMNS
+                             if cycle.get(key) is not None or key != 'endRecovery']
+                except KeyError as key:
+                    raise ValueError(f'Missing schedule column: {key}')
+
+            rows.append(cycle)
+
+        return cls.fromRows(rows, source)
+
+    @classmethod
+    def fromFile(cls, path: str) -> 'CycleSchedule':
+        """
+            ##########################################################
+
+            Reads a schedule from a JSON file (see fromDict) or from a
+            CSV/text file with one cycle per line:
+
+                concentration, start of exposure, end of exposure
+
+            and optionally the end of recovery as a fourth column.
+            The separator can be a comma, semicolon, tab or spaces,
+            lines starting with '#' are comments and a first line
+            that is not numeric is taken as the header.
+
+            ##########################################################
+        """
+
+        source = os.path.abspath(path)
+
+        with open(path, newline='') as scheduleFile:
+            text = scheduleFile.read()
+
+        if os.path.splitext(path)[1].lower() == '.json':
+            try:
+                return cls.fromDict(json.loads(text), source)
+            except json.JSONDecodeError:
+                raise ValueError('Invalid schedule file!')
+
+        lines = [line for line in text.splitlines()
+                 if line.strip() and not line.lstrip().startswith('#')]
+
+        if not lines:
+            raise ValueError('Empty schedule!')
+
+        try:
+            separator = csv.Sniffer().sniff(lines[-1], delimiters=',;\t').delimiter
+            rows = [[value.strip() for value in row]
+                    for row in csv.reader(lines, delimiter=separator)]
+        except csv.Error:
+            rows = [line.split() for line in lines]
+
+        try:
+            [float(value) for value in rows[0]]
+        except ValueError:
+            rows = rows[1:]
+
+        return cls.fromRows([[value for value in row if value] for row in rows], source)
+
+    def toDict(self) -> Dict:
+        return asdict(self)
+
+    def firstTime(self) -> float:
+        return float(self.startExposure[0])
+
+    def lastTime(self) -> float:
+        """ Last time the schedule needs: end of the last exposure or recovery. """
+
+        if self.endRecovery is not None:
+            return float(np.max(self.endRecovery))
+
+        return float(np.max(self.endExposure))
+
+    def fitsIn(self, firstTime: float, lastTime: float) -> bool:
+        """ True if every cycle of the schedule lies between firstTime and lastTime. """
+
+        return firstTime <= self.firstTime() and self.lastTime() <= lastTime
+
+    def cycleTimes(self, lastTime: float) -> np.ndarray:
+        """
+            ##########################################################
+
+            Returns one row per cycle with the start of exposure, end
+            of exposure and end of recovery times, ready for
+            AnalysisEngine.calcCycles. Without the end of recovery
+            column, each recovery ends when the next exposure starts
+            and the last one at lastTime.
+
+            ##########################################################
+        """
+
+        startExposure = np.asarray(self.startExposure, dtype=float)
+
+        if self.endRecovery is not None:
+            endRecovery = np.asarray(self.endRecovery, dtype=float)
+        else:
+            endRecovery = np.append(startExposure[1:], lastTime)
+
+        return np.column_stack([startExposure,
+                                np.asarray(self.endExposure, dtype=float),
+                                endRecovery])
@@ -0,0 +1,244 @@
+from typing import List, NamedTuple, Optional
+
+import os
+
+from .archive import DataStream, isArchive, listMembers, sourcePath
+
+SAMPLE_SIZE = 8192
+
+# in order of preference when more than one fits the sample
+SEPARATORS = ('\t', ';', ',', ' ')
+WHITESPACE = r'\s+'
+
+
+class FileFormat(NamedTuple):
+    """ Layout of a data file, as found by sniffFormat. """
+
+    separator: str
+    decimal: str
+    headerLines: int
+    numberOfColumns: int
+    sample: List[str]
+
+
+def readSample(fileName: str, sampleSize: int = SAMPLE_SIZE) -> List[str]:
+    """ Complete lines found in the first sampleSize bytes of the file. """
+
+    with DataStream(fileName) as dataFile:
+        block = dataFile.stream.read(sampleSize+1)
+
+    truncated = len(block) > sampleSize
+    lines = block[:sampleSize].decode('utf-8', errors='replace').splitlines()
+
+    # the last line of a truncated sample may be cut in half
+    if truncated and len(lines) > 1:
+        lines = lines[:-1]
+
+    return lines
+
+
+def readTailSample(fileName: str, sampleSize: int = SAMPLE_SIZE) -> List[str]:
+    """
+        ##########################################################
+
+        Complete lines found in the last sampleSize bytes of the
+        file, read by seeking to its end. Compressed data cannot
+        be read backwards without decompressing all of it, so for
+        archives the list is empty.
+
+        ##########################################################
+    """
+
+    if isArchive(sourcePath(fileName)):
+        return []
+
+    with open(fileName, 'rb') as dataFile:
+        fileSize = dataFile.seek(0, os.SEEK_END)
+        dataFile.seek(max(fileSize-sampleSize, 0))
+        block = dataFile.read()
+
+    lines = block.decode('utf-8', errors='replace').splitlines()
+
+    # the first line is cut in half unless the sample is the whole file
+    if fileSize > sampleSize and len(lines) > 1:
+        lines = lines[1:]
+
+    return [line for line in lines if line.strip()]
+
+
+def splitLine(line: str, separator: str) -> List[str]:
+    if separator == WHITESPACE:
+        return line.split()
+
+    return [field.strip() for field in line.strip('\r\n').split(separator)]
+
+
+def isNumber(field: str, decimal: str) -> bool:
+    if decimal != '.':
+        if '.' in field:
+            return False
+
+        field = field.replace(decimal, '.')
+
+    try:
+        float(field)
+    except ValueError:
+        return False
+
+    return True
+
+
+def numericRow(line: str, separator: str, decimal: str) -> Optional[int]:
+    """ Number of fields of the line if all of them are numbers (or missing), else None. """
+
+    fields = splitLine(line, separator)
+
+    if any(fields) and all(isNumber(field, decimal) for field in fields if field):
+        return len(fields)
+
+    return None
+
+
+def fitSample(lines: List[str], separator: str, decimal: str) -> Optional[tuple]:
+    """
+        ##########################################################
+
+        Tries one separator and decimal mark on the sample. The
+        header is every line before the first line made only of
+        numbers ('#' comments, column names, blank lines). Every
+        data line after it must have the same number of numeric
+        fields.
+
+        Returns (headerLines, numberOfColumns) or None.
+
+        ##########################################################
+    """
+
+    for first, line in enumerate(lines):
+        if line.lstrip().startswith('#'):
+            continue
+
+        numberOfColumns = numericRow(line, separator, decimal)
+
+        if numberOfColumns is not None:
+            break
+    else:
+        return None
+
+    for line in lines[first+1:]:
+        if line.strip() and numericRow(line, separator, decimal) != numberOfColumns:
+            return None
+
+    return first, numberOfColumns
+
+
+def sniffFormat(fileName: str, separator: Optional[str] = None,
+                sampleSize: int = SAMPLE_SIZE) -> FileFormat:
+    """
+        ##########################################################
+
+        Finds the layout of a data file from its first sampleSize
+        bytes only, without parsing the whole file:
+
+        #1. Each separator (tab, semicolon, comma, space), or only
+            the given one, is tried with '.' and then ',' as the
+            decimal mark (a comma cannot be both);
+
+        #2. The separator that fits the sample with the most
+            columns wins, the first of SEPARATORS on a tie. Runs of
+            spaces become the r'\\s+' separator;
+
+        #3. The header lines are the lines before the first data
+            line, like the '#' lines written by exportData.
+
+        A file whose sample fits no separator raises a ValueError.
+
+        ##########################################################
+    """
+
+    lines = readSample(fileName, sampleSize)
+
+    if not any(line.strip() for line in lines):
+        raise ValueError('Empty data file!')
+
+    # 1
+    candidates = [separator] if separator else list(SEPARATORS)
+    best = None
+
+    for candidate in candidates:
+        if candidate == ' ' and any('  ' in line or line[:1] == ' ' for line in lines):
+            candidate = WHITESPACE
+
+        for decimal in ('.', ','):
+            if decimal == candidate:
+                continue
+
+            fit = fitSample(lines, candidate, decimal)
+
+            # 2
+            if fit is not None:
+                if best is None or fit[1] > best[3]:
+                    best = (candidate, decimal) + fit
+                break
+
+    if best is None or best[3] < 2:
+        raise ValueError('Invalid column separator!')
+
+    # 3
+    candidate, decimal, headerLines, numberOfColumns = best
+
+    return FileFormat(candidate, decimal, headerLines, numberOfColumns,
+                      lines[headerLines:])
+
+
+def listDataMembers(archive: str, pattern: Optional[str] = None) -> List[str]:
+    """
+        ##########################################################
+
+        Candidate data files of an archive: the members that look
+        like a numeric table from their first few KB. Tables
+        without header lines, like the raw acquisitions, come
+        before exported results.
+
+        ##########################################################
+    """
+
+    candidates = []
+
+    for member in listMembers(archive, pattern):
+        try:
+            fileFormat = sniffFormat(member)
+        except (OSError, ValueError, EOFError):
+            continue
+
+        candidates.append((fileFormat.headerLines > 0, member))
+
+    return [member for _, member in sorted(candidates, key=lambda item: item[0])]
+
+
+def rawTableProblem(fileName: str, numberOfChannels: int = 1) -> Optional[str]:
+    """
+        ##########################################################
+
+        Why the file is not a raw acquisition table, or None if it
+        is one: a table with a time column and at least
+        numberOfChannels channels, without the '#' comment lines
+        that exportData writes at the top of its results (column
+        names before the data are fine).
+
+        ##########################################################
+    """
+
+    try:
+        fileFormat = sniffFormat(fileName)
+    except (OSError, ValueError, EOFError) as error:
+        return str(error) or 'cannot be read'
+
+    if fileFormat.headerLines and any(line.lstrip().startswith('#') for line in
+                                      readSample(fileName)[:fileFormat.headerLines]):
+        return "'#' header lines of exported results"
+
+    if fileFormat.numberOfColumns-1 < numberOfChannels:
+        return f'{fileFormat.numberOfColumns-1} channels, {numberOfChannels} needed'
+
+    return None
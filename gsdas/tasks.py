@@ -0,0 +1,200 @@
+from typing import Any, Callable, Dict, Optional
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+from PyQt5.QtWidgets import QApplication
+
+
+class TaskCancelled(Exception):
+    """ Raised inside a task by its progress callback once it is cancelled. """
+
+
+class TaskSignals(QObject):
+    """ Signals of a Task, emitted from the worker thread with the resource name. """
+
+    progress = pyqtSignal(str, float)
+    finished = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+    cancelled = pyqtSignal(str)
+
+
+class Task(QRunnable):
+    """
+        ##########################################################
+
+        TASK: Runs function(*args, **kwargs) on a thread of the
+        QThreadPool. With withProgress, the function also gets a
+        progress callback (progress=fraction from 0 to 1) that
+        emits the progress signal and raises TaskCancelled once
+        cancel() was called, so a long job stops at its next
+        report. A job cancelled before it reports again still
+        runs to the end, but its result is dropped.
+
+        ValueError, OSError and RuntimeError raised by the function
+        are emitted by the failed signal with their message, to be
+        shown to the user like any other error of the engine.
+
+        ##########################################################
+    """
+
+    def __init__(self, resource: str, function: Callable, *args,
+                 withProgress: bool = False, **kwargs) -> None:
+        super().__init__()
+
+        self.resource = resource
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        self.isCancelled = False
+
+        if withProgress:
+            self.kwargs['progress'] = self.reportProgress
+
+        # the manager keeps the task until its signals are delivered
+        self.setAutoDelete(False)
+
+    def cancel(self) -> None:
+        self.isCancelled = True
+
+    def reportProgress(self, fraction: float) -> None:
+        if self.isCancelled:
+            raise TaskCancelled()
+
+        self.signals.progress.emit(self.resource, fraction)
+
+    def run(self) -> None:
+        if self.isCancelled:
+            self.signals.cancelled.emit(self.resource)
+            return
+
+        try:
+            result = self.function(*self.args, **self.kwargs)
+
+        except TaskCancelled:
+            self.signals.cancelled.emit(self.resource)
+
+        except (ValueError, OSError, RuntimeError) as error:
+            self.signals.failed.emit(self.resource, str(error))
+
+        except Exception:
+            self.signals.failed.emit(self.resource, 'Error :(\t Check your dataset!')
+
+        else:
+            if self.isCancelled:
+                self.signals.cancelled.emit(self.resource)
+            else:
+                self.signals.finished.emit(self.resource, result)
+
+
+class TaskManager(QObject):
+    """
+        ##########################################################
+
+        TASK MANAGER: Starts the heavy jobs of the interface (load,
+        calculation, fit, export) as Tasks on a QThreadPool, so the
+        main window stays responsive while they run.
+
+        #1. Each job holds a resource (e.g. 'data', 'properties',
+            'fit', 'export') and only one job per resource runs at
+            a time: start returns None while the resource is busy;
+
+        #2. The signals of the task are delivered to the manager
+            on the GUI thread, which frees the resource and then
+            calls onProgress(fraction), onFinished(result),
+            onError(message) or onCancelled(), so the callbacks can
+            update widgets and plots safely.
+
+        This module is the only part of the package that needs Qt.
+
+        ##########################################################
+    """
+
+    def __init__(self, parent: Optional[QObject] = None,
+                 pool: Optional[QThreadPool] = None) -> None:
+        super().__init__(parent)
+
+        self.pool = pool or QThreadPool.globalInstance()
+        self.tasks: Dict[str, Task] = {}
+        self.callbacks: Dict[str, Dict[str, Optional[Callable]]] = {}
+
+    def isBusy(self, resource: str) -> bool:
+        return resource in self.tasks
+
+    def start(self, resource: str, function: Callable, *args,
+              onFinished: Optional[Callable[[Any], None]] = None,
+              onError: Optional[Callable[[str], None]] = None,
+              onProgress: Optional[Callable[[float], None]] = None,
+              onCancelled: Optional[Callable[[], None]] = None,
+              **kwargs) -> Optional[Task]:
+        """ Runs function on the pool, or returns None if the resource is busy. """
+
+        # 1
+        if self.isBusy(resource):
+            return None
+
+        task = Task(resource, function, *args, withProgress=onProgress is not None, **kwargs)
+
+        # 2
+        task.signals.progress.connect(self.taskProgress)
+        task.signals.finished.connect(self.taskFinished)
+        task.signals.failed.connect(self.taskFailed)
+        task.signals.cancelled.connect(self.taskCancelled)
+
+        self.tasks[resource] = task
+        self.callbacks[resource] = {'progress': onProgress, 'finished': onFinished,
+                                    'error': onError, 'cancelled': onCancelled}
+
+        self.pool.start(task)
+
+        return task
+
+    def cancel(self, resource: str) -> None:
+        if resource in self.tasks:
+            self.tasks[resource].cancel()
+
+    def cancelAll(self) -> None:
+        for task in self.tasks.values():
+            task.cancel()
+
+    def waitForDone(self, msecs: int = -1) -> bool:
+        """ Blocks until every task ends and delivers their signals. """
+
+        done = self.pool.waitForDone(msecs)
+        QApplication.processEvents()
+
+        return done
+
+    def release(self, resource: str, callback: str) -> Optional[Callable]:
+        """ Frees the resource and returns the callback of the ending task. """
+
+        self.tasks.pop(resource, None)
+
+        return self.callbacks.pop(resource, {}).get(callback)
+
+    @pyqtSlot(str, float)
+    def taskProgress(self, resource: str, fraction: float) -> None:
+        callback = self.callbacks.get(resource, {}).get('progress')
+
+        if callback is not None:
+            callback(fraction)
+
+    @pyqtSlot(str, object)
+    def taskFinished(self, resource: str, result: object) -> None:
+        callback = self.release(resource, 'finished')
+
+        if callback is not None:
+            callback(result)
+
+    @pyqtSlot(str, str)
+    def taskFailed(self, resource: str, message: str) -> None:
+        callback = self.release(resource, 'error')
+
+        if callback is not None:
+            callback(message)
+
+    @pyqtSlot(str)
+    def taskCancelled(self, resource: str) -> None:
+        callback = self.release(resource, 'cancelled')
+
+        if callback is not None:
+            callback()
@@ -0,0 +1,53 @@
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def positionsSlice(positions: Sequence[int]) -> Optional[slice]:
+    """ The positions as a slice if they are increasing and evenly spaced, else None. """
+
+    positions = [int(position) for position in positions]
+
+    if len(positions) == 1:
+        return slice(positions[0], positions[0]+1)
+
+    step = positions[1]-positions[0]
+
+    if step > 0 and all(b-a == step for a, b in zip(positions, positions[1:])):
+        return slice(positions[0], positions[-1]+1, step)
+
+    return None
+
+
+def windowView(data: np.ndarray, rows: slice, columns: Sequence[int],
+               names: Sequence[str], times: np.ndarray,
+               indexName: str = 'Time') -> pd.DataFrame:
+    """
+        ##########################################################
+
+        ZERO-COPY WINDOW: The rows and columns of the 2D array data
+        as a DataFrame that shares its memory instead of copying
+        it, with times as its index (also used as it is):
+
+        #1. Columns evenly spaced (ch1, ch2, ch3 or ch1, ch3, ch5)
+            are one strided view of data;
+
+        #2. Any other choice of columns would be copied by NumPy
+            and pandas, so each column is its own 1D view and the
+            DataFrame is built without joining them in one block.
+
+        ##########################################################
+    """
+
+    index = pd.Index(times, name=indexName, copy=False)
+    columnSlice = positionsSlice(columns)
+
+    # 1
+    if columnSlice is not None:
+        return pd.DataFrame(data[rows, columnSlice], index=index, columns=list(names),
+                            copy=False)
+
+    # 2
+    return pd.DataFrame({name: data[rows, column] for name, column in zip(names, columns)},
+                        index=index, copy=False)